@@ -1,12 +1,24 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta
-from typing import Iterable, List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import select, or_, func
+from typing import Iterable, Iterator, List, Optional
+import math
+import zlib
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select, update, insert, delete, bindparam, or_, func, text
+from sqlalchemy.exc import IntegrityError
 import json
 
 from . import models
+from .utils.probe_dedup import probe_key
+from .utils.network import ProbeResult
+from .utils.probe_registry import get_probe, service_options_key
+from .utils.adaptive_timeout import adaptive_timeout, update_estimate
+from .utils import host_batching
+from .utils.uptime_windows import MonitorWindows
+
+
+_EPOCH = datetime(1970, 1, 1)
 
 
 # Tenants
@@ -26,6 +38,16 @@ def list_tenants(db: Session) -> List[models.Tenant]:
     return list(db.scalars(select(models.Tenant).order_by(models.Tenant.id)))
 
 
+def update_retention_policy(db: Session, tenant_id: int, **kwargs) -> models.Tenant:
+    # None tenant ayarını kaldırır (sunucu varsayılanına döner); verilmeyen alanlar değişmez
+    tenant = db.get(models.Tenant, tenant_id)
+    for key, value in kwargs.items():
+        setattr(tenant, key, value)
+    db.commit()
+    db.refresh(tenant)
+    return tenant
+
+
 # Servers
 def create_server(db: Session, tenant_id: int, name: str, host: str) -> models.Server:
     server = models.Server(tenant_id=tenant_id, name=name, host=host)
@@ -107,7 +129,12 @@ def delete_ping_location(db: Session, location: models.PingLocation) -> None:
 # Services
 def create_service(db: Session, tenant_id: Optional[int], name: str, protocol: models.ProtocolEnum, port: int, is_global: bool,
                    location: Optional[str] = None, country: Optional[str] = None, city: Optional[str] = None,
-                   ping_location_id: Optional[int] = None) -> models.ServiceDefinition:
+                   ping_location_id: Optional[int] = None, udp_payload_type: Optional[models.UdpPayloadTypeEnum] = None,
+                   udp_payload: Optional[str] = None, http_path: Optional[str] = None,
+                   http_method: Optional[models.HttpMethodEnum] = None, http_expected_status: Optional[int] = None,
+                   http_body_match: Optional[str] = None, http_tls: Optional[bool] = None,
+                   dns_query_name: Optional[str] = None, dns_record_type: Optional[models.DnsRecordTypeEnum] = None,
+                   dns_expected_answer: Optional[str] = None) -> models.ServiceDefinition:
     service = models.ServiceDefinition(
         tenant_id=None if is_global else tenant_id,
         name=name,
@@ -117,8 +144,19 @@ def create_service(db: Session, tenant_id: Optional[int], name: str, protocol: m
         location=location,
         country=country,
         city=city,
-        ping_location_id=ping_location_id
+        ping_location_id=ping_location_id,
+        udp_payload_type=udp_payload_type,
+        udp_payload=udp_payload,
+        http_path=http_path,
+        http_method=http_method,
+        http_expected_status=http_expected_status,
+        http_body_match=http_body_match,
+        http_tls=port == 443 if http_tls is None else http_tls,
+        dns_query_name=dns_query_name,
+        dns_record_type=dns_record_type,
+        dns_expected_answer=dns_expected_answer,
     )
+    service.options_key = service_options_key(service)
     db.add(service)
     db.commit()
     db.refresh(service)
@@ -146,6 +184,7 @@ def update_service(db: Session, tenant_id: int, service: models.ServiceDefinitio
         if value is None:
             continue
         setattr(service, key, value)
+    service.options_key = service_options_key(service)
     db.commit()
     db.refresh(service)
     return service
@@ -157,13 +196,20 @@ def delete_service(db: Session, tenant_id: int, service: models.ServiceDefinitio
 
 
 # Monitors
-def create_monitor(db: Session, tenant_id: int, server_id: int, service_id: int, interval_seconds: int, enabled: bool) -> models.Monitor:
+def create_monitor(db: Session, tenant_id: int, server_id: int, service_id: int, interval_seconds: int, enabled: bool,
+                   backoff_enabled: bool = False, backoff_after_failures: int = 3, backoff_max_interval_seconds: int = 3600,
+                   confirm_interval_seconds: Optional[int] = None, adaptive_timeout_enabled: bool = False) -> models.Monitor:
     monitor = models.Monitor(
         tenant_id=tenant_id,
         server_id=server_id,
         service_id=service_id,
         interval_seconds=interval_seconds,
         enabled=enabled,
+        backoff_enabled=backoff_enabled,
+        backoff_after_failures=backoff_after_failures,
+        backoff_max_interval_seconds=backoff_max_interval_seconds,
+        confirm_interval_seconds=confirm_interval_seconds,
+        adaptive_timeout_enabled=adaptive_timeout_enabled,
         next_run_at=datetime.utcnow(),
     )
     db.add(monitor)
@@ -183,11 +229,24 @@ def get_monitor(db: Session, tenant_id: int, monitor_id: int) -> Optional[models
     return monitor if monitor.tenant_id == tenant_id else None
 
 
-def update_monitor(db: Session, tenant_id: int, monitor: models.Monitor, interval_seconds: Optional[int], enabled: Optional[bool]) -> models.Monitor:
+def update_monitor(db: Session, tenant_id: int, monitor: models.Monitor, interval_seconds: Optional[int], enabled: Optional[bool],
+                   backoff_enabled: Optional[bool] = None, backoff_after_failures: Optional[int] = None,
+                   backoff_max_interval_seconds: Optional[int] = None, confirm_interval_seconds: Optional[int] = None,
+                   adaptive_timeout_enabled: Optional[bool] = None) -> models.Monitor:
     if interval_seconds is not None:
         monitor.interval_seconds = interval_seconds
     if enabled is not None:
         monitor.enabled = enabled
+    if backoff_enabled is not None:
+        monitor.backoff_enabled = backoff_enabled
+    if backoff_after_failures is not None:
+        monitor.backoff_after_failures = backoff_after_failures
+    if backoff_max_interval_seconds is not None:
+        monitor.backoff_max_interval_seconds = backoff_max_interval_seconds
+    if confirm_interval_seconds is not None:
+        monitor.confirm_interval_seconds = confirm_interval_seconds or None
+    if adaptive_timeout_enabled is not None:
+        monitor.adaptive_timeout_enabled = adaptive_timeout_enabled
     db.commit()
     db.refresh(monitor)
     return monitor
@@ -198,7 +257,14 @@ def delete_monitor(db: Session, tenant_id: int, monitor: models.Monitor) -> None
     db.commit()
 
 
-def due_monitors(db: Session, now: datetime, limit: int = 50) -> List[models.Monitor]:
+def _shard_filter(stmt, shard_count: int, shards: Optional[Iterable[int]], column=None):
+    if shards is None or shard_count <= 1:
+        return stmt
+    column = models.Monitor.id if column is None else column
+    return stmt.where((column % shard_count).in_(list(shards)))
+
+
+def due_monitors(db: Session, now: datetime, limit: int = 50, shard_count: int = 1, shards: Optional[Iterable[int]] = None) -> List[models.Monitor]:
     stmt = (
         select(models.Monitor)
         .where(
@@ -206,19 +272,169 @@ def due_monitors(db: Session, now: datetime, limit: int = 50) -> List[models.Mon
             models.Monitor.next_run_at.is_not(None),
             models.Monitor.next_run_at <= now,
         )
+        .options(joinedload(models.Monitor.server), joinedload(models.Monitor.service))
         .order_by(models.Monitor.next_run_at)
         .limit(limit)
     )
+    return list(db.scalars(_shard_filter(stmt, shard_count, shards)))
+
+
+def count_due_monitors(db: Session, now: datetime, shard_count: int = 1, shards: Optional[Iterable[int]] = None) -> int:
+    stmt = select(func.count(models.Monitor.id)).where(
+        models.Monitor.enabled.is_(True),
+        models.Monitor.next_run_at.is_not(None),
+        models.Monitor.next_run_at <= now,
+    )
+    return db.scalar(_shard_filter(stmt, shard_count, shards)) or 0
+
+
+def list_schedule_entries(db: Session, shard_count: int = 1, shards: Optional[Iterable[int]] = None) -> List[tuple[int, datetime]]:
+    """Bellek içi zamanlayıcı için aktif monitor'lerin (id, next_run_at) çiftlerini getirir"""
+    stmt = select(models.Monitor.id, models.Monitor.next_run_at).where(
+        models.Monitor.enabled.is_(True),
+        models.Monitor.next_run_at.is_not(None),
+    )
+    return [(row.id, row.next_run_at) for row in db.execute(_shard_filter(stmt, shard_count, shards))]
+
+
+def get_monitors_by_ids(db: Session, monitor_ids: Iterable[int]) -> List[models.Monitor]:
+    ids = list(monitor_ids)
+    if not ids:
+        return []
+    stmt = (
+        select(models.Monitor)
+        .where(models.Monitor.id.in_(ids), models.Monitor.enabled.is_(True))
+        .options(joinedload(models.Monitor.server), joinedload(models.Monitor.service))
+    )
     return list(db.scalars(stmt))
 
 
-def schedule_next_run(db: Session, monitor: models.Monitor, now: datetime) -> None:
-    monitor.next_run_at = now + timedelta(seconds=max(5, monitor.interval_seconds))
-    db.commit()
+def schedule_phase(host: str, protocol: str, port: int, interval_seconds: int) -> float:
+    """
+    Monitor'ün aralık içindeki sabit faz kaydırması (saniye).
+    Hedefin hash'inden türetilir: farklı hedefler periyoda eşit yayılır, aynı hedefi
+    izleyen monitor'ler ise aynı anda düşer ve tek probe'da birleştirilebilir.
+    """
+    digest = zlib.crc32("|".join(map(str, probe_key(host, protocol, port))).encode())
+    return (digest % (interval_seconds * 1000)) / 1000.0
+
+
+def effective_interval(monitor: models.Monitor) -> int:
+    """
+    Monitor'ün son sonuçlarına göre bir sonraki kontrole kadar beklenecek aralık (saniye).
+
+    - Durum yeni değiştiyse (ilk up/down sonucu) ve doğrulama aralığı tanımlıysa kısa aralık
+    - Backoff açıksa N ardışık başarısızlıktan sonra her başarısızlıkta aralık iki katına çıkar
+      (en fazla backoff_max_interval_seconds); ilk başarılı kontrolde normal aralığa döner
+    """
+    interval = monitor.interval_seconds
+    state_changed = monitor.total_checks > 1 and (monitor.consecutive_failures == 1 or monitor.consecutive_successes == 1)
+    if monitor.confirm_interval_seconds and state_changed:
+        return min(interval, monitor.confirm_interval_seconds)
+    if monitor.backoff_enabled and monitor.consecutive_failures >= monitor.backoff_after_failures:
+        exponent = min(monitor.consecutive_failures - monitor.backoff_after_failures + 1, 20)
+        cap = max(interval, monitor.backoff_max_interval_seconds)
+        return min(cap, interval * 2 ** exponent)
+    return interval
+
+
+def probe_timeout(monitor: models.Monitor) -> float:
+    """
+    Monitor'ün bir sonraki kontrolünde kullanılacak timeout (saniye).
+
+    Adaptif timeout kapalıysa veya henüz gecikme örneği yoksa protokolün varsayılan timeout'u kullanılır.
+    Ardışık başarısızlık sayısı 1, 2, 4, 8... olduğunda kontrol varsayılan timeout ile yapılır; hedef
+    yalnızca yavaşladıysa bu kontrol başarılı olur ve tahmin yeni gecikmeye uyar.
+    """
+    probe = get_probe(monitor.service.protocol.value)
+    ceiling = probe.default_timeout if probe is not None else 3.0
+    if not monitor.adaptive_timeout_enabled or monitor.latency_ewma_ms is None or monitor.latency_dev_ms is None:
+        return ceiling
+    failures = monitor.consecutive_failures
+    if failures and failures & (failures - 1) == 0:
+        return ceiling
+    return adaptive_timeout(monitor.latency_ewma_ms, monitor.latency_dev_ms, ceiling)
+
+
+def next_run_time(monitor: models.Monitor, now: datetime) -> datetime:
+    interval = max(5, effective_interval(monitor))
+    protocol, port = monitor.service.protocol.value, monitor.service.port
+    probe = get_probe(protocol)
+    if host_batching.ENABLED and probe is not None and probe.supports_batching:
+        # Sunucunun tüm portları aynı fazda düşer; scheduler onları tek grupta çalıştırır
+        protocol, port = "", 0
+    phase = schedule_phase(monitor.server.host, protocol, port, interval)
+    # Yarım aralıktan sonraki ilk faz noktası; gecikmeli kontroller periyodu kaydırmaz
+    elapsed = (now - _EPOCH).total_seconds() + interval / 2.0 - phase
+    return _EPOCH + timedelta(seconds=(math.floor(elapsed / interval) + 1) * interval + phase)
+
+
+def stagger_overdue_monitors(db: Session, now: datetime, ramp_seconds: float, min_overdue_seconds: float,
+                             shard_count: int = 1, shards: Optional[Iterable[int]] = None) -> int:
+    """
+    Yeniden başlatma sonrası birikmiş (gecikmiş) monitor'leri hepsini aynı anda çalıştırmak
+    yerine `ramp_seconds` (en fazla kendi aralıkları) içine deterministik olarak yayar.
+    """
+    stmt = select(models.Monitor.id, models.Monitor.interval_seconds).where(
+        models.Monitor.enabled.is_(True),
+        models.Monitor.next_run_at.is_not(None),
+        models.Monitor.next_run_at < now - timedelta(seconds=min_overdue_seconds),
+    )
+    rows = []
+    for row in db.execute(_shard_filter(stmt, shard_count, shards)):
+        window = min(ramp_seconds, max(5, row.interval_seconds))
+        fraction = zlib.crc32(str(row.id).encode()) / 2**32
+        rows.append({"monitor_id": row.id, "next_run_at": now + timedelta(seconds=fraction * window)})
+    if rows:
+        table = models.Monitor.__table__
+        db.execute(update(table).where(table.c.id == bindparam("monitor_id")), rows)
+        db.commit()
+    return len(rows)
+
+
+def apply_check_result(
+    monitor: models.Monitor,
+    result: ProbeResult,
+    checked_at: Optional[datetime] = None,
+    windows: Optional[MonitorWindows] = None,
+) -> None:
+    """
+    Kontrol sonucunu, aşama sürelerini ve sayaçları monitor'e bellekte uygular (commit yapmaz).
+    `windows` verilmezse uptime pencereleri monitor'ün checkpoint'inden yüklenir ve hemen geri yazılır;
+    scheduler kendi bellekteki pencerelerini verir ve checkpoint'i kendisi seyreltir.
+    """
+    monitor.last_status = "up" if result.success else "down"
+    monitor.last_latency_ms = result.latency_ms
+    monitor.last_error = result.error
+    monitor.last_resolve_ms = result.timings.resolve_ms
+    monitor.last_connect_ms = result.timings.connect_ms
+    monitor.last_first_byte_ms = result.timings.first_byte_ms
+    monitor.last_total_ms = result.timings.total_ms
+    monitor.last_response_code = result.response_code
+    monitor.last_timeout_ms = result.timeout_ms
+    if result.success and result.latency_ms is not None:
+        monitor.latency_ewma_ms, monitor.latency_dev_ms = update_estimate(monitor.latency_ewma_ms, monitor.latency_dev_ms, result.latency_ms)
+    monitor.last_checked_at = checked_at or datetime.utcnow()
+    apply_monitor_stats(monitor, result.success)
+    if windows is None:
+        windows = MonitorWindows.from_state(monitor.uptime_windows)
+        windows.record(monitor.last_checked_at, result.success)
+        monitor.uptime_windows = windows.to_state()
+    else:
+        windows.record(monitor.last_checked_at, result.success)
+    apply_uptime_windows(monitor, windows, monitor.last_checked_at)
+
 
+def apply_uptime_windows(monitor: models.Monitor, windows: MonitorWindows, now: datetime) -> None:
+    """Kayan pencere uptime yüzdelerini monitor'e bellekte yazar"""
+    uptimes = windows.uptimes(now)
+    monitor.uptime_1h_percentage = uptimes["1h"]
+    monitor.uptime_24h_percentage = uptimes["24h"]
+    monitor.uptime_7d_percentage = uptimes["7d"]
 
-def update_monitor_stats(db: Session, monitor: models.Monitor, success: bool, latency_ms: Optional[float] = None) -> None:
-    """Monitor istatistiklerini günceller ve uptime hesaplar"""
+
+def apply_monitor_stats(monitor: models.Monitor, success: bool) -> None:
+    """Sayaçları ve ömür boyu uptime'ı yalnızca bellekte günceller (commit yapmaz)"""
     monitor.total_checks += 1
     
     if success:
@@ -232,10 +448,226 @@ def update_monitor_stats(db: Session, monitor: models.Monitor, success: bool, la
     # Uptime yüzdesini hesapla
     if monitor.total_checks > 0:
         monitor.uptime_percentage = ((monitor.total_checks - monitor.total_failures) / monitor.total_checks) * 100.0
-    
+
+
+def save_check_results(db: Session, monitor_rows: List[dict], alert_rows: List[dict], check_rows: Optional[List[dict]] = None) -> None:
+    """Toplanmış kontrol sonuçlarını, kontrol geçmişini ve alert kayıtlarını tek transaction ile yazar"""
+    if check_rows:
+        existing = set(db.scalars(select(models.Monitor.id).where(
+            models.Monitor.id.in_({row["monitor_id"] for row in check_rows})
+        )))
+        check_rows = [row for row in check_rows if row["monitor_id"] in existing]
+        if check_rows:
+            db.execute(insert(models.MonitorCheck), check_rows)
+    if monitor_rows:
+        # Core executemany; bu arada silinmiş monitor'lerin satırları sessizce atlanır.
+        # Executemany satırları aynı kolonları içermeli; checkpoint taşıyan satırlar ayrı gruplanır
+        table = models.Monitor.__table__
+        stmt = update(table).where(table.c.id == bindparam("monitor_id"))
+        groups = {}
+        for row in monitor_rows:
+            groups.setdefault(frozenset(row), []).append({"monitor_id": row["id"], **{k: v for k, v in row.items() if k != "id"}})
+        for rows in groups.values():
+            db.execute(stmt, rows)
+    if alert_rows:
+        existing = set(db.scalars(select(models.AlertRule.id).where(
+            models.AlertRule.id.in_({row["alert_rule_id"] for row in alert_rows})
+        )))
+        alert_rows = [row for row in alert_rows if row["alert_rule_id"] in existing]
+    if alert_rows:
+        db.execute(insert(models.AlertHistory), alert_rows)
+        triggered = {}
+        for row in alert_rows:
+            if row["sent_successfully"]:
+                triggered[row["alert_rule_id"]] = row["sent_at"]
+        if triggered:
+            db.execute(
+                update(models.AlertRule),
+                [{"id": rule_id, "last_triggered_at": sent_at} for rule_id, sent_at in triggered.items()],
+            )
+    db.commit()
+
+
+def save_uptime_windows(db: Session, states: dict[int, str]) -> None:
+    """Bellekteki uptime pencerelerinin checkpoint'lerini yazar (silinmiş monitor'ler atlanır)"""
+    if not states:
+        return
+    table = models.Monitor.__table__
+    stmt = update(table).where(table.c.id == bindparam("monitor_id"))
+    db.execute(stmt, [{"monitor_id": monitor_id, "uptime_windows": state} for monitor_id, state in states.items()])
+    db.commit()
+
+
+def add_check_history(db: Session, monitor: models.Monitor) -> None:
+    """Monitor'ün son kontrol sonucunu geçmişe ekler (commit yapmaz)"""
+    db.add(models.MonitorCheck(
+        monitor_id=monitor.id,
+        checked_at=monitor.last_checked_at,
+        success=monitor.last_status == "up",
+        latency_ms=monitor.last_latency_ms,
+    ))
+
+
+# Check history rollups
+def last_rollup_bucket(db: Session, resolution: int, shard_count: int = 1, shards: Optional[Iterable[int]] = None) -> Optional[datetime]:
+    rollup = models.MonitorCheckRollup
+    stmt = select(func.max(rollup.bucket_start)).where(rollup.resolution == resolution)
+    return db.scalar(_shard_filter(stmt, shard_count, shards, rollup.monitor_id))
+
+
+def first_rollup_source_time(db: Session, resolution: int, after: Optional[datetime], shard_count: int = 1,
+                             shards: Optional[Iterable[int]] = None) -> Optional[datetime]:
+    """`after`dan itibaren özetlenecek ilk kaynak kaydın zamanı (1 dakika: ham kayıtlar, diğerleri: bir alt seviye)"""
+    source, column, conditions = _rollup_source(resolution)
+    stmt = select(func.min(column)).where(*conditions)
+    if after is not None:
+        stmt = stmt.where(column >= after)
+    return db.scalar(_shard_filter(stmt, shard_count, shards, source.monitor_id))
+
+
+def load_rollup_source(db: Session, resolution: int, start: datetime, end: datetime, shard_count: int = 1,
+                       shards: Optional[Iterable[int]] = None) -> List[tuple]:
+    source, column, conditions = _rollup_source(resolution)
+    if source is models.MonitorCheck:
+        columns = (source.monitor_id, source.checked_at, source.success, source.latency_ms)
+    else:
+        columns = (source.monitor_id, source.bucket_start, source.check_count, source.failure_count, source.latency_count,
+                   source.latency_sum_ms, source.latency_min_ms, source.latency_max_ms, source.latency_p95_ms)
+    stmt = select(*columns).where(*conditions, column >= start, column < end)
+    return [tuple(row) for row in db.execute(_shard_filter(stmt, shard_count, shards, source.monitor_id))]
+
+
+def replace_rollups(db: Session, resolution: int, start: datetime, end: datetime, rows: List[dict], shard_count: int = 1,
+                    shards: Optional[Iterable[int]] = None) -> None:
+    """[start, end) aralığındaki özetleri yenileriyle değiştirir; yeniden hesaplama güvenlidir"""
+    rollup = models.MonitorCheckRollup
+    stmt = delete(rollup).where(rollup.resolution == resolution, rollup.bucket_start >= start, rollup.bucket_start < end)
+    db.execute(_shard_filter(stmt, shard_count, shards, rollup.monitor_id))
+    if rows:
+        # Bu arada silinmiş monitor'lerin özetleri yazılmaz
+        existing = set(db.scalars(select(models.Monitor.id).where(models.Monitor.id.in_({row["monitor_id"] for row in rows}))))
+        rows = [row for row in rows if row["monitor_id"] in existing]
+    if rows:
+        db.execute(insert(rollup), rows)
     db.commit()
 
 
+def _rollup_source(resolution: int):
+    if resolution == 60:
+        return models.MonitorCheck, models.MonitorCheck.checked_at, ()
+    finer = {3600: 60, 86400: 3600}[resolution]
+    rollup = models.MonitorCheckRollup
+    return rollup, rollup.bucket_start, (rollup.resolution == finer,)
+
+
+def monitor_history(db: Session, monitor_id: int, start: datetime, end: datetime, resolution: Optional[int] = None,
+                    limit: int = 10000) -> List[dict]:
+    """
+    Monitor'ün [start, end) aralığındaki geçmişi; resolution None ise ham kontrol kayıtları,
+    aksi halde o çözünürlükteki özetler okunur.
+    """
+    if resolution is None:
+        check = models.MonitorCheck
+        stmt = (
+            select(check.checked_at, check.success, check.latency_ms)
+            .where(check.monitor_id == monitor_id, check.checked_at >= start, check.checked_at < end)
+            .order_by(check.checked_at)
+            .limit(limit)
+        )
+        return [
+            {
+                "time": checked_at, "check_count": 1, "failure_count": 0 if success else 1,
+                "latency_min_ms": latency_ms, "latency_avg_ms": latency_ms, "latency_max_ms": latency_ms, "latency_p95_ms": latency_ms,
+            }
+            for checked_at, success, latency_ms in db.execute(stmt)
+        ]
+    rollup = models.MonitorCheckRollup
+    stmt = (
+        select(rollup)
+        .where(rollup.monitor_id == monitor_id, rollup.resolution == resolution, rollup.bucket_start >= start, rollup.bucket_start < end)
+        .order_by(rollup.bucket_start)
+        .limit(limit)
+    )
+    return [
+        {
+            "time": row.bucket_start, "check_count": row.check_count, "failure_count": row.failure_count,
+            "latency_min_ms": row.latency_min_ms,
+            "latency_avg_ms": row.latency_sum_ms / row.latency_count if row.latency_count else None,
+            "latency_max_ms": row.latency_max_ms, "latency_p95_ms": row.latency_p95_ms,
+        }
+        for row in db.scalars(stmt)
+    ]
+
+
+# History export
+def export_rows(db: Session, kind: str, tenant_id: int, start: datetime, end: datetime, monitor_id: Optional[int] = None,
+                resolution: Optional[int] = None, page_size: int = 10000) -> tuple[List[str], Iterator]:
+    """
+    Dışa aktarılacak kolon adları ve satırları üreten iterator.
+    kind: "checks" (resolution None ise ham kayıtlar, aksi halde o çözünürlükteki özetler; monitor, sonra zaman sırasıyla)
+    veya "alerts" (zaman sırasıyla). Satırlar sayfa sayfa okunur; bellekte en fazla bir sayfanın imleci tutulur.
+    """
+    if kind == "alerts":
+        history, rule = models.AlertHistory, models.AlertRule
+        stmt = (
+            select(
+                history.sent_at.label("time"), history.id, history.alert_rule_id, rule.monitor_id, history.alert_type,
+                history.sent_successfully, history.message, history.details, history.error_message,
+            )
+            .join(rule, rule.id == history.alert_rule_id)
+            .where(rule.tenant_id == tenant_id, history.sent_at < end)
+        )
+        if monitor_id is not None:
+            stmt = stmt.where(rule.monitor_id == monitor_id)
+        return list(stmt.selected_columns.keys()), _keyset_pages(db, stmt, history.sent_at, history.id, start, page_size)
+
+    if resolution is None:
+        source = models.MonitorCheck
+        time_column = source.checked_at
+        stmt = select(time_column.label("time"), source.id, source.monitor_id, source.success, source.latency_ms)
+    else:
+        source = models.MonitorCheckRollup
+        time_column = source.bucket_start
+        stmt = select(
+            time_column.label("time"), source.id, source.monitor_id, source.check_count, source.failure_count,
+            source.latency_min_ms, (source.latency_sum_ms / func.nullif(source.latency_count, 0)).label("latency_avg_ms"),
+            source.latency_max_ms, source.latency_p95_ms,
+        ).where(source.resolution == resolution)
+    stmt = stmt.where(time_column < end)
+    if monitor_id is not None:
+        monitor_ids = [monitor_id]
+    else:
+        monitor_ids = list(db.scalars(select(models.Monitor.id).where(models.Monitor.tenant_id == tenant_id).order_by(models.Monitor.id)))
+
+    def rows() -> Iterator:
+        # Monitor başına okunur; her sayfa (monitor_id, zaman) indeksinde sıralı bir aralıktır, sıralama gerekmez
+        for current in monitor_ids:
+            yield from _keyset_pages(db, stmt.where(source.monitor_id == current), time_column, source.id, start, page_size)
+
+    return list(stmt.selected_columns.keys()), rows()
+
+
+def _keyset_pages(db: Session, stmt, time_column, id_column, start: datetime, page_size: int) -> Iterator:
+    # Her sayfa ayrı ve kısa bir sorgudur; uzun bir dışa aktarma SQLite'ta yazmaları kilitli tutmaz
+    last = None
+    while True:
+        if last is None:
+            page = stmt.where(time_column >= start)
+        else:
+            page = stmt.where(time_column >= last[0], or_(time_column > last[0], id_column > last[1]))
+        page = page.order_by(time_column, id_column).limit(page_size).execution_options(yield_per=min(page_size, 1000))
+        count = 0
+        # ORM katmanı atlanır (Core satırları); time ve id ilk iki kolondur
+        for row in db.connection().execute(page):
+            count += 1
+            last = (row[0], row[1])
+            yield row
+        # Okuma transaction'ı sayfalar arasında açık kalmasın
+        db.rollback()
+        if count < page_size:
+            return
+
+
 # Alert Channels
 def create_alert_channel(db: Session, tenant_id: int, name: str, channel_type: models.AlertChannelTypeEnum, config: dict, enabled: bool) -> models.AlertChannel:
     alert_channel = models.AlertChannel(
@@ -290,6 +722,7 @@ def create_alert_rule(db: Session, tenant_id: int, monitor_id: int, alert_channe
         consecutive_failures_threshold=kwargs.get('consecutive_failures_threshold'),
         latency_threshold_ms=kwargs.get('latency_threshold_ms'),
         uptime_threshold_percentage=kwargs.get('uptime_threshold_percentage'),
+        uptime_window=kwargs.get('uptime_window'),
         enabled=kwargs.get('enabled', True),
         cooldown_minutes=kwargs.get('cooldown_minutes', 5),
     )
@@ -325,12 +758,24 @@ def delete_alert_rule(db: Session, tenant_id: int, rule: models.AlertRule) -> No
     db.commit()
 
 
-def get_monitor_alert_rules(db: Session, monitor_id: int) -> List[models.AlertRule]:
-    """Bir monitor için tüm alert kurallarını getirir"""
-    return list(db.scalars(select(models.AlertRule).where(models.AlertRule.monitor_id == monitor_id).order_by(models.AlertRule.id)))
+def get_alert_rules_for_monitors(db: Session, monitor_ids: Iterable[int]) -> dict[int, List[models.AlertRule]]:
+    """Birden fazla monitor'ün aktif alert kurallarını kanallarıyla birlikte tek sorguda getirir"""
+    ids = list(monitor_ids)
+    rules: dict[int, List[models.AlertRule]] = {monitor_id: [] for monitor_id in ids}
+    if not ids:
+        return rules
+    stmt = (
+        select(models.AlertRule)
+        .where(models.AlertRule.monitor_id.in_(ids), models.AlertRule.enabled.is_(True))
+        .options(joinedload(models.AlertRule.alert_channel))
+        .order_by(models.AlertRule.id)
+    )
+    for rule in db.scalars(stmt):
+        rules[rule.monitor_id].append(rule)
+    return rules
 
 
-def can_trigger_alert(db: Session, alert_rule: models.AlertRule) -> bool:
+def can_trigger_alert(db: Optional[Session], alert_rule: models.AlertRule) -> bool:
     """Alert kuralının tetiklenip tetiklenemeyeceğini kontrol eder (cooldown)"""
     if not alert_rule.enabled:
         return False
@@ -342,28 +787,7 @@ def can_trigger_alert(db: Session, alert_rule: models.AlertRule) -> bool:
     return datetime.utcnow() >= cooldown_until
 
 
-def mark_alert_triggered(db: Session, alert_rule: models.AlertRule) -> None:
-    """Alert kuralının tetiklendiğini işaretler"""
-    alert_rule.last_triggered_at = datetime.utcnow()
-    db.commit()
-
-
 # Alert History
-def create_alert_history(db: Session, alert_rule_id: int, alert_type: models.AlertTypeEnum, message: str, details: Optional[str] = None, sent_successfully: bool = True, error_message: Optional[str] = None) -> models.AlertHistory:
-    alert_history = models.AlertHistory(
-        alert_rule_id=alert_rule_id,
-        alert_type=alert_type,
-        message=message,
-        details=details,
-        sent_successfully=sent_successfully,
-        error_message=error_message,
-    )
-    db.add(alert_history)
-    db.commit()
-    db.refresh(alert_history)
-    return alert_history
-
-
 def list_alert_history(db: Session, tenant_id: int, limit: int = 100) -> List[models.AlertHistory]:
     """Tenant için alert geçmişini getirir"""
     stmt = (
@@ -376,28 +800,145 @@ def list_alert_history(db: Session, tenant_id: int, limit: int = 100) -> List[mo
     return list(db.scalars(stmt))
 
 
-# Lease
-def try_acquire_lease(db: Session, owner_id: str, ttl_seconds: int = 10) -> bool:
-    lease = db.query(models.SchedulerLease).first()
-    now = datetime.utcnow()
-    if lease is None:
-        lease = models.SchedulerLease(owner_id=owner_id, expires_at=now + timedelta(seconds=ttl_seconds))
-        db.add(lease)
+# Retention
+def delete_expired_history(db: Session, target: str, tenant_id: int, cutoff: datetime, limit: int) -> int:
+    """
+    Tenant'ın `cutoff`tan eski geçmiş satırlarından en fazla `limit` tanesini siler ve commit eder.
+    target: checks, minute_rollups, hour_rollups, day_rollups veya alert_history. Silinen satır sayısı döner.
+    """
+    model, column, conditions = _retention_target(target, tenant_id)
+    ids = list(db.scalars(select(model.id).where(*conditions, column < cutoff).order_by(column).limit(limit)))
+    if ids:
+        db.execute(delete(model).where(model.id.in_(ids)))
         db.commit()
-        return True
-    if lease.owner_id == owner_id or lease.expires_at <= now:
-        lease.owner_id = owner_id
-        lease.expires_at = now + timedelta(seconds=ttl_seconds)
+    return len(ids)
+
+
+def _retention_target(target: str, tenant_id: int):
+    tenant_monitors = select(models.Monitor.id).where(models.Monitor.tenant_id == tenant_id)
+    if target == "checks":
+        check = models.MonitorCheck
+        return check, check.checked_at, (check.monitor_id.in_(tenant_monitors),)
+    if target == "alert_history":
+        history = models.AlertHistory
+        tenant_rules = select(models.AlertRule.id).where(models.AlertRule.tenant_id == tenant_id)
+        return history, history.sent_at, (history.alert_rule_id.in_(tenant_rules),)
+    resolution = {"minute_rollups": 60, "hour_rollups": 3600, "day_rollups": 86400}[target]
+    rollup = models.MonitorCheckRollup
+    return rollup, rollup.bucket_start, (rollup.resolution == resolution, rollup.monitor_id.in_(tenant_monitors))
+
+
+def compact_database(db: Session, vacuum_pages: int) -> int:
+    """
+    SQLite'ta boş sayfaların en fazla `vacuum_pages` tanesini dosyadan geri verir (auto_vacuum=INCREMENTAL ise)
+    ve gerekli tablolar için istatistikleri günceller (PRAGMA optimize). Geri verilen sayfa sayısı döner.
+    """
+    if db.get_bind().dialect.name != "sqlite":
+        return 0
+    freed = 0
+    if db.execute(text("PRAGMA auto_vacuum")).scalar() == 2:
+        before = db.execute(text("PRAGMA freelist_count")).scalar()
         db.commit()
-        return True
-    return False
+        # sqlite3 modülü pragma'yı tek adım çalıştırır; executescript sonuna kadar yürütür
+        db.connection().connection.driver_connection.executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages)});")
+        freed = before - db.execute(text("PRAGMA freelist_count")).scalar()
+    db.execute(text("PRAGMA optimize"))
+    db.commit()
+    if freed and db.execute(text("PRAGMA journal_mode")).scalar() == "wal":
+        # Dosya ancak checkpoint'te küçülür; okuyucuları beklemeden aktarılabilen sayfalar aktarılır
+        db.execute(text("PRAGMA wal_checkpoint(PASSIVE)"))
+        db.commit()
+    return freed
 
 
-def renew_lease(db: Session, owner_id: str, ttl_seconds: int = 10) -> bool:
-    lease = db.query(models.SchedulerLease).first()
+# Shard Leases
+def acquire_shard_leases(db: Session, owner_id: str, shard_count: int, ttl_seconds: int = 10) -> List[int]:
+    """
+    Instance'ın heartbeat'ini yazar, canlı instance sayısına göre adil payı (ceil(N / canlı))
+    hesaplar; fazla shard'ları bırakır, eksikse boş/süresi dolmuş shard'ları talep eder.
+    Talep koşullu UPDATE ile yapılır, böylece aynı shard'ı iki instance alamaz.
+    Sahip olunan shard numaralarını döndürür.
+    """
     now = datetime.utcnow()
-    if lease and lease.owner_id == owner_id:
-        lease.expires_at = now + timedelta(seconds=ttl_seconds)
-        db.commit()
-        return True
-    return False
+    expires_at = now + timedelta(seconds=ttl_seconds)
+    lease = models.SchedulerShardLease
+
+    _heartbeat_instance(db, owner_id, now)
+    live = db.scalar(
+        select(func.count()).select_from(models.SchedulerInstance).where(models.SchedulerInstance.last_seen_at > now - timedelta(seconds=ttl_seconds))
+    ) or 1
+    fair_share = -(-shard_count // live)
+
+    rows = {row.shard: row for row in db.execute(select(lease.shard, lease.owner_id, lease.expires_at).where(lease.shard < shard_count))}
+    missing = [shard for shard in range(shard_count) if shard not in rows]
+    if missing:
+        try:
+            db.execute(insert(lease), [{"shard": shard, "owner_id": None, "expires_at": now} for shard in missing])
+            db.commit()
+        except IntegrityError:
+            # Başka bir instance aynı anda oluşturdu
+            db.rollback()
+        _heartbeat_instance(db, owner_id, now)
+        rows = {row.shard: row for row in db.execute(select(lease.shard, lease.owner_id, lease.expires_at).where(lease.shard < shard_count))}
+
+    owned = sorted(shard for shard, row in rows.items() if row.owner_id == owner_id)
+    release, keep = owned[fair_share:], owned[:fair_share]
+    if release:
+        db.execute(
+            update(lease).where(lease.shard.in_(release), lease.owner_id == owner_id).values(owner_id=None, expires_at=now),
+            execution_options={"synchronize_session": False},
+        )
+    if keep:
+        db.execute(
+            update(lease).where(lease.shard.in_(keep), lease.owner_id == owner_id).values(expires_at=expires_at),
+            execution_options={"synchronize_session": False},
+        )
+    claimed = len(keep)
+    for shard in sorted(rows):
+        if claimed >= fair_share:
+            break
+        row = rows[shard]
+        if row.owner_id == owner_id or (row.owner_id is not None and row.expires_at > now):
+            continue
+        result = db.execute(
+            update(lease)
+            .where(lease.shard == shard, or_(lease.owner_id.is_(None), lease.expires_at <= now))
+            .values(owner_id=owner_id, expires_at=expires_at),
+            execution_options={"synchronize_session": False},
+        )
+        claimed += result.rowcount
+
+    # Uzun süredir görülmeyen instance kayıtlarını temizle
+    db.execute(
+        delete(models.SchedulerInstance).where(models.SchedulerInstance.last_seen_at < now - timedelta(seconds=ttl_seconds * 10)),
+        execution_options={"synchronize_session": False},
+    )
+    db.commit()
+    return list(db.scalars(
+        select(lease.shard).where(lease.owner_id == owner_id, lease.expires_at > now, lease.shard < shard_count).order_by(lease.shard)
+    ))
+
+
+def release_shard_leases(db: Session, owner_id: str) -> None:
+    """Kapanışta shard'ları bırakır; diğer instance'lar lease süresini beklemeden devralır"""
+    db.execute(
+        update(models.SchedulerShardLease)
+        .where(models.SchedulerShardLease.owner_id == owner_id)
+        .values(owner_id=None, expires_at=datetime.utcnow()),
+        execution_options={"synchronize_session": False},
+    )
+    db.execute(
+        delete(models.SchedulerInstance).where(models.SchedulerInstance.instance_id == owner_id),
+        execution_options={"synchronize_session": False},
+    )
+    db.commit()
+
+
+def _heartbeat_instance(db: Session, owner_id: str, now: datetime) -> None:
+    result = db.execute(
+        update(models.SchedulerInstance).where(models.SchedulerInstance.instance_id == owner_id).values(last_seen_at=now),
+        execution_options={"synchronize_session": False},
+    )
+    if result.rowcount == 0:
+        db.add(models.SchedulerInstance(instance_id=owner_id, last_seen_at=now))
+        db.flush()
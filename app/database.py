@@ -1,7 +1,9 @@
 import os
 import uuid
-from typing import Generator
-from sqlalchemy import create_engine
+from typing import Generator, Optional
+from urllib.parse import quote
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, make_url
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
 
@@ -18,10 +20,73 @@ def _get_engine_kwargs(url: str) -> dict:
     return {}
 
 
+# Yoğun yazma profili; her SQLite bağlantısı açılırken uygulanır
+SQLITE_WAL = os.getenv("PMON_SQLITE_WAL", "true").lower() == "true"
+SQLITE_SYNCHRONOUS = os.getenv("PMON_SQLITE_SYNCHRONOUS", "NORMAL").upper()
+SQLITE_MMAP_SIZE = int(os.getenv("PMON_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("PMON_SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("PMON_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_READ_POOL_SIZE = int(os.getenv("PMON_SQLITE_READ_POOL_SIZE", "5"))
+
+
+def _sqlite_file(url: str) -> Optional[str]:
+    # Dosya tabanlı SQLite veritabanının yolu; bellek içi veya başka bir veritabanıysa None
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or not parsed.database or parsed.database == ":memory:":
+        return None
+    if parsed.database.startswith("file:"):
+        return None  # URI biçimli adreslerin seçenekleri korunur
+    return os.path.abspath(parsed.database)
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    read_only = connection_record.info.get("read_only", False)
+    cursor = dbapi_connection.cursor()
+    try:
+        if not read_only:
+            # Yalnızca henüz tablo yokken etkili olur (WAL'a geçiş dosya başlığını yazdığı için ondan önce);
+            # mevcut dosyalar için database_migration.py
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            if SQLITE_WAL:
+                # Kalıcıdır; okuyucular yazarı, yazar okuyucuları beklemez
+                cursor.execute("PRAGMA journal_mode = WAL")
+        cursor.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size = {-SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+    finally:
+        cursor.close()
+
+
+def _create_engine(url, read_only: bool = False, **kwargs):
+    created = create_engine(url, pool_pre_ping=True, **_get_engine_kwargs(str(url)), **kwargs)
+    if created.dialect.name == "sqlite":
+        @event.listens_for(created, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            connection_record.info["read_only"] = read_only
+            _apply_sqlite_pragmas(dbapi_connection, connection_record)
+    return created
+
+
 DATABASE_URL = _get_database_url()
-engine = create_engine(DATABASE_URL, pool_pre_ping=True, **_get_engine_kwargs(DATABASE_URL))
+engine = _create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+_SQLITE_FILE = _sqlite_file(DATABASE_URL)
+if _SQLITE_FILE is not None:
+    # Scheduler'ın tüm yazmaları tek bağlantı üzerinden sırayla yapılır (SQLite'ta aynı anda tek yazar olabilir)
+    writer_engine = _create_engine(DATABASE_URL, pool_size=1, max_overflow=0)
+    # API okumaları salt okunur bağlantı havuzundan; WAL'da yazar beklenmeden son commit'lenen hali görülür
+    read_engine = _create_engine(
+        URL.create("sqlite", database=f"file:{quote(_SQLITE_FILE)}", query={"mode": "ro", "uri": "true"}),
+        read_only=True, pool_size=SQLITE_READ_POOL_SIZE,
+    )
+else:
+    writer_engine = engine
+    read_engine = engine
+WriterSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=writer_engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
 
 class Base(DeclarativeBase):
     pass
@@ -35,6 +100,15 @@ def get_db() -> Generator:
         db.close()
 
 
+def get_read_db() -> Generator:
+    # Yalnızca okuyan endpoint'ler için; bu session ile yazma denemesi hata verir
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 def init_db() -> None:
     from . import models  # noqa: F401
     Base.metadata.create_all(bind=engine)
@@ -6,7 +6,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .database import engine, Base
-from .routers import tenants, servers, services, monitors, alert_channels, alert_rules, alert_history, ping_locations
+from .routers import tenants, servers, services, monitors, alert_channels, alert_rules, alert_history, ping_locations, metrics, exports
 from .scheduler import MonitorScheduler
 from .utils.geolocation import PingLocationManager
 
@@ -117,6 +117,8 @@ app = FastAPI(
         {"name": "alert-rules", "description": "Alert kural yönetimi"},
         {"name": "alert-history", "description": "Alert geçmişi görüntüleme"},
         {"name": "ping-locations", "description": "PING lokasyon yönetimi"},
+        {"name": "scheduler", "description": "Scheduler gecikme ve throughput metrikleri"},
+        {"name": "export", "description": "Kontrol ve alert geçmişinin toplu (akış halinde) dışa aktarımı"},
     ]
 )
 
@@ -144,14 +146,26 @@ app.include_router(alert_channels.router, prefix="/api")
 app.include_router(alert_rules.router, prefix="/api")
 app.include_router(alert_history.router, prefix="/api")
 app.include_router(ping_locations.router, prefix="/api")
+app.include_router(metrics.router, prefix="/api")
+app.include_router(exports.router, prefix="/api")
 
 # Scheduler'ı başlat
 scheduler = MonitorScheduler()
+app.state.scheduler = scheduler
 
 @app.on_event("startup")
 async def startup_event():
-    scheduler.start()
+    app.state.scheduler_task = asyncio.create_task(scheduler.start())
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    scheduler.stop()
+    await scheduler.stop()
+    # Kuyruktaki kontroller, son sonuç flush'ı, uptime checkpoint'i ve lease bırakma start()'ın finally bloğunda yapılır;
+    # loop kapanmadan önce bitmesi beklenir, süre aşılırsa iptal edilir
+    timeout = float(os.getenv("PMON_SHUTDOWN_TIMEOUT", "30"))
+    try:
+        await asyncio.wait_for(app.state.scheduler_task, timeout=timeout)
+    except asyncio.TimeoutError:
+        print(f"Scheduler {timeout:g} saniyede kapanmadı, iptal edildi")
+    except Exception as e:
+        print(f"Scheduler kapanış hatası: {e}")
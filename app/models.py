@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+from datetime import datetime
 import enum
 from sqlalchemy import (
     Integer,
@@ -10,8 +10,11 @@ from sqlalchemy import (
     Enum,
     ForeignKey,
     UniqueConstraint,
+    Index,
     Float,
     Text,
+    delete,
+    event,
 )
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
@@ -22,6 +25,34 @@ class ProtocolEnum(str, enum.Enum):
     tcp = "tcp"
     udp = "udp"
     ping = "ping"
+    http = "http"
+    dns = "dns"
+
+
+class HttpMethodEnum(str, enum.Enum):
+    GET = "GET"
+    HEAD = "HEAD"
+    POST = "POST"
+    OPTIONS = "OPTIONS"
+
+
+class DnsRecordTypeEnum(str, enum.Enum):
+    A = "A"
+    AAAA = "AAAA"
+    CNAME = "CNAME"
+    MX = "MX"
+    NS = "NS"
+    PTR = "PTR"
+    SOA = "SOA"
+    SRV = "SRV"
+    TXT = "TXT"
+
+
+class UdpPayloadTypeEnum(str, enum.Enum):
+    dns = "dns"  # DNS sorgusu
+    ntp = "ntp"  # NTP istemci isteği
+    snmp = "snmp"  # SNMPv1 sysDescr.0 GET
+    hex = "hex"  # ham byte'lar
 
 
 class AlertTypeEnum(str, enum.Enum):
@@ -31,6 +62,12 @@ class AlertTypeEnum(str, enum.Enum):
     uptime_percentage = "uptime_percentage"  # uptime yüzdesi düşüşü
 
 
+class UptimeWindowEnum(str, enum.Enum):
+    hour = "1h"  # son 1 saat
+    day = "24h"  # son 24 saat
+    week = "7d"  # son 7 gün
+
+
 class AlertChannelTypeEnum(str, enum.Enum):
     email = "email"
     sms = "sms"
@@ -44,6 +81,12 @@ class Tenant(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(200), nullable=False, unique=True)
     api_key: Mapped[str] = mapped_column(String(64), nullable=False, unique=True, index=True)
+    # Geçmiş saklama süreleri (gün); None: sunucu varsayılanı (PMON_RETENTION_*), 0: süresiz
+    retention_checks_days: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    retention_minute_rollups_days: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    retention_hour_rollups_days: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    retention_day_rollups_days: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    retention_alert_history_days: Mapped[int | None] = mapped_column(Integer, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
     servers = relationship("Server", back_populates="tenant", cascade="all, delete-orphan")
@@ -72,7 +115,7 @@ class Server(Base):
 class ServiceDefinition(Base):
     __tablename__ = "service_definitions"
     __table_args__ = (
-        UniqueConstraint("tenant_id", "protocol", "port", name="uq_service_tenant_proto_port"),
+        UniqueConstraint("tenant_id", "protocol", "port", "options_key", name="uq_service_tenant_proto_port_options"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -88,6 +131,21 @@ class ServiceDefinition(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
     # PING servisleri için lokasyon referansı
     ping_location_id: Mapped[int | None] = mapped_column(ForeignKey("ping_locations.id", ondelete="SET NULL"), index=True, nullable=True)
+    # UDP servisleri için gönderilecek sorgu şablonu ve parametresi (DNS adı, SNMP community, hex veri)
+    udp_payload_type: Mapped[UdpPayloadTypeEnum | None] = mapped_column(Enum(UdpPayloadTypeEnum), nullable=True)
+    udp_payload: Mapped[str | None] = mapped_column(String(1024), nullable=True)
+    # HTTP servisleri için istek ve beklenen cevap (durum kodu boşsa 2xx/3xx başarılı sayılır)
+    http_path: Mapped[str | None] = mapped_column(String(1024), nullable=True)
+    http_method: Mapped[HttpMethodEnum | None] = mapped_column(Enum(HttpMethodEnum), nullable=True)
+    http_expected_status: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    http_body_match: Mapped[str | None] = mapped_column(String(1024), nullable=True)
+    http_tls: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    # DNS servisleri için sorgu ve beklenen cevap (ad boşsa kök için NS sorulur)
+    dns_query_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    dns_record_type: Mapped[DnsRecordTypeEnum | None] = mapped_column(Enum(DnsRecordTypeEnum), nullable=True)
+    dns_expected_answer: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    # Protokol seçeneklerinin özeti (probe_registry.service_options_key); tekillik anahtarının parçası
+    options_key: Mapped[str] = mapped_column(String(64), nullable=False, default="")
 
     tenant = relationship("Tenant", back_populates="services")
     monitors = relationship("Monitor", back_populates="service", cascade="all, delete-orphan")
@@ -129,6 +187,13 @@ class Monitor(Base):
     last_status: Mapped[str | None] = mapped_column(String(32), nullable=True)
     last_error: Mapped[str | None] = mapped_column(String(500), nullable=True)
     last_latency_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
+    # Son kontrolün aşama süreleri (ms); latency alarmında hangi aşamanın uzadığını gösterir
+    last_resolve_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
+    last_connect_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
+    last_first_byte_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
+    last_total_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
+    # Sunucunun cevap kodu (HTTP durum kodu, DNS rcode)
+    last_response_code: Mapped[str | None] = mapped_column(String(16), nullable=True)
     last_checked_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     next_run_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
@@ -138,6 +203,24 @@ class Monitor(Base):
     total_checks: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     total_failures: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     uptime_percentage: Mapped[float | None] = mapped_column(Float, nullable=True)
+    # Kayan pencere uptime'ları (None: pencerede kontrol yok) ve pencerelerin checkpoint'i (JSON, kova sayaçları)
+    uptime_1h_percentage: Mapped[float | None] = mapped_column(Float, nullable=True)
+    uptime_24h_percentage: Mapped[float | None] = mapped_column(Float, nullable=True)
+    uptime_7d_percentage: Mapped[float | None] = mapped_column(Float, nullable=True)
+    uptime_windows: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    # Uzun süre down olan hedefler için opsiyonel üstel geri çekilme (backoff)
+    backoff_enabled: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    backoff_after_failures: Mapped[int] = mapped_column(Integer, nullable=False, default=3)
+    backoff_max_interval_seconds: Mapped[int] = mapped_column(Integer, nullable=False, default=3600)
+    # Durum değişikliğinden hemen sonraki doğrulama kontrolü için kısa aralık (None: kapalı)
+    confirm_interval_seconds: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # Opsiyonel adaptif timeout: gözlenen gecikmenin EWMA'sı + k·sapma, taban ile protokol timeout'u arasında
+    adaptive_timeout_enabled: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    latency_ewma_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
+    latency_dev_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
+    # Son kontrolde gerçekten kullanılan timeout (denetim için)
+    last_timeout_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
@@ -183,6 +266,8 @@ class AlertRule(Base):
     consecutive_failures_threshold: Mapped[int | None] = mapped_column(Integer, nullable=True)
     latency_threshold_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
     uptime_threshold_percentage: Mapped[float | None] = mapped_column(Float, nullable=True)
+    # uptime_percentage alert'inin baktığı pencere (None: 24h)
+    uptime_window: Mapped[UptimeWindowEnum | None] = mapped_column(Enum(UptimeWindowEnum), nullable=True)
     
     # Alert ayarları
     enabled: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
@@ -207,21 +292,72 @@ class AlertHistory(Base):
     message: Mapped[str] = mapped_column(Text, nullable=False)
     details: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON details
     
-    sent_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    sent_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True, nullable=False)
     sent_successfully: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
     error_message: Mapped[str | None] = mapped_column(String(500), nullable=True)
 
     alert_rule = relationship("AlertRule", back_populates="alert_history")
 
 
-class SchedulerLease(Base):
-    __tablename__ = "scheduler_leases"
+class MonitorCheck(Base):
+    """Her kontrolün kompakt kaydı (zaman serisi); sonuçlarla birlikte toplu eklenir"""
+    __tablename__ = "monitor_checks"
+    __table_args__ = (
+        Index("ix_monitor_checks_monitor_time", "monitor_id", "checked_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    monitor_id: Mapped[int] = mapped_column(ForeignKey("monitors.id", ondelete="CASCADE"), nullable=False)
+    # Rollup işi zaman aralığıyla tüm monitor'leri tarar
+    checked_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    success: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    latency_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
+
+
+class MonitorCheckRollup(Base):
+    """
+    Kontrol kayıtlarının 1 dakika, 1 saat ve 1 günlük özetleri (resolution saniye cinsinden).
+    Ortalama latency_sum_ms / latency_count ile hesaplanır; gecikme yalnızca başarılı kontrollerden alınır.
+    """
+    __tablename__ = "monitor_check_rollups"
+    __table_args__ = (
+        UniqueConstraint("monitor_id", "resolution", "bucket_start", name="uq_rollup_monitor_resolution_bucket"),
+        Index("ix_rollups_resolution_bucket", "resolution", "bucket_start"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    owner_id: Mapped[str] = mapped_column(String(100), nullable=False, unique=True)
-    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    monitor_id: Mapped[int] = mapped_column(ForeignKey("monitors.id", ondelete="CASCADE"), nullable=False)
+    resolution: Mapped[int] = mapped_column(Integer, nullable=False)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    check_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    failure_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    latency_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    latency_sum_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
+    latency_min_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
+    latency_max_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
+    latency_p95_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
+
+
+@event.listens_for(Monitor, "after_delete")
+def _delete_monitor_history(mapper, connection, monitor: Monitor) -> None:
+    # Geçmiş satırları ilişki olarak yüklenmeden toplu silinir (sunucu/servis silme cascade'i dahil)
+    for table in (MonitorCheck.__table__, MonitorCheckRollup.__table__):
+        connection.execute(delete(table).where(table.c.monitor_id == monitor.id))
+
+
+class SchedulerInstance(Base):
+    """Shard dağıtımında adil payı hesaplamak için canlı scheduler instance'ları"""
+    __tablename__ = "scheduler_instances"
+
+    instance_id: Mapped[str] = mapped_column(String(100), primary_key=True)
+    last_seen_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
-    @staticmethod
-    def default_expiry() -> datetime:
-        return datetime.utcnow() + timedelta(seconds=10)
+
+class SchedulerShardLease(Base):
+    """Her shard için bir lease satırı; monitor'ler `monitor_id % shard_count` ile shard'lara bölünür"""
+    __tablename__ = "scheduler_shard_leases"
+
+    shard: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    owner_id: Mapped[str | None] = mapped_column(String(100), nullable=True, index=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
@@ -4,7 +4,7 @@ import json
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from .. import crud, models, schemas
 from .utils import get_current_tenant
 
@@ -60,7 +60,7 @@ def create_alert_channel(payload: schemas.AlertChannelCreate, db: Session = Depe
         200: {"description": "Alert kanalı listesi başarıyla döndürüldü"},
         401: {"description": "Geçersiz API anahtarı"}
     })
-def list_alert_channels(db: Session = Depends(get_db), tenant: models.Tenant = Depends(get_current_tenant)):
+def list_alert_channels(db: Session = Depends(get_read_db), tenant: models.Tenant = Depends(get_current_tenant)):
     """
     Mevcut tenant'a ait tüm alert kanallarını listeler.
     
@@ -83,7 +83,7 @@ def list_alert_channels(db: Session = Depends(get_db), tenant: models.Tenant = D
         401: {"description": "Geçersiz API anahtarı"},
         404: {"description": "Alert kanalı bulunamadı"}
     })
-def get_alert_channel(channel_id: int, db: Session = Depends(get_db), tenant: models.Tenant = Depends(get_current_tenant)):
+def get_alert_channel(channel_id: int, db: Session = Depends(get_read_db), tenant: models.Tenant = Depends(get_current_tenant)):
     """
     Belirtilen alert kanalının detaylarını getirir.
     
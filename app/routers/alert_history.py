@@ -3,7 +3,7 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_read_db
 from .. import crud, schemas, models
 from .utils import get_current_tenant
 
@@ -25,7 +25,7 @@ def list_alert_history(
         le=1000,
         description="Döndürülecek maksimum kayıt sayısı (1-1000 arası, varsayılan: 100)"
     ),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     tenant: models.Tenant = Depends(get_current_tenant)
 ):
     """
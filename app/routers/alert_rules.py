@@ -3,7 +3,7 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from .. import crud, models, schemas
 from .utils import get_current_tenant
 
@@ -30,6 +30,7 @@ def create_alert_rule(payload: schemas.AlertRuleCreate, db: Session = Depends(ge
     - **consecutive_failures_threshold**: Ardışık başarısızlık eşiği (alert_type: consecutive_failures için)
     - **latency_threshold_ms**: Latency eşiği milisaniye (alert_type: latency_threshold için)
     - **uptime_threshold_percentage**: Uptime yüzde eşiği (alert_type: uptime_percentage için)
+    - **uptime_window**: Eşiğin uygulandığı kayan pencere: "1h", "24h" veya "7d" (alert_type: uptime_percentage için, varsayılan: "24h")
     - **enabled**: Kuralın aktif olup olmadığı (varsayılan: true)
     - **cooldown_minutes**: Aynı alert için bekleme süresi (1-1440 dakika, varsayılan: 5)
     
@@ -38,7 +39,7 @@ def create_alert_rule(payload: schemas.AlertRuleCreate, db: Session = Depends(ge
     - **status_change**: Monitor durumu değiştiğinde (up→down veya down→up)
     - **consecutive_failures**: Belirtilen sayıda ardışık başarısızlık olduğunda
     - **latency_threshold**: Yanıt süresi belirtilen eşiği aştığında
-    - **uptime_percentage**: Uptime yüzdesi belirtilen eşiğin altına düştüğünde
+    - **uptime_percentage**: Seçilen penceredeki (son 1 saat, 24 saat veya 7 gün) uptime yüzdesi belirtilen eşiğin altına düştüğünde
     """
     # Monitor kontrolü
     monitor = crud.get_monitor(db, monitor_id=payload.monitor_id, tenant_id=tenant.id)
@@ -60,6 +61,7 @@ def create_alert_rule(payload: schemas.AlertRuleCreate, db: Session = Depends(ge
         consecutive_failures_threshold=payload.consecutive_failures_threshold,
         latency_threshold_ms=payload.latency_threshold_ms,
         uptime_threshold_percentage=payload.uptime_threshold_percentage,
+        uptime_window=payload.uptime_window,
         enabled=payload.enabled,
         cooldown_minutes=payload.cooldown_minutes
     )
@@ -72,7 +74,7 @@ def create_alert_rule(payload: schemas.AlertRuleCreate, db: Session = Depends(ge
         200: {"description": "Alert kuralı listesi başarıyla döndürüldü"},
         401: {"description": "Geçersiz API anahtarı"}
     })
-def list_alert_rules(db: Session = Depends(get_db), tenant: models.Tenant = Depends(get_current_tenant)):
+def list_alert_rules(db: Session = Depends(get_read_db), tenant: models.Tenant = Depends(get_current_tenant)):
     """
     Mevcut tenant'a ait tüm alert kurallarını listeler.
     
@@ -94,7 +96,7 @@ def list_alert_rules(db: Session = Depends(get_db), tenant: models.Tenant = Depe
         401: {"description": "Geçersiz API anahtarı"},
         404: {"description": "Alert kuralı bulunamadı"}
     })
-def get_alert_rule(rule_id: int, db: Session = Depends(get_db), tenant: models.Tenant = Depends(get_current_tenant)):
+def get_alert_rule(rule_id: int, db: Session = Depends(get_read_db), tenant: models.Tenant = Depends(get_current_tenant)):
     """
     Belirtilen alert kuralının detaylarını getirir.
     
@@ -127,6 +129,7 @@ def update_alert_rule(rule_id: int, payload: schemas.AlertRuleUpdate, db: Sessio
     - **consecutive_failures_threshold**: Yeni ardışık başarısızlık eşiği (opsiyonel)
     - **latency_threshold_ms**: Yeni latency eşiği (opsiyonel)
     - **uptime_threshold_percentage**: Yeni uptime eşiği (opsiyonel)
+    - **uptime_window**: Yeni uptime penceresi: "1h", "24h" veya "7d" (opsiyonel)
     - **enabled**: Kural durumu (opsiyonel)
     - **cooldown_minutes**: Yeni bekleme süresi (opsiyonel, 1-1440 dakika)
     
@@ -146,12 +149,14 @@ def update_alert_rule(rule_id: int, payload: schemas.AlertRuleUpdate, db: Sessio
     
     return crud.update_alert_rule(
         db, 
+        tenant_id=tenant.id,
         rule=rule,
         name=payload.name,
         alert_channel_id=payload.alert_channel_id,
         consecutive_failures_threshold=payload.consecutive_failures_threshold,
         latency_threshold_ms=payload.latency_threshold_ms,
         uptime_threshold_percentage=payload.uptime_threshold_percentage,
+        uptime_window=payload.uptime_window,
         enabled=payload.enabled,
         cooldown_minutes=payload.cooldown_minutes
     )
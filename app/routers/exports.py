@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import csv
+import enum
+import io
+import json
+from datetime import datetime, timedelta
+from typing import Iterator
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from ..database import ReadSessionLocal, get_read_db
+from .. import crud, models, schemas
+from .utils import get_current_tenant, to_utc
+from ..utils.rollups import RESOLUTION_NAMES
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+# Ağa yazılan parça boyutu (byte); satırlar bu boyuta ulaşana kadar biriktirilir
+_CHUNK_BYTES = 64 * 1024
+
+_MEDIA_TYPES = {
+    schemas.ExportFormatEnum.ndjson: "application/x-ndjson",
+    schemas.ExportFormatEnum.csv: "text/csv; charset=utf-8",
+}
+
+
+@router.get("/checks",
+    summary="Kontrol Geçmişi Dışa Aktar",
+    description="Tenant'ın kontrol geçmişini (ham kayıtlar veya özetler) NDJSON veya CSV olarak akış halinde indirir.",
+    responses={
+        200: {"description": "Kayıtlar akış halinde döndürülüyor"},
+        400: {"description": "Geçersiz zaman aralığı"},
+        401: {"description": "Geçersiz API anahtarı"},
+        404: {"description": "Monitor bulunamadı"}
+    })
+def export_checks(
+    start: datetime | None = Query(default=None, description="Aralık başlangıcı (UTC, varsayılan: end - 24 saat)"),
+    end: datetime | None = Query(default=None, description="Aralık sonu (UTC, varsayılan: şimdi)"),
+    format: schemas.ExportFormatEnum = Query(default=schemas.ExportFormatEnum.ndjson, description="ndjson veya csv"),
+    resolution: schemas.ExportResolutionEnum = Query(default=schemas.ExportResolutionEnum.raw, description="raw, 1m, 1h veya 1d"),
+    monitor_id: int | None = Query(default=None, description="Yalnızca bu monitor (varsayılan: tenant'ın tüm monitor'leri)"),
+    db: Session = Depends(get_read_db),
+    tenant: models.Tenant = Depends(get_current_tenant),
+):
+    """
+    Kontrol geçmişini monitor, sonra zaman sırasıyla akış halinde döndürür; büyük aralıklarda da bellek kullanımı sabit kalır.
+
+    - **start** / **end**: Zaman aralığı (UTC); varsayılan son 24 saat
+    - **format**: "ndjson" (satır başına bir JSON nesnesi) veya "csv" (başlık satırıyla)
+    - **resolution**: "raw" her kontrolü (time, id, monitor_id, success, latency_ms),
+      "1m"/"1h"/"1d" özetleri (time, id, monitor_id, check_count, failure_count, latency_min/avg/max/p95_ms) döndürür
+    - **monitor_id**: Opsiyonel; yalnızca bu monitor'ün kayıtları
+
+    Saklama süresi dolan ham kayıtlar silinir; eski aralıklar için özet çözünürlükleri kullanılmalıdır.
+    """
+    start, end = _time_range(start, end)
+    _check_monitor(db, tenant, monitor_id)
+    seconds = {name: value for value, name in RESOLUTION_NAMES.items()}.get(resolution.value)
+    return _stream(format, f"checks-{resolution.value}", "checks", tenant.id, start, end, monitor_id, seconds)
+
+
+@router.get("/alerts",
+    summary="Alert Geçmişi Dışa Aktar",
+    description="Tenant'ın alert geçmişini NDJSON veya CSV olarak akış halinde indirir.",
+    responses={
+        200: {"description": "Kayıtlar akış halinde döndürülüyor"},
+        400: {"description": "Geçersiz zaman aralığı"},
+        401: {"description": "Geçersiz API anahtarı"},
+        404: {"description": "Monitor bulunamadı"}
+    })
+def export_alerts(
+    start: datetime | None = Query(default=None, description="Aralık başlangıcı (UTC, varsayılan: end - 24 saat)"),
+    end: datetime | None = Query(default=None, description="Aralık sonu (UTC, varsayılan: şimdi)"),
+    format: schemas.ExportFormatEnum = Query(default=schemas.ExportFormatEnum.ndjson, description="ndjson veya csv"),
+    monitor_id: int | None = Query(default=None, description="Yalnızca bu monitor'ün alert'leri"),
+    db: Session = Depends(get_read_db),
+    tenant: models.Tenant = Depends(get_current_tenant),
+):
+    """
+    Alert geçmişini zaman sırasıyla akış halinde döndürür.
+
+    - **start** / **end**: Zaman aralığı (UTC); varsayılan son 24 saat
+    - **format**: "ndjson" veya "csv"
+    - **monitor_id**: Opsiyonel; yalnızca bu monitor'ün alert'leri
+
+    Kolonlar: time, id, alert_rule_id, monitor_id, alert_type, sent_successfully, message, details (JSON metni), error_message
+    """
+    start, end = _time_range(start, end)
+    _check_monitor(db, tenant, monitor_id)
+    return _stream(format, "alerts", "alerts", tenant.id, start, end, monitor_id)
+
+
+def _time_range(start: datetime | None, end: datetime | None) -> tuple[datetime, datetime]:
+    end = to_utc(end) if end else datetime.utcnow()
+    start = to_utc(start) if start else end - timedelta(hours=24)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start, end'den önce olmalı")
+    return start, end
+
+
+def _check_monitor(db: Session, tenant: models.Tenant, monitor_id: int | None) -> None:
+    if monitor_id is not None and not crud.get_monitor(db, monitor_id=monitor_id, tenant_id=tenant.id):
+        raise HTTPException(status_code=404, detail="Monitor bulunamadı")
+
+
+def _stream(format: schemas.ExportFormatEnum, name: str, *query) -> StreamingResponse:
+    filename = f"pmon-{name}-{datetime.utcnow():%Y%m%dT%H%M%S}.{format.value}"
+    return StreamingResponse(
+        _export_chunks(format, *query),
+        media_type=_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def _export_chunks(format: schemas.ExportFormatEnum, *query) -> Iterator[bytes]:
+    # İstek session'ı yanıt akmadan kapanır; akış kendi session'ını açar (istemci koparsa finally ile kapanır)
+    db = ReadSessionLocal()
+    try:
+        columns, rows = crud.export_rows(db, *query)
+        buffer = io.StringIO()
+        if format == schemas.ExportFormatEnum.csv:
+            writer = csv.writer(buffer, lineterminator="\n")
+            writer.writerow(columns)
+            write = lambda row: writer.writerow([_csv_value(value) for value in row])  # noqa: E731
+        else:
+            write = lambda row: buffer.write(json.dumps(dict(zip(columns, row)), default=_json_value, ensure_ascii=False) + "\n")  # noqa: E731
+        for row in rows:
+            write(row)
+            if buffer.tell() >= _CHUNK_BYTES:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+    finally:
+        db.close()
+
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    raise TypeError(f"JSON'a çevrilemeyen değer: {type(value).__name__}")
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Request
+
+from .. import schemas
+
+
+router = APIRouter(prefix="/scheduler", tags=["scheduler"])
+
+
+@router.get("/metrics", response_model=schemas.SchedulerMetricsOut,
+    summary="Scheduler Metrikleri",
+    description="Scheduler'ın planlanan kontrollere yetişip yetişemediğini gösteren gecikme ve throughput metriklerini döndürür.",
+    responses={
+        200: {"description": "Metrikler başarıyla getirildi"}
+    })
+async def get_scheduler_metrics(request: Request):
+    """
+    Bu instance'taki scheduler'ın bellek içi metriklerini döndürür.
+
+    - **checks_per_second**: Son 60 saniyedeki kontrol hızı
+    - **backlog**: Zamanı gelmiş ama henüz dağıtılmamış monitor sayısı
+    - **lag_ms**: next_run_at ile kontrolün gerçek başlangıcı arasındaki gecikme (p50/p90/p99)
+    - **in_flight_probes**: Şu anda ağda olan probe sayısı
+
+    Yüzdelikler son 60 saniyelik pencere üzerinden, sabit kovalardan hesaplanır.
+    """
+    # async: scheduler ile aynı event loop'ta çalışır, bellek içi durum güvenle okunur
+    return await request.app.state.scheduler.metrics_snapshot()
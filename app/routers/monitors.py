@@ -1,13 +1,17 @@
 from __future__ import annotations
 
 import asyncio
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime, timedelta
+from anyio import from_thread
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from .. import crud, models, schemas
-from .utils import get_current_tenant
-from ..utils.network import check_tcp, check_udp
+from .utils import get_current_tenant, to_utc
+from ..utils.probe_registry import check_port, probe_request
+from ..utils.rollups import RESOLUTION_NAMES, choose_resolution
+from ..scheduler import notify_monitor_changed, run_manual_check
 
 router = APIRouter(prefix="/monitors", tags=["monitors"])
 
@@ -29,6 +33,10 @@ def create_monitor(payload: schemas.MonitorCreate, db: Session = Depends(get_db)
     - **service_id**: İzlenecek servisin ID'si (mevcut tenant'a ait veya global olmalı)
     - **interval_seconds**: İzleme aralığı (5-86400 saniye arası, varsayılan: 60)
     - **enabled**: İzlemenin aktif olup olmadığı (varsayılan: true)
+    - **backoff_enabled**: Uzun süre down kalan hedefte aralığı üstel artır (varsayılan: false)
+    - **backoff_after_failures** / **backoff_max_interval_seconds**: Backoff eşiği ve üst sınırı
+    - **confirm_interval_seconds**: Durum değişikliğinden sonraki doğrulama kontrolü aralığı (opsiyonel)
+    - **adaptive_timeout_enabled**: Timeout'u hedefin gözlenen gecikmesinden hesapla (varsayılan: false)
     
     Monitor oluşturulduktan sonra, sistem otomatik olarak belirtilen aralıklarla 
     sunucunun belirtilen portunu kontrol etmeye başlar.
@@ -43,7 +51,15 @@ def create_monitor(payload: schemas.MonitorCreate, db: Session = Depends(get_db)
     if not service:
         raise HTTPException(status_code=404, detail="Servis bulunamadı")
     
-    return crud.create_monitor(db, tenant_id=tenant.id, server_id=payload.server_id, service_id=payload.service_id, interval_seconds=payload.interval_seconds, enabled=payload.enabled)
+    monitor = crud.create_monitor(
+        db, tenant_id=tenant.id, server_id=payload.server_id, service_id=payload.service_id,
+        interval_seconds=payload.interval_seconds, enabled=payload.enabled,
+        backoff_enabled=payload.backoff_enabled, backoff_after_failures=payload.backoff_after_failures,
+        backoff_max_interval_seconds=payload.backoff_max_interval_seconds, confirm_interval_seconds=payload.confirm_interval_seconds,
+        adaptive_timeout_enabled=payload.adaptive_timeout_enabled,
+    )
+    notify_monitor_changed(monitor.id, monitor.next_run_at if monitor.enabled else None)
+    return monitor
 
 
 @router.get("", response_model=list[schemas.MonitorOut],
@@ -53,7 +69,7 @@ def create_monitor(payload: schemas.MonitorCreate, db: Session = Depends(get_db)
         200: {"description": "Monitor listesi başarıyla döndürüldü"},
         401: {"description": "Geçersiz API anahtarı"}
     })
-def list_monitors(db: Session = Depends(get_db), tenant: models.Tenant = Depends(get_current_tenant)):
+def list_monitors(db: Session = Depends(get_read_db), tenant: models.Tenant = Depends(get_current_tenant)):
     """
     Mevcut tenant'a ait tüm izlemeleri listeler.
     
@@ -74,7 +90,7 @@ def list_monitors(db: Session = Depends(get_db), tenant: models.Tenant = Depends
         401: {"description": "Geçersiz API anahtarı"},
         404: {"description": "Monitor bulunamadı"}
     })
-def get_monitor(monitor_id: int, db: Session = Depends(get_db), tenant: models.Tenant = Depends(get_current_tenant)):
+def get_monitor(monitor_id: int, db: Session = Depends(get_read_db), tenant: models.Tenant = Depends(get_current_tenant)):
     """
     Belirtilen monitor'ün detaylarını getirir.
     
@@ -104,13 +120,23 @@ def update_monitor(monitor_id: int, payload: schemas.MonitorUpdate, db: Session
     - **monitor_id**: Güncellenecek monitor'ün ID'si
     - **interval_seconds**: Yeni izleme aralığı (opsiyonel, 5-86400 saniye)
     - **enabled**: İzleme durumu (opsiyonel)
+    - **backoff_enabled**, **backoff_after_failures**, **backoff_max_interval_seconds**: Backoff politikası (opsiyonel)
+    - **confirm_interval_seconds**: Doğrulama aralığı (opsiyonel, 0 ile kapatılır)
+    - **adaptive_timeout_enabled**: Adaptif timeout (opsiyonel)
     
     Sadece mevcut tenant'a ait monitor'ler güncellenebilir.
     """
     monitor = crud.get_monitor(db, monitor_id=monitor_id, tenant_id=tenant.id)
     if not monitor:
         raise HTTPException(status_code=404, detail="Monitor bulunamadı")
-    return crud.update_monitor(db, monitor=monitor, interval_seconds=payload.interval_seconds, enabled=payload.enabled)
+    monitor = crud.update_monitor(
+        db, tenant_id=tenant.id, monitor=monitor, interval_seconds=payload.interval_seconds, enabled=payload.enabled,
+        backoff_enabled=payload.backoff_enabled, backoff_after_failures=payload.backoff_after_failures,
+        backoff_max_interval_seconds=payload.backoff_max_interval_seconds, confirm_interval_seconds=payload.confirm_interval_seconds,
+        adaptive_timeout_enabled=payload.adaptive_timeout_enabled,
+    )
+    notify_monitor_changed(monitor.id, monitor.next_run_at if monitor.enabled else None)
+    return monitor
 
 
 @router.delete("/{monitor_id}",
@@ -133,7 +159,9 @@ def delete_monitor(monitor_id: int, db: Session = Depends(get_db), tenant: model
     monitor = crud.get_monitor(db, monitor_id=monitor_id, tenant_id=tenant.id)
     if not monitor:
         raise HTTPException(status_code=404, detail="Monitor bulunamadı")
-    crud.delete_monitor(db, monitor=monitor)
+    monitor_id = monitor.id
+    crud.delete_monitor(db, tenant_id=tenant.id, monitor=monitor)
+    notify_monitor_changed(monitor_id, None)
     return {"message": "Monitor silindi"}
 
 
@@ -145,7 +173,7 @@ def delete_monitor(monitor_id: int, db: Session = Depends(get_db), tenant: model
         401: {"description": "Geçersiz API anahtarı"},
         404: {"description": "Monitor bulunamadı"}
     })
-async def check_monitor(monitor_id: int, db: Session = Depends(get_db), tenant: models.Tenant = Depends(get_current_tenant)):
+def check_monitor(monitor_id: int, db: Session = Depends(get_db), tenant: models.Tenant = Depends(get_current_tenant)):
     """
     Belirtilen monitor için anlık port kontrolü yapar.
     
@@ -156,6 +184,9 @@ async def check_monitor(monitor_id: int, db: Session = Depends(get_db), tenant:
     - **status**: "up" veya "down"
     - **latency_ms**: Yanıt süresi (milisaniye)
     - **error**: Hata mesajı (varsa)
+    - **resolve_ms / connect_ms / first_byte_ms / total_ms**: Aşama süreleri (protokolde olmayan aşamalar null)
+    - **timeout_ms**: Kullanılan timeout (adaptif timeout açıksa hedefin gecikmesinden hesaplanır)
+    - **response_code**: Sunucunun cevap kodu (HTTP durum kodu, DNS rcode; diğer protokollerde null)
     
     Kontrol sonucu veritabanına kaydedilir ve istatistikler güncellenir.
     """
@@ -163,25 +194,79 @@ async def check_monitor(monitor_id: int, db: Session = Depends(get_db), tenant:
     if not monitor:
         raise HTTPException(status_code=404, detail="Monitor bulunamadı")
     
-    # Anlık kontrol yap
-    from ..utils.network import check_port
-    from .. import models as db_models
-    
-    server = crud.get_server(db, server_id=monitor.server_id, tenant_id=tenant.id)
-    service = crud.get_service(db, service_id=monitor.service_id, tenant_id=tenant.id)
+    # Monitor'ü bu instance'ın scheduler'ı çalıştırıyorsa kontrol onun üzerinden yapılır; sonuç aynı
+    # yazma kuyruğundan yazıldığı için scheduler'ın bir sonraki toplu yazması sayaçları ezmez
+    checked = run_manual_check(monitor.id)
+    if checked is not None:
+        monitor, result = checked
+    else:
+        # Anlık kontrol yap; scheduler ile aynı probe kaydı üzerinden (probe event loop'ta çalışır)
+        request = probe_request(monitor.server, monitor.service)
+        timeout = crud.probe_timeout(monitor)
+        result = from_thread.run(lambda: check_port(request.host, request.port, request.protocol, timeout, **(request.options or {})))
+        
+        # Probe sırasında yazılmış sonuçların üzerine yazmamak için satır yeniden okunur
+        db.refresh(monitor)
+        crud.apply_check_result(monitor, result)
+        crud.add_check_history(db, monitor)
+        db.commit()
     
-    if not server or not service:
-        raise HTTPException(status_code=404, detail="Sunucu veya servis bulunamadı")
+    return schemas.CheckResult(
+        status=monitor.last_status,
+        latency_ms=result.latency_ms,
+        error=result.error,
+        timeout_ms=result.timeout_ms,
+        response_code=result.response_code,
+        **result.timings._asdict(),
+    )
+
+
+@router.get("/{monitor_id}/history", response_model=schemas.MonitorHistoryOut,
+    summary="Monitor Geçmişi",
+    description="Monitor'ün belirtilen zaman aralığındaki kontrol geçmişini (ham kayıtlar veya özetler) döndürür.",
+    responses={
+        200: {"description": "Geçmiş başarıyla döndürüldü"},
+        400: {"description": "Geçersiz zaman aralığı"},
+        401: {"description": "Geçersiz API anahtarı"},
+        404: {"description": "Monitor bulunamadı"}
+    })
+def get_monitor_history(
+    monitor_id: int,
+    start: datetime | None = Query(default=None, description="Aralık başlangıcı (UTC, varsayılan: end - 24 saat)"),
+    end: datetime | None = Query(default=None, description="Aralık sonu (UTC, varsayılan: şimdi)"),
+    resolution: schemas.HistoryResolutionEnum = Query(default=schemas.HistoryResolutionEnum.auto, description="auto, raw, 1m, 1h veya 1d"),
+    db: Session = Depends(get_read_db),
+    tenant: models.Tenant = Depends(get_current_tenant),
+):
+    """
+    Monitor'ün kontrol geçmişini döndürür.
     
-    # PING servisleri için port kullanma
-    if service.protocol == db_models.ProtocolEnum.ping:
-        success, latency, error = await check_port(server.host, 0, service.protocol.value)
-    else:
-        success, latency, error = await check_port(server.host, service.port, service.protocol.value)
+    - **monitor_id**: Monitor'ün ID'si
+    - **start** / **end**: Zaman aralığı (UTC); varsayılan son 24 saat
+    - **resolution**: "raw" her kontrolü, "1m"/"1h"/"1d" özetleri döndürür. "auto" aralığı en fazla
+      ~500 noktayla gösteren en ince çözünürlüğü seçer (örn. 30 günlük aralık için günlük özetler)
     
-    # Sonuçları güncelle
-    status = "up" if success else "down"
-    crud.update_monitor_status(db, monitor, status, error, latency)
-    crud.update_monitor_stats(db, monitor, success, latency)
+    Her nokta için kontrol ve başarısızlık sayısı ile min/ortalama/max/p95 gecikme döndürülür.
+    Özetler arka planda, kova kapandıktan birkaç dakika sonra yazılır; en yeni veriler için ham kayıtlar kullanılır.
+    En fazla 10000 nokta döndürülür.
+    """
+    monitor = crud.get_monitor(db, monitor_id=monitor_id, tenant_id=tenant.id)
+    if not monitor:
+        raise HTTPException(status_code=404, detail="Monitor bulunamadı")
+    end = to_utc(end) if end else datetime.utcnow()
+    start = to_utc(start) if start else end - timedelta(hours=24)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start, end'den önce olmalı")
     
-    return schemas.CheckResult(status=status, latency_ms=latency, error=error)
+    if resolution == schemas.HistoryResolutionEnum.auto:
+        seconds = choose_resolution(start, end, monitor.interval_seconds)
+    else:
+        seconds = {name: value for value, name in RESOLUTION_NAMES.items()}.get(resolution.value)
+    points = crud.monitor_history(db, monitor_id=monitor.id, start=start, end=end, resolution=seconds)
+    return schemas.MonitorHistoryOut(
+        monitor_id=monitor.id,
+        resolution=RESOLUTION_NAMES.get(seconds, "raw"),
+        start=start,
+        end=end,
+        points=points,
+    )
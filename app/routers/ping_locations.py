@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from .. import crud, schemas
 from ..utils.geolocation import PingLocationManager, GeolocationService
 from .utils import get_current_tenant
@@ -58,7 +58,7 @@ def create_ping_location(payload: schemas.PingLocationCreate, db: Session = Depe
     responses={
         200: {"description": "Ping lokasyonları başarıyla listelendi"}
     })
-def list_ping_locations(active_only: bool = True, db: Session = Depends(get_db)):
+def list_ping_locations(active_only: bool = True, db: Session = Depends(get_read_db)):
     """
     Mevcut ping lokasyonlarını listeler.
 
@@ -77,7 +77,7 @@ def list_ping_locations(active_only: bool = True, db: Session = Depends(get_db))
         200: {"description": "Ping lokasyonu detayları başarıyla getirildi"},
         404: {"description": "Ping lokasyonu bulunamadı"}
     })
-def get_ping_location(location_id: int, db: Session = Depends(get_db)):
+def get_ping_location(location_id: int, db: Session = Depends(get_read_db)):
     """
     Belirtilen ID'ye sahip ping lokasyonunun detaylarını getirir.
 
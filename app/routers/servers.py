@@ -3,7 +3,7 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from .. import crud, models, schemas
 from .utils import get_current_tenant
 
@@ -37,7 +37,7 @@ def create_server(payload: schemas.ServerCreate, db: Session = Depends(get_db),
         200: {"description": "Sunucu listesi başarıyla döndürüldü"},
         401: {"description": "Geçersiz API anahtarı"}
     })
-def list_servers(db: Session = Depends(get_db), tenant: models.Tenant = Depends(get_current_tenant)):
+def list_servers(db: Session = Depends(get_read_db), tenant: models.Tenant = Depends(get_current_tenant)):
     """
     Mevcut tenant'a ait tüm sunucuları listeler.
     
@@ -54,7 +54,7 @@ def list_servers(db: Session = Depends(get_db), tenant: models.Tenant = Depends(
         401: {"description": "Geçersiz API anahtarı"},
         404: {"description": "Sunucu bulunamadı"}
     })
-def get_server(server_id: int, db: Session = Depends(get_db), tenant: models.Tenant = Depends(get_current_tenant)):
+def get_server(server_id: int, db: Session = Depends(get_read_db), tenant: models.Tenant = Depends(get_current_tenant)):
     """
     Belirtilen sunucunun detaylarını getirir.
     
@@ -3,8 +3,10 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from .. import crud, models, schemas
+from ..utils.udp_payloads import build_payload
+from ..utils.dns_probe import build_query
 from .utils import get_current_tenant
 
 router = APIRouter(prefix="/services", tags=["services"])
@@ -23,12 +25,20 @@ def create_service(payload: schemas.ServiceCreate, db: Session = Depends(get_db)
     Yeni bir servis tanımı ekler.
     
     - **name**: Servis için açıklayıcı isim (örn: "HTTP Web Service", "SIP Service", "PING Service")
-    - **protocol**: Protokol tipi ("tcp", "udp" veya "ping")
+    - **protocol**: Protokol tipi ("tcp", "udp", "ping", "http" veya "dns")
     - **port**: Port numarası (1-65535 arası, PING için kullanılmaz)
     - **is_global**: True ise tüm tenant'lar kullanabilir, False ise sadece oluşturan tenant kullanabilir
     - **location**: PING servisleri için lokasyon adı (opsiyonel)
     - **country**: PING servisleri için ülke kodu (opsiyonel)
     - **city**: PING servisleri için şehir adı (opsiyonel)
+    - **udp_payload_type**: UDP servisleri için sorgu şablonu: dns, ntp, snmp, hex (opsiyonel)
+    - **udp_payload**: Şablon parametresi: DNS adı, SNMP community veya hex veri (opsiyonel)
+    - **http_path** / **http_method**: HTTP servisleri için istek yolu ve metodu (varsayılan: "/" ve GET)
+    - **http_expected_status**: Beklenen durum kodu; boş ise 2xx/3xx başarılı sayılır (opsiyonel)
+    - **http_body_match**: Cevap gövdesinde aranacak metin (opsiyonel)
+    - **http_tls**: HTTPS kullan; boş ise port 443 için HTTPS (opsiyonel)
+    - **dns_query_name** / **dns_record_type**: DNS servisleri için sorgulanacak ad ve kayıt tipi (varsayılan: kök için NS, ad verilirse A)
+    - **dns_expected_answer**: Cevapta bulunması gereken adres/ad/metin; boş ise NOERROR cevabı yeterlidir (opsiyonel)
     
     Servis oluşturulduktan sonra, bu servisi sunuculara atayarak izleme başlatabilirsiniz.
     """
@@ -40,6 +50,8 @@ def create_service(payload: schemas.ServiceCreate, db: Session = Depends(get_db)
             raise HTTPException(status_code=400, detail=f"'{payload.location}' isimli ping lokasyonu bulunamadı")
         ping_location_id = ping_location.id
     
+    _validate_udp_payload(payload.udp_payload_type, payload.udp_payload)
+    _validate_dns_query(payload.dns_query_name)
     return crud.create_service(
         db, 
         tenant_id=tenant.id, 
@@ -50,7 +62,17 @@ def create_service(payload: schemas.ServiceCreate, db: Session = Depends(get_db)
         location=payload.location,
         country=payload.country,
         city=payload.city,
-        ping_location_id=ping_location_id
+        ping_location_id=ping_location_id,
+        udp_payload_type=payload.udp_payload_type,
+        udp_payload=payload.udp_payload,
+        http_path=payload.http_path,
+        http_method=payload.http_method,
+        http_expected_status=payload.http_expected_status,
+        http_body_match=payload.http_body_match,
+        http_tls=payload.http_tls,
+        dns_query_name=payload.dns_query_name,
+        dns_record_type=payload.dns_record_type,
+        dns_expected_answer=payload.dns_expected_answer,
     )
 
 
@@ -61,7 +83,7 @@ def create_service(payload: schemas.ServiceCreate, db: Session = Depends(get_db)
         200: {"description": "Servis listesi başarıyla döndürüldü"},
         401: {"description": "Geçersiz API anahtarı"}
     })
-def list_services(db: Session = Depends(get_db), tenant: models.Tenant = Depends(get_current_tenant)):
+def list_services(db: Session = Depends(get_read_db), tenant: models.Tenant = Depends(get_current_tenant)):
     """
     Mevcut tenant'a ait servisleri ve global servisleri listeler.
     
@@ -82,7 +104,7 @@ def list_services(db: Session = Depends(get_db), tenant: models.Tenant = Depends
         401: {"description": "Geçersiz API anahtarı"},
         404: {"description": "Servis bulunamadı"}
     })
-def get_service(service_id: int, db: Session = Depends(get_db), tenant: models.Tenant = Depends(get_current_tenant)):
+def get_service(service_id: int, db: Session = Depends(get_read_db), tenant: models.Tenant = Depends(get_current_tenant)):
     """
     Belirtilen servisin detaylarını getirir.
     
@@ -114,6 +136,9 @@ def update_service(service_id: int, payload: schemas.ServiceUpdate, db: Session
     - **protocol**: Yeni protokol tipi (opsiyonel)
     - **port**: Yeni port numarası (opsiyonel)
     - **is_global**: Global durumu (opsiyonel)
+    - **udp_payload_type** / **udp_payload**: UDP sorgu şablonu ve parametresi (opsiyonel)
+    - **http_path**, **http_method**, **http_expected_status**, **http_body_match**, **http_tls**: HTTP istek tanımı (opsiyonel)
+    - **dns_query_name**, **dns_record_type**, **dns_expected_answer**: DNS sorgu tanımı (opsiyonel)
     
     Sadece mevcut tenant'a ait servisler güncellenebilir.
     Global servisler sadece oluşturan tenant tarafından güncellenebilir.
@@ -121,7 +146,15 @@ def update_service(service_id: int, payload: schemas.ServiceUpdate, db: Session
     service = crud.get_service(db, service_id=service_id, tenant_id=tenant.id)
     if not service:
         raise HTTPException(status_code=404, detail="Servis bulunamadı")
-    return crud.update_service(db, service=service, name=payload.name, protocol=payload.protocol, port=payload.port, is_global=payload.is_global)
+    _validate_udp_payload(payload.udp_payload_type or service.udp_payload_type, payload.udp_payload if payload.udp_payload is not None else service.udp_payload)
+    _validate_dns_query(payload.dns_query_name)
+    return crud.update_service(
+        db, tenant_id=tenant.id, service=service, name=payload.name, protocol=payload.protocol, port=payload.port,
+        is_global=payload.is_global, udp_payload_type=payload.udp_payload_type, udp_payload=payload.udp_payload,
+        http_path=payload.http_path, http_method=payload.http_method, http_expected_status=payload.http_expected_status,
+        http_body_match=payload.http_body_match, http_tls=payload.http_tls, dns_query_name=payload.dns_query_name,
+        dns_record_type=payload.dns_record_type, dns_expected_answer=payload.dns_expected_answer,
+    )
 
 
 @router.delete("/{service_id}",
@@ -147,5 +180,23 @@ def delete_service(service_id: int, db: Session = Depends(get_db), tenant: model
     service = crud.get_service(db, service_id=service_id, tenant_id=tenant.id)
     if not service:
         raise HTTPException(status_code=404, detail="Servis bulunamadı")
-    crud.delete_service(db, service=service)
+    crud.delete_service(db, tenant_id=tenant.id, service=service)
     return {"message": "Servis silindi"}
+
+
+def _validate_udp_payload(payload_type, payload) -> None:
+    if payload_type is None:
+        return
+    try:
+        build_payload(payload_type.value, payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+def _validate_dns_query(name) -> None:
+    if name is None:
+        return
+    try:
+        build_query(0, name)
+    except (ValueError, UnicodeError) as exc:
+        raise HTTPException(status_code=400, detail=f"Geçersiz DNS sorgu adı: {exc}")
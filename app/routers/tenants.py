@@ -5,8 +5,10 @@ import secrets
 from fastapi import APIRouter, Depends, Header, HTTPException, status
 from sqlalchemy.orm import Session
 
-from ..database import get_db
-from .. import crud, schemas
+from ..database import get_db, get_read_db
+from .. import crud, models, schemas
+from ..utils.retention import TARGETS, effective_policy
+from .utils import get_current_tenant
 
 router = APIRouter(prefix="/tenants", tags=["tenants"])
 
@@ -42,7 +44,7 @@ def create_tenant(payload: schemas.TenantCreate, db: Session = Depends(get_db)):
     responses={
         200: {"description": "Tenant listesi başarıyla döndürüldü"}
     })
-def list_tenants(db: Session = Depends(get_db)):
+def list_tenants(db: Session = Depends(get_read_db)):
     """
     Sistemdeki tüm tenant'ları listeler.
     
@@ -51,3 +53,57 @@ def list_tenants(db: Session = Depends(get_db)):
     """
     # Basit listeleme — üretimde bu ucu koruyun.
     return crud.list_tenants(db)
+
+
+@router.get("/me/retention", response_model=schemas.RetentionPolicyOut,
+    summary="Saklama Politikası",
+    description="Mevcut tenant'ın geçmiş verisi saklama sürelerini döndürür.",
+    responses={
+        200: {"description": "Saklama politikası başarıyla döndürüldü"},
+        401: {"description": "Geçersiz API anahtarı"}
+    })
+def get_retention_policy(tenant: models.Tenant = Depends(get_current_tenant)):
+    """
+    Mevcut tenant'ın geçerli saklama sürelerini (gün, 0: süresiz) döndürür.
+    
+    - **checks_days**: Ham kontrol kayıtları
+    - **minute_rollups_days** / **hour_rollups_days** / **day_rollups_days**: 1 dakika / 1 saat / 1 gün özetleri
+    - **alert_history_days**: Alert geçmişi
+    - **overrides**: Tenant'a özel ayarlar; null olanlarda sunucu varsayılanı (`PMON_RETENTION_*`) geçerlidir
+    """
+    return _retention_out(tenant)
+
+
+@router.put("/me/retention", response_model=schemas.RetentionPolicyOut,
+    summary="Saklama Politikası Güncelle",
+    description="Mevcut tenant'ın geçmiş verisi saklama sürelerini günceller.",
+    responses={
+        200: {"description": "Saklama politikası başarıyla güncellendi"},
+        401: {"description": "Geçersiz API anahtarı"},
+        422: {"description": "Geçersiz veri formatı"}
+    })
+def update_retention_policy(payload: schemas.RetentionPolicyUpdate, db: Session = Depends(get_db), tenant: models.Tenant = Depends(get_current_tenant)):
+    """
+    Mevcut tenant'ın saklama sürelerini günceller (gün, 0: süresiz). Belirtilmeyen alanlar değişmez;
+    null gönderilen alanın tenant ayarı kaldırılır ve sunucu varsayılanı (`PMON_RETENTION_*`) geçerli olur.
+    
+    - **retention_checks_days**: Ham kontrol kayıtları (en az 1 gün)
+    - **retention_minute_rollups_days**: 1 dakikalık özetler (en az 1 gün)
+    - **retention_hour_rollups_days**: 1 saatlik özetler (en az 2 gün)
+    - **retention_day_rollups_days**: 1 günlük özetler
+    - **retention_alert_history_days**: Alert geçmişi (en az 1 gün)
+    
+    Süresi dolan kayıtlar bakım işi tarafından küçük partiler halinde silinir (`PMON_MAINTENANCE_INTERVAL`).
+    Eski ham kayıtlar özetlerde kaldığı için geçmiş grafikler daha kaba çözünürlükte görünmeye devam eder.
+    En kısa sürelerin altındaki değerler en kısa süre olarak uygulanır.
+    """
+    tenant = crud.update_retention_policy(db, tenant.id, **payload.model_dump(exclude_unset=True))
+    return _retention_out(tenant)
+
+
+def _retention_out(tenant: models.Tenant) -> schemas.RetentionPolicyOut:
+    policy = effective_policy(tenant)
+    return schemas.RetentionPolicyOut(
+        **{f"{target}_days": days for target, days in policy.items()},
+        overrides={target: getattr(tenant, f"retention_{target}_days") for target in TARGETS},
+    )
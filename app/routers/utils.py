@@ -1,16 +1,24 @@
 from __future__ import annotations
 
+from datetime import datetime, timezone
 from fastapi import Depends, Header, HTTPException, status
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_read_db
 from .. import crud, models
 
 
-async def get_current_tenant(x_api_key: str | None = Header(default=None, alias="X-API-Key"), db: Session = Depends(get_db)) -> models.Tenant:
+async def get_current_tenant(x_api_key: str | None = Header(default=None, alias="X-API-Key"), db: Session = Depends(get_read_db)) -> models.Tenant:
     if not x_api_key:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="X-API-Key gerekli")
     tenant = crud.get_tenant_by_api_key(db, x_api_key)
     if not tenant:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Geçersiz API anahtarı")
     return tenant
+
+
+def to_utc(value: datetime) -> datetime:
+    # Kayıtlar saat dilimsiz UTC tutulur
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
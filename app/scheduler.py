@@ -2,130 +2,614 @@ from __future__ import annotations
 
 import asyncio
 import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack, contextmanager
 from datetime import datetime
-from contextlib import asynccontextmanager
+from typing import Callable, Iterator
 from sqlalchemy.orm import Session
 
-from .database import get_db, generate_instance_id
+from .database import generate_instance_id, ReadSessionLocal, WriterSessionLocal
 from . import crud, models
-from .utils.network import check_tcp, check_udp, check_ping
+from .utils.probe_pool import ProbePool, run_probe
+from .utils.network import ProbeResult
+from .utils.probe_dedup import ProbeCoalescer, probe_key
 from .utils.alert_sender import AlertSender, AlertEvaluator
+from .utils.timer_queue import DueQueue
+from .utils.result_buffer import ResultBuffer, CheckRecord, AlertRecord
+from .utils.rollups import RollupJob
+from .utils.retention import MaintenanceJob
+from .utils.uptime_windows import UptimeTracker
+from .utils.metrics import SchedulerMetrics
+from .utils.dns_cache import close_dns_cache, get_dns_cache, resolve_host
+from .utils import host_batching
+from .utils.host_batching import HostLimiter
+from .utils.probe_registry import ProbeRequest, concurrency_classes, get_probe, probe_request
+
+
+# Çalışan scheduler'lar; API tarafındaki monitor değişikliklerini bildirmek için
+_active_schedulers: list["MonitorScheduler"] = []
+
+
+def notify_monitor_changed(monitor_id: int, next_run_at: datetime | None) -> None:
+    """
+    Monitor oluşturma/güncelleme/silme sonrası çağrılır.
+    next_run_at None ise monitor bellek içi kuyruktan çıkarılır.
+    Router'lar thread pool'da çalıştığı için thread-safe olmalıdır.
+    """
+    for scheduler in list(_active_schedulers):
+        scheduler.monitor_changed(monitor_id, next_run_at)
+
+
+def run_manual_check(monitor_id: int) -> tuple[models.Monitor, ProbeResult] | None:
+    """
+    Anlık kontrolü monitor'ün shard'ına sahip çalışan scheduler'a yaptırır (POST /api/monitors/{id}/check).
+    Router thread'inden çağrılır; bu instance'ta uygun scheduler yoksa None döner.
+    """
+    for scheduler in list(_active_schedulers):
+        if scheduler._loop is not None and scheduler._owns(monitor_id):
+            return asyncio.run_coroutine_threadsafe(scheduler.check_now(monitor_id), scheduler._loop).result()
+    return None
 
 
 class MonitorScheduler:
-    def __init__(self, poll_interval: float = 2.0, lease_ttl: int = 10) -> None:
+    def __init__(
+        self,
+        poll_interval: float = 2.0,
+        lease_ttl: int = 10,
+        mode: str | None = None,
+        concurrency: int | None = None,
+        resync_interval: float | None = None,
+        shard_count: int | None = None,
+    ) -> None:
         self.poll_interval = poll_interval
         self.lease_ttl = lease_ttl
+        # "poll": her poll_interval'da DB'den due monitor sorgusu (varsayılan)
+        # "heap": next_run_at değerleri bellekte tutulur, tam zamanında uyanılır
+        self.mode = (mode or os.getenv("PMON_SCHEDULER_MODE", "poll")).lower()
+        # Aynı anda çalışan kontrol sayısı (uzun ömürlü worker task sayısı)
+        self.concurrency = max(1, concurrency or int(os.getenv("PMON_SCHEDULER_CONCURRENCY", "50")))
+        # Heap modunda başka instance'lardan gelen değişiklikler için tam senkron aralığı
+        self.resync_interval = resync_interval if resync_interval is not None else float(os.getenv("PMON_SCHEDULER_RESYNC_INTERVAL", "60"))
+        # Monitor'ler `monitor_id % shard_count` ile shard'lara bölünür; her instance adil payı kadar shard alır
+        self.shard_count = max(1, shard_count or int(os.getenv("PMON_SCHEDULER_SHARDS", "1")))
+        # >0 ise yeni alınan shard'lardaki gecikmiş monitor'ler bu süreye yayılarak çalıştırılır
+        self.rampup_seconds = float(os.getenv("PMON_SCHEDULER_RAMPUP_SECONDS", "0"))
         self.instance_id = generate_instance_id()
         self._running = False
+        self._shards: list[int] = []
+        self._shards_checked_at: datetime | None = None
+        self._due = DueQueue()
+        self._due_loaded_at: datetime | None = None
+        self._changes: deque[tuple[int, datetime | None]] = deque()
+        self._wakeup: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        # Worker havuzu: kuyruktaki + çalışan kontrol sayısı concurrency'yi aşmaz
+        self._work: asyncio.Queue | None = None
+        self._active = 0
+        self._saturated = False
+        # Dağıtılmış ama sonucu henüz DB'ye yazılmamış monitor'ler; tekrar dağıtılmaz
+        self._pending: set[int] = set()
+        # Sürmekte olan anlık kontroller; durdururken sonuç kuyruğu kapanmadan beklenir
+        self._manual_checks: set[asyncio.Task] = set()
+        # >0 ise probe'lar ayrı process'lerde (her biri kendi event loop'u ile) çalışır
+        probe_processes = int(os.getenv("PMON_PROBE_PROCESSES", "0"))
+        self._probe_pool = ProbePool(probe_processes) if probe_processes > 0 else None
+        # Probe sınıfı (socket, datagram, icmp, http) başına opsiyonel eşzamanlılık sınırı
+        self._probe_limits = {
+            name: asyncio.Semaphore(int(os.environ[f"PMON_PROBE_CONCURRENCY_{name.upper()}"]))
+            for name in concurrency_classes() if os.getenv(f"PMON_PROBE_CONCURRENCY_{name.upper()}")
+        }
+        # Host gruplaması açıksa aynı sunucunun due monitor'leri tek iş olarak çalışır;
+        # host başına bağlantı sınırı gruplar arasında da geçerlidir
+        self.host_batching = host_batching.ENABLED
+        self._host_limits = HostLimiter() if self.host_batching else None
+        self._host_batches = 0
+        # Aynı (host, protocol, port) hedefi için eşzamanlı/yakın zamanlı probe'lar birleştirilir
+        self._probes = ProbeCoalescer(window=float(os.getenv("PMON_PROBE_DEDUP_WINDOW", "2")))
+        # Tüm yazmalar (lease, sonuç, rollup, bakım) kuyruklu tek yazar thread'inde tek bağlantıyla sırayla yapılır;
+        # due yükleme gibi okumalar ayrı havuzda çalışır ve yazma kuyruğunu beklemez
+        self._db_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pmon-db-writer")
+        self._db_reader = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pmon-db-reader")
+        # Gecikme/throughput metrikleri (GET /api/scheduler/metrics)
+        self.metrics = SchedulerMetrics()
+        # Kontrol sonuçları toplu yazılır (write-behind)
+        self._results = ResultBuffer(
+            WriterSessionLocal, on_flushed=self._pending.difference_update, executor=self._db_writer,
+            flush_timer=self.metrics.flush,
+        )
+        # Kontrol geçmişi sahip olunan shard'lar için arka planda 1 dk / 1 sa / 1 gün özetlerine toplanır
+        self._rollups = RollupJob(WriterSessionLocal, shards=lambda: (self.shard_count, list(self._shards)), executor=self._db_writer)
+        # Saklama süresi dolan geçmişin silinmesi ve SQLite bakımı; tenant bazlı olduğundan yalnızca shard 0'ın sahibi yapar
+        self._maintenance = MaintenanceJob(WriterSessionLocal, enabled=lambda: 0 in self._shards, executor=self._db_writer)
+        # 1 sa / 24 sa / 7 gün uptime pencereleri bellekte tutulur, checkpoint'leri seyrek yazılır
+        self._uptime = UptimeTracker()
 
     async def start(self) -> None:
+        if os.getenv("PMON_SCHEDULER_ENABLED", "true").lower() != "true":
+            return
         self._running = True
-        while self._running and os.getenv("PMON_SCHEDULER_ENABLED", "true").lower() == "true":
-            await self._tick()
-            await asyncio.sleep(self.poll_interval)
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._work = asyncio.Queue()
+        self._results.start()
+        self._rollups.start()
+        self._maintenance.start()
+        if self._probe_pool is not None:
+            self._probe_pool.start()
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        _active_schedulers.append(self)
+        try:
+            await self._dispatch()
+        finally:
+            _active_schedulers.remove(self)
+            try:
+                # Kuyruğa alınmış kontrollerin bitmesini bekle, sonra worker'ları kapat
+                await self._work.join()
+                await asyncio.gather(*self._manual_checks, return_exceptions=True)
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                if self._probe_pool is not None:
+                    await self._probe_pool.stop()
+                # Önbelleğin getaddrinfo thread havuzu scheduler'la birlikte kapanır
+                close_dns_cache()
+                await self._maintenance.stop()
+                await self._rollups.stop()
+                await self._results.stop()
+                await self._save_uptime_windows(self._uptime.states())
+            finally:
+                # Kapanış süre aşımıyla iptal edilse de lease'ler bırakılır; eşler lease_ttl beklemeden devralır
+                for worker in workers:
+                    worker.cancel()
+                await self._release_shards()
 
     async def stop(self) -> None:
         self._running = False
+        self._wake()
 
-    async def _tick(self) -> None:
-        # Tek leader davranışı için lease kullan
-        for db in _db_iter():
-            if not crud.try_acquire_lease(db, owner_id=self.instance_id, ttl_seconds=self.lease_ttl):
-                return
-            # due monitors
+    async def metrics_snapshot(self) -> dict:
+        """Scheduler metriklerinin anlık görüntüsü; scheduler'ın event loop'unda çağrılmalıdır"""
+        queued = self._work.qsize() if self._work is not None else 0
+        backlog = None
+        if self._running and self._shards:
             now = datetime.utcnow()
-            monitors = crud.due_monitors(db, now=now, limit=50)
-            if not monitors:
-                crud.renew_lease(db, owner_id=self.instance_id, ttl_seconds=self.lease_ttl)
-                return
-            await self._run_batch(db, monitors)
-            crud.renew_lease(db, owner_id=self.instance_id, ttl_seconds=self.lease_ttl)
-
-    async def _run_batch(self, db: Session, monitors: list[models.Monitor]) -> None:
-        tasks = [self._run_one(db, m) for m in monitors]
-        await asyncio.gather(*tasks, return_exceptions=True)
-
-    async def _run_one(self, db: Session, monitor: models.Monitor) -> None:
-        server = monitor.server
-        service = monitor.service
+            if self.mode == "heap":
+                backlog = self._due.count_due(now)
+            else:
+                # DB'de due görünen ama zaten dağıtılmış olanlar (pending) backlog sayılmaz
+                due = await self._in_db_reader(self._count_due, now, list(self._shards))
+                backlog = max(0, due - len(self._pending))
+        # Probe process havuzu kullanılıyorsa çözümleme worker process'lerde yapılır; buradaki değerler boş kalır
+        dns = get_dns_cache()
+        return {
+            "instance_id": self.instance_id,
+            "running": self._running,
+            "mode": self.mode,
+            "shards": list(self._shards),
+            "shard_count": self.shard_count,
+            "uptime_seconds": round(time.monotonic() - self.metrics.started_at, 1),
+            "concurrency": self.concurrency,
+            "checks_total": self.metrics.checks.total,
+            "failures_total": self.metrics.failures.total,
+            "coalesced_total": self._probes.coalesced,
+            "host_batching": self.host_batching,
+            "host_batches_total": self._host_batches,
+            "checks_per_second": round(self.metrics.checks.rate(), 2),
+            "backlog": backlog,
+            "queued_checks": queued,
+            "in_flight_checks": self._active - queued,
+            "in_flight_probes": self._probes.inflight,
+            "pending_writes": self._results.pending(),
+            "lag_ms": self.metrics.lag.summary(),
+            "probe_ms": self.metrics.probe.summary(),
+            "flush_ms": self.metrics.flush.summary(),
+            "alert_ms": self.metrics.alert.summary(),
+            "rollup_ms": self._rollups.run_ms.summary(),
+            "rollup_rows_total": self._rollups.rows_written,
+            "maintenance_ms": self._maintenance.run_ms.summary(),
+            "maintenance_rows_removed_total": dict(self._maintenance.rows_removed),
+            "maintenance_pages_freed_total": self._maintenance.pages_freed,
+            "maintenance_last_run_at": self._maintenance.last_run_at,
+            "resolve_ms": dns.lookup_ms.summary(),
+            "dns_cache_hits": dns.hits,
+            "dns_cache_misses": dns.misses,
+            "dns_cache_size": len(dns),
+        }
+
+    def _count_due(self, now: datetime, shards: list[int]) -> int:
+        with _session(ReadSessionLocal) as db:
+            return crud.count_due_monitors(db, now=now, shard_count=self.shard_count, shards=shards)
+
+    def monitor_changed(self, monitor_id: int, next_run_at: datetime | None) -> None:
+        if self.mode != "heap":
+            return
+        self._changes.append((monitor_id, next_run_at))
+        self._wake()
+
+    def _wake(self) -> None:
+        if self._loop is not None and self._wakeup is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                pass  # loop kapanmış
+
+    async def _ensure_shards(self) -> bool:
+        """
+        Shard lease'lerini en geç lease_ttl/3 saniyede bir yeniler ve yeniden dengeler.
+        Sahip olunan shard yoksa False döner.
+        """
+        now = datetime.utcnow()
+        if self._shards_checked_at is not None and (now - self._shards_checked_at).total_seconds() < self.lease_ttl / 3.0:
+            return bool(self._shards)
+        shards = await self._in_db_writer(self._acquire_shards)
+        acquired = sorted(set(shards) - set(self._shards))
+        if acquired and self.rampup_seconds > 0:
+            staggered = await self._in_db_writer(self._stagger_backlog, acquired)
+            if staggered:
+                print(f"Scheduler: {staggered} gecikmiş monitor {self.rampup_seconds:.0f} sn'ye yayıldı")
+        if shards != self._shards:
+            if self.shard_count > 1:
+                print(f"Scheduler {self.instance_id} shard'ları: {shards} / {self.shard_count}")
+            # Shard seti değişti; bellek içi kuyruk yeniden yüklenmeli
+            self._due_loaded_at = None
+        self._shards = shards
+        self._shards_checked_at = now
+        return bool(shards)
+
+    def _acquire_shards(self) -> list[int]:
+        with _session() as db:
+            return crud.acquire_shard_leases(db, owner_id=self.instance_id, shard_count=self.shard_count, ttl_seconds=self.lease_ttl)
+
+    def _stagger_backlog(self, shards: list[int]) -> int:
+        with _session() as db:
+            return crud.stagger_overdue_monitors(
+                db, now=datetime.utcnow(), ramp_seconds=self.rampup_seconds, min_overdue_seconds=self.lease_ttl,
+                shard_count=self.shard_count, shards=shards,
+            )
+
+    async def _release_shards(self) -> None:
+        if not self._shards:
+            return
+        try:
+            await self._in_db_writer(self._release_shards_sync)
+        except Exception as e:
+            print(f"Shard lease bırakma hatası: {e}")
+        self._shards = []
+        self._shards_checked_at = None
+
+    def _release_shards_sync(self) -> None:
+        with _session() as db:
+            crud.release_shard_leases(db, owner_id=self.instance_id)
+
+    async def _save_uptime_windows(self, states: dict[int, str]) -> None:
+        if not states:
+            return
+        try:
+            await self._in_db_writer(self._save_uptime_windows_sync, states)
+        except Exception as e:
+            print(f"Uptime pencereleri yazılamadı: {e}")
+
+    def _save_uptime_windows_sync(self, states: dict[int, str]) -> None:
+        with _session() as db:
+            crud.save_uptime_windows(db, states)
+
+    def _owns(self, monitor_id: int) -> bool:
+        return monitor_id % self.shard_count in self._shards
+
+    async def _in_db_writer(self, func, *args):
+        # Senkron SQLAlchemy çağrıları probe'ları çalıştıran event loop'u bloklamasın
+        return await self._loop.run_in_executor(self._db_writer, func, *args)
+
+    async def _in_db_reader(self, func, *args):
+        return await self._loop.run_in_executor(self._db_reader, func, *args)
+
+    async def _dispatch(self) -> None:
+        """
+        Üretici döngü: boş worker slotu oldukça due monitor'leri kuyruğa ekler.
+        Yavaş bir kontrol yalnızca kendi slotunu tutar; diğer slotlar dolmaya devam eder.
+        """
+        while self._running:
+            # Bu noktadan sonra gelen bildirimler (slot boşaldı, monitor değişti) uykuyu erken bitirir
+            self._wakeup.clear()
+            free = self.concurrency - self._active
+            if free <= 0:
+                self._saturated = True
+                await self._sleep(self.lease_ttl / 3.0)
+                continue
+            delay = self.poll_interval
+            try:
+                if await self._ensure_shards():
+                    if self.mode == "heap":
+                        await self._sync_due_queue()
+                        now = datetime.utcnow()
+                        due_ids = self._due.pop_due(now, limit=free)
+                        work = await self._in_db_reader(self._load_by_ids, due_ids) if due_ids else []
+                    else:
+                        now = datetime.utcnow()
+                        # Sonucu henüz yazılmamış monitor'ler hâlâ due görünür; onları atla
+                        work = await self._in_db_reader(self._load_due, now, free, frozenset(self._pending), list(self._shards))
+                    self._enqueue(work)
+                    # Doygunsa bir slot boşalınca hemen devam et
+                    self._saturated = len(work) >= free
+                    if self._saturated:
+                        delay = self.lease_ttl / 3.0
+                    elif self.mode == "heap":
+                        delay = self._heap_sleep_seconds(now)
+            except Exception as e:
+                print(f"Scheduler dağıtım hatası: {e}")
+            if delay > 0:
+                await self._sleep(delay)
+
+    def _load_due(self, now: datetime, limit: int, exclude: frozenset[int], shards: list[int]) -> list[tuple[models.Monitor, list[models.AlertRule]]]:
+        with _session(ReadSessionLocal) as db:
+            monitors = crud.due_monitors(db, now=now, limit=limit + len(exclude), shard_count=self.shard_count, shards=shards)
+            return _detach_work(db, [m for m in monitors if m.id not in exclude][:limit])
+
+    def _load_by_ids(self, monitor_ids: list[int]) -> list[tuple[models.Monitor, list[models.AlertRule]]]:
+        with _session(ReadSessionLocal) as db:
+            return _detach_work(db, crud.get_monitors_by_ids(db, monitor_ids))
+
+    def _enqueue(self, work: list[tuple[models.Monitor, list[models.AlertRule]]]) -> None:
+        # Kuyruğa gruplar (çoğunlukla tek monitor) eklenir; _active monitor sayısını tutar
+        for batch in self._batches(work):
+            for monitor, _ in batch:
+                self._pending.add(monitor.id)
+            self._active += len(batch)
+            self._work.put_nowait(batch)
+
+    def _batches(self, work: list[tuple[models.Monitor, list[models.AlertRule]]]) -> list[list[tuple[models.Monitor, list[models.AlertRule]]]]:
+        if not self.host_batching:
+            return [[item] for item in work]
+        batches: dict[int, list[tuple[models.Monitor, list[models.AlertRule]]]] = {}
+        singles = []
+        for monitor, alert_rules in work:
+            probe = get_probe(monitor.service.protocol.value)
+            if probe is not None and probe.supports_batching:
+                batches.setdefault(monitor.server_id, []).append((monitor, alert_rules))
+            else:
+                singles.append([(monitor, alert_rules)])
+        return list(batches.values()) + singles
+
+    async def _worker(self) -> None:
+        while True:
+            batch = await self._work.get()
+            try:
+                if len(batch) == 1:
+                    await self._run_tracked(*batch[0])
+                else:
+                    await self._run_batch(batch)
+            finally:
+                self._work.task_done()
+
+    async def _run_batch(self, batch: list[tuple[models.Monitor, list[models.AlertRule]]]) -> None:
+        """
+        Aynı sunucunun monitor'lerini birlikte çalıştırır: host bir kez çözümlenir, probe'lar
+        host başına bağlantı sınırı içinde eşzamanlı yapılır, sonuçlar her monitor'e ayrı işlenir.
+        """
+        self._host_batches += 1
+        if self._probe_pool is None:
+            # Probe'lar aynı önbellekten okur; process havuzunda her worker kendi önbelleğini kullanır
+            timeout = max(crud.probe_timeout(monitor) for monitor, _ in batch)
+            try:
+                await resolve_host(batch[0][0].server.host, timeout=timeout)
+            except (OSError, asyncio.TimeoutError):
+                pass  # Hata her monitor'ün kendi sonucunda raporlanır
+        await asyncio.gather(*(self._run_tracked(monitor, alert_rules) for monitor, alert_rules in batch))
+
+    async def _run_tracked(self, monitor: models.Monitor, alert_rules: list[models.AlertRule]) -> None:
+        try:
+            await self._run_one(monitor, alert_rules)
+        except Exception as e:
+            print(f"Monitor {monitor.id} kontrol hatası: {e}")
+            self._pending.discard(monitor.id)
+            monitor.next_run_at = crud.next_run_time(monitor, datetime.utcnow())
+        finally:
+            if self.mode == "heap" and monitor.next_run_at is not None and self._owns(monitor.id):
+                self._due.schedule(monitor.id, monitor.next_run_at)
+            self._active -= 1
+            if self._saturated:
+                self._wakeup.set()
+
+    async def _sync_due_queue(self) -> None:
+        now = datetime.utcnow()
+        if self._due_loaded_at is None or (now - self._due_loaded_at).total_seconds() >= self.resync_interval:
+            entries = await self._in_db_reader(self._load_schedule_entries, list(self._shards))
+            # Çalışan veya sonucu yazılmamış monitor'lerin DB'deki zamanı eskidir; bellekteki korunur,
+            # henüz planlanmamışsa worker bitince planlar
+            kept = {monitor_id: self._due.deadline_of(monitor_id) for monitor_id in self._pending}
+            self._changes.clear()
+            self._due.clear()
+            for monitor_id, next_run_at in entries:
+                if monitor_id in kept:
+                    next_run_at = kept[monitor_id]
+                if next_run_at is not None:
+                    self._due.schedule(monitor_id, next_run_at)
+            self._due_loaded_at = now
+            return
+        while self._changes:
+            monitor_id, next_run_at = self._changes.popleft()
+            if monitor_id in self._pending:
+                # Çalışmakta; worker bitince güncel ayarlarla yeniden planlanır
+                continue
+            if next_run_at is None or not self._owns(monitor_id):
+                self._due.remove(monitor_id)
+            else:
+                self._due.schedule(monitor_id, next_run_at)
+
+    def _load_schedule_entries(self, shards: list[int]) -> list[tuple[int, datetime]]:
+        with _session(ReadSessionLocal) as db:
+            return crud.list_schedule_entries(db, shard_count=self.shard_count, shards=shards)
+
+    def _heap_sleep_seconds(self, now: datetime) -> float:
+        # Lease süresi dolmadan yenilemek ve resync'i kaçırmamak için uykuyu sınırla
+        limit = min(self.lease_ttl / 3.0, self.resync_interval)
+        next_deadline = self._due.next_deadline()
+        if next_deadline is None:
+            return limit
+        return max(0.0, min(limit, (next_deadline - now).total_seconds()))
+
+    async def _sleep(self, delay: float) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run_one(self, monitor: models.Monitor, alert_rules: list[models.AlertRule]) -> None:
+        # Planlanan zaman ile kontrolün gerçekten başladığı an arasındaki gecikme
+        scheduled_at = monitor.next_run_at
+        lag_ms = (datetime.utcnow() - scheduled_at).total_seconds() * 1000 if scheduled_at is not None else 0.0
         
-        # Port kontrolü yap
-        if service.protocol == models.ProtocolEnum.tcp:
-            success, latency, error = await check_tcp(server.host, service.port)
-        elif service.protocol == models.ProtocolEnum.udp:
-            success, latency, error = await check_udp(server.host, service.port)
-        elif service.protocol == models.ProtocolEnum.ping:
-            success, latency, error = await check_ping(server.host)
-        else:
-            success, latency, error = False, None, f"Unsupported protocol: {service.protocol}"
+        # Port kontrolü yap; aynı hedefi izleyen monitor'ler tek probe sonucunu paylaşır
+        request = probe_request(monitor.server, monitor.service)
+        timeout = crud.probe_timeout(monitor)
+        probe_started = time.perf_counter()
+        result = await self._probes.run(probe_key(*request, timeout=timeout), lambda: self._probe(request, timeout))
+        self.metrics.record_check(result.success, lag_ms, (time.perf_counter() - probe_started) * 1000)
         
-        # Monitor durumunu güncelle
-        monitor.last_status = "up" if success else "down"
-        monitor.last_latency_ms = latency
-        monitor.last_error = error
-        monitor.last_checked_at = datetime.utcnow()
+        # Monitor durumunu, aşama sürelerini ve uptime pencerelerini bellekte güncelle
+        windows = self._uptime.get(monitor.id, monitor.uptime_windows, monitor.last_checked_at)
+        crud.apply_check_result(monitor, result, windows=windows)
+        checkpoint = windows.to_state() if self._uptime.checkpoint_due(monitor.id) else None
         
-        # İstatistikleri güncelle
-        crud.update_monitor_stats(db, monitor, success, latency)
+        # Sonraki çalışma zamanını planla
+        monitor.next_run_at = crud.next_run_time(monitor, monitor.last_checked_at)
         
         # Alert kurallarını değerlendir
-        await self._evaluate_alerts(db, monitor)
+        alerts = []
+        if alert_rules:
+            alert_started = time.perf_counter()
+            alerts = await self._evaluate_alerts(monitor, alert_rules)
+            self.metrics.alert.observe((time.perf_counter() - alert_started) * 1000)
         
-        # Sonraki çalışma zamanını planla
-        crud.schedule_next_run(db, monitor, now=monitor.last_checked_at)
+        # Alert kayıtları (ve kuralların tetiklenme zamanı) kontrol sonucundan önce kuyruğa girer; monitor ancak
+        # sonucu yazılınca yeniden dağıtıldığından cooldown'u kaydedilmemiş bir kuralla tekrar değerlendirilmez
+        for record in alerts:
+            await self._results.put(record)
+        await self._results.put(CheckRecord.from_monitor(monitor, uptime_windows=checkpoint))
+        await self._save_uptime_windows(self._uptime.evict_idle(monitor.last_checked_at))
 
-    async def _evaluate_alerts(self, db: Session, monitor: models.Monitor) -> None:
-        """Monitor için alert kurallarını değerlendirir ve tetikler"""
+    async def check_now(self, monitor_id: int) -> tuple[models.Monitor, ProbeResult] | None:
+        """
+        Monitor'ü sırasını beklemeden kontrol eder; sonuç zamanlanmış kontrollerle aynı yazma kuyruğundan yazılır.
+        Monitor çalışıyorsa veya sonucu yazılmamışsa önce o yazılır; sayaçlar DB'deki son halden devam eder.
+        Monitor bu scheduler'da çalıştırılmıyorsa (kapalı, shard'ı başkasında) None döner.
+        """
+        if not self._running or not self._owns(monitor_id):
+            return None
+        task = asyncio.current_task()
+        self._manual_checks.add(task)
+        try:
+            while monitor_id in self._pending:
+                await asyncio.sleep(0.05)
+            self._pending.add(monitor_id)
+            try:
+                work = await self._in_db_reader(self._load_by_ids, [monitor_id])
+                if not work:
+                    self._pending.discard(monitor_id)
+                    return None
+                monitor = work[0][0]
+                # Bu sırada heap'ten dağıtılmasın; bitince kendi zamanına yeniden planlanır
+                self._due.remove(monitor_id)
+                try:
+                    request = probe_request(monitor.server, monitor.service)
+                    result = await self._probe(request, crud.probe_timeout(monitor))
+                    # Scheduler'ın bellekteki uptime pencerelerine işlenir; DB'deki checkpoint'e yazılsa bir sonraki checkpoint ezerdi
+                    windows = self._uptime.get(monitor.id, monitor.uptime_windows, monitor.last_checked_at)
+                    crud.apply_check_result(monitor, result, windows=windows)
+                    checkpoint = windows.to_state() if self._uptime.checkpoint_due(monitor.id) else None
+                    await self._results.put(CheckRecord.from_monitor(monitor, uptime_windows=checkpoint))
+                finally:
+                    if self.mode == "heap" and monitor.next_run_at is not None:
+                        self._due.schedule(monitor_id, monitor.next_run_at)
+            except BaseException:
+                self._pending.discard(monitor_id)
+                raise
+            return monitor, result
+        finally:
+            self._manual_checks.discard(task)
+
+    async def _probe(self, request: ProbeRequest, timeout: float | None = None) -> ProbeResult:
+        probe = get_probe(request.protocol)
+        if probe is None:
+            return await self._dispatch_probe(request, timeout)
+        async with AsyncExitStack() as limits:
+            # Önce host sırası beklenir; beklerken sınıf slotu tutulmaz
+            if self._host_limits is not None and probe.supports_batching:
+                await limits.enter_async_context(self._host_limits.hold(request.host))
+            limit = self._probe_limits.get(probe.concurrency_class)
+            if limit is not None:
+                await limits.enter_async_context(limit)
+            return await self._dispatch_probe(request, timeout)
+
+    async def _dispatch_probe(self, request: ProbeRequest, timeout: float | None) -> ProbeResult:
+        host, protocol, port, options = request
+        if self._probe_pool is not None:
+            return await self._probe_pool.probe(host, protocol, port, timeout, options)
+        return await run_probe(host, protocol, port, timeout, options)
+
+    async def _evaluate_alerts(self, monitor: models.Monitor, alert_rules: list[models.AlertRule]) -> list[AlertRecord]:
+        """Monitor için alert kurallarını değerlendirir ve tetikler; yazılacak geçmiş kayıtlarını döner"""
+        records = []
         try:
-            # Monitor için alert kurallarını al
-            alert_rules = crud.get_monitor_alert_rules(db, monitor.id)
             if not alert_rules:
-                return
+                return records
             
             # Alert kurallarını değerlendir
             triggered_alerts = AlertEvaluator.evaluate_alerts(monitor, alert_rules)
             
             # Tetiklenen alert'leri gönder
             for rule, message, details in triggered_alerts:
-                if crud.can_trigger_alert(db, rule):
-                    await self._send_alert(db, rule, message, details)
+                if crud.can_trigger_alert(None, rule):
+                    record = await self._send_alert(rule, message, details)
+                    if record is not None:
+                        records.append(record)
                     
         except Exception as e:
             print(f"Alert değerlendirme hatası: {e}")
+        return records
 
-    async def _send_alert(self, db: Session, alert_rule: models.AlertRule, message: str, details: dict) -> None:
-        """Alert'i gönderir ve geçmişe kaydeder"""
+    async def _send_alert(self, alert_rule: models.AlertRule, message: str, details: dict) -> AlertRecord | None:
+        """Alert'i gönderir ve geçmiş kaydını döner"""
         try:
             # Alert'i gönder
             success, error = await AlertSender.send_alert(alert_rule, message, details)
+            sent_at = datetime.utcnow()
+            if success:
+                alert_rule.last_triggered_at = sent_at
             
-            # Geçmişe kaydet
-            crud.create_alert_history(
-                db=db,
+            # Geçmiş kaydı; kural başarılıysa aynı flush'ta tetiklendi olarak işaretlenir
+            return AlertRecord(
                 alert_rule_id=alert_rule.id,
                 alert_type=alert_rule.alert_type,
                 message=message,
                 details=str(details),
+                sent_at=sent_at,
                 sent_successfully=success,
-                error_message=error
+                error_message=error,
             )
-            
-            # Alert kuralını tetiklendi olarak işaretle
-            if success:
-                crud.mark_alert_triggered(db, alert_rule)
                 
         except Exception as e:
             print(f"Alert gönderme hatası: {e}")
+            return None
 
 
-def _db_iter():
-    # Basit senkron DB generator'ını async döngü içinde kullanmak için
-    db = None
+@contextmanager
+def _session(factory: Callable[[], Session] = WriterSessionLocal) -> Iterator[Session]:
+    # Her DB işi için kısa ömürlü session; DB thread'inde açılıp kapanır
+    db = factory()
     try:
-        from .database import SessionLocal
-        db = SessionLocal()
         yield db
     finally:
-        if db is not None:
-            db.close()
+        db.close()
+
+
+def _detach_work(db: Session, monitors: list[models.Monitor]) -> list[tuple[models.Monitor, list[models.AlertRule]]]:
+    if not monitors:
+        return []
+    alert_rules = crud.get_alert_rules_for_monitors(db, [m.id for m in monitors])
+    # Sonuçlar ResultBuffer üzerinden toplu yazılır; nesneler session'dan ayrılarak
+    # worker'lar tarafından DB'ye dokunmadan kullanılır
+    db.expunge_all()
+    return [(monitor, alert_rules.get(monitor.id, [])) for monitor in monitors]
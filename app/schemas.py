@@ -10,6 +10,34 @@ class ProtocolEnum(str, Enum):
     tcp = "tcp"
     udp = "udp"
     ping = "ping"
+    http = "http"
+    dns = "dns"
+
+
+class HttpMethodEnum(str, Enum):
+    GET = "GET"
+    HEAD = "HEAD"
+    POST = "POST"
+    OPTIONS = "OPTIONS"
+
+
+class DnsRecordTypeEnum(str, Enum):
+    A = "A"
+    AAAA = "AAAA"
+    CNAME = "CNAME"
+    MX = "MX"
+    NS = "NS"
+    PTR = "PTR"
+    SOA = "SOA"
+    SRV = "SRV"
+    TXT = "TXT"
+
+
+class UdpPayloadTypeEnum(str, Enum):
+    dns = "dns"
+    ntp = "ntp"
+    snmp = "snmp"
+    hex = "hex"
 
 
 class AlertTypeEnum(str, Enum):
@@ -19,6 +47,12 @@ class AlertTypeEnum(str, Enum):
     uptime_percentage = "uptime_percentage"
 
 
+class UptimeWindowEnum(str, Enum):
+    hour = "1h"
+    day = "24h"
+    week = "7d"
+
+
 class AlertChannelTypeEnum(str, Enum):
     email = "email"
     sms = "sms"
@@ -46,6 +80,48 @@ class TenantOut(BaseModel):
         from_attributes = True
 
 
+class RetentionPolicyUpdate(BaseModel):
+    retention_checks_days: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="Ham kontrol kayıtlarının saklama süresi (gün, 0: süresiz, en az 1)",
+        example=7
+    )
+    retention_minute_rollups_days: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="1 dakikalık özetlerin saklama süresi (gün, 0: süresiz, en az 1)",
+        example=30
+    )
+    retention_hour_rollups_days: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="1 saatlik özetlerin saklama süresi (gün, 0: süresiz, en az 2)",
+        example=365
+    )
+    retention_day_rollups_days: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="1 günlük özetlerin saklama süresi (gün, 0: süresiz)",
+        example=0
+    )
+    retention_alert_history_days: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="Alert geçmişinin saklama süresi (gün, 0: süresiz, en az 1)",
+        example=90
+    )
+
+
+class RetentionPolicyOut(BaseModel):
+    checks_days: int = Field(description="Ham kontrol kayıtlarının geçerli saklama süresi (gün, 0: süresiz)")
+    minute_rollups_days: int = Field(description="1 dakikalık özetlerin geçerli saklama süresi (gün, 0: süresiz)")
+    hour_rollups_days: int = Field(description="1 saatlik özetlerin geçerli saklama süresi (gün, 0: süresiz)")
+    day_rollups_days: int = Field(description="1 günlük özetlerin geçerli saklama süresi (gün, 0: süresiz)")
+    alert_history_days: int = Field(description="Alert geçmişinin geçerli saklama süresi (gün, 0: süresiz)")
+    overrides: Dict[str, Optional[int]] = Field(description="Tenant'a özel ayarlar (null: sunucu varsayılanı)")
+
+
 # PingLocation
 class PingLocationCreate(BaseModel):
     name: str = Field(
@@ -172,7 +248,7 @@ class ServiceCreate(BaseModel):
         example="HTTP Web Service"
     )
     protocol: ProtocolEnum = Field(
-        description="Protokol tipi: TCP veya UDP",
+        description="Protokol tipi: tcp, udp, ping, http veya dns",
         example="tcp"
     )
     port: int = Field(
@@ -200,6 +276,67 @@ class ServiceCreate(BaseModel):
         description="PING servisi için şehir adı",
         example="New York"
     )
+    # UDP servisleri için sorgu şablonu
+    udp_payload_type: Optional[UdpPayloadTypeEnum] = Field(
+        default=None,
+        description="UDP sorgu şablonu: dns, ntp, snmp veya hex. Verilirse cevap gelmeyen port down sayılır",
+        example="dns"
+    )
+    udp_payload: Optional[str] = Field(
+        default=None,
+        max_length=1024,
+        description="Şablon parametresi: DNS için sorgulanacak ad, SNMP için community, hex için ham veri",
+        example="example.com"
+    )
+    # HTTP servisleri için istek tanımı
+    http_path: Optional[str] = Field(
+        default=None,
+        max_length=1024,
+        pattern=r"^/",
+        description="HTTP servisi için istek yolu (varsayılan: '/')",
+        example="/health"
+    )
+    http_method: Optional[HttpMethodEnum] = Field(
+        default=None,
+        description="HTTP metodu: GET, HEAD, POST veya OPTIONS (varsayılan: GET)",
+        example="GET"
+    )
+    http_expected_status: Optional[int] = Field(
+        default=None,
+        ge=100,
+        le=599,
+        description="Beklenen HTTP durum kodu. Boş ise 2xx/3xx başarılı sayılır",
+        example=200
+    )
+    http_body_match: Optional[str] = Field(
+        default=None,
+        max_length=1024,
+        description="Cevap gövdesinde aranacak metin (opsiyonel)",
+        example="\"status\":\"ok\""
+    )
+    http_tls: Optional[bool] = Field(
+        default=None,
+        description="HTTPS kullan. Boş ise port 443 için HTTPS, diğerleri için HTTP",
+        example=True
+    )
+    # DNS servisleri için sorgu tanımı
+    dns_query_name: Optional[str] = Field(
+        default=None,
+        max_length=255,
+        description="DNS servisi için sorgulanacak ad (boş ise kök için NS sorgusu)",
+        example="intranet.example.com"
+    )
+    dns_record_type: Optional[DnsRecordTypeEnum] = Field(
+        default=None,
+        description="Sorgulanacak kayıt tipi: A, AAAA, CNAME, MX, NS, PTR, SOA, SRV veya TXT (varsayılan: A)",
+        example="A"
+    )
+    dns_expected_answer: Optional[str] = Field(
+        default=None,
+        max_length=255,
+        description="Cevap kayıtları arasında bulunması gereken değer (adres, ad veya TXT metni). Boş ise NOERROR yeterlidir",
+        example="10.0.0.10"
+    )
 
 
 class ServiceUpdate(BaseModel):
@@ -210,7 +347,7 @@ class ServiceUpdate(BaseModel):
     )
     protocol: Optional[ProtocolEnum] = Field(
         default=None,
-        description="Yeni protokol tipi: TCP veya UDP",
+        description="Yeni protokol tipi: tcp, udp, ping, http veya dns",
         example="tcp"
     )
     port: Optional[int] = Field(
@@ -223,6 +360,64 @@ class ServiceUpdate(BaseModel):
         description="Global erişim durumu",
         example=False
     )
+    udp_payload_type: Optional[UdpPayloadTypeEnum] = Field(
+        default=None,
+        description="Yeni UDP sorgu şablonu",
+        example="ntp"
+    )
+    udp_payload: Optional[str] = Field(
+        default=None,
+        max_length=1024,
+        description="Yeni şablon parametresi",
+        example="public"
+    )
+    http_path: Optional[str] = Field(
+        default=None,
+        max_length=1024,
+        pattern=r"^/",
+        description="Yeni HTTP istek yolu",
+        example="/status"
+    )
+    http_method: Optional[HttpMethodEnum] = Field(
+        default=None,
+        description="Yeni HTTP metodu",
+        example="HEAD"
+    )
+    http_expected_status: Optional[int] = Field(
+        default=None,
+        ge=100,
+        le=599,
+        description="Yeni beklenen HTTP durum kodu",
+        example=204
+    )
+    http_body_match: Optional[str] = Field(
+        default=None,
+        max_length=1024,
+        description="Cevap gövdesinde aranacak yeni metin",
+        example="OK"
+    )
+    http_tls: Optional[bool] = Field(
+        default=None,
+        description="HTTPS kullan",
+        example=True
+    )
+    dns_query_name: Optional[str] = Field(
+        default=None,
+        max_length=255,
+        description="Yeni DNS sorgu adı",
+        example="www.example.com"
+    )
+    dns_record_type: Optional[DnsRecordTypeEnum] = Field(
+        default=None,
+        description="Yeni DNS kayıt tipi",
+        example="AAAA"
+    )
+    dns_expected_answer: Optional[str] = Field(
+        default=None,
+        max_length=255,
+        description="Yeni beklenen DNS cevabı",
+        example="2001:db8::10"
+    )
 
 
 class ServiceOut(BaseModel):
@@ -236,6 +431,16 @@ class ServiceOut(BaseModel):
     country: Optional[str] = Field(description="PING servisi ülke kodu")
     city: Optional[str] = Field(description="PING servisi şehir adı")
     ping_location: Optional[PingLocationOut] = Field(description="PING servisi lokasyon detayları")
+    udp_payload_type: Optional[UdpPayloadTypeEnum] = Field(description="UDP sorgu şablonu")
+    udp_payload: Optional[str] = Field(description="UDP şablon parametresi")
+    http_path: Optional[str] = Field(default=None, description="HTTP istek yolu")
+    http_method: Optional[HttpMethodEnum] = Field(default=None, description="HTTP metodu")
+    http_expected_status: Optional[int] = Field(default=None, description="Beklenen HTTP durum kodu")
+    http_body_match: Optional[str] = Field(default=None, description="Cevap gövdesinde aranan metin")
+    http_tls: bool = Field(default=False, description="HTTPS kullanılıyor mu")
+    dns_query_name: Optional[str] = Field(default=None, description="DNS sorgu adı")
+    dns_record_type: Optional[DnsRecordTypeEnum] = Field(default=None, description="DNS kayıt tipi")
+    dns_expected_answer: Optional[str] = Field(default=None, description="Beklenen DNS cevabı")
     created_at: datetime = Field(description="Servisin oluşturulma tarihi")
 
     class Config:
@@ -264,6 +469,37 @@ class MonitorCreate(BaseModel):
         description="İzlemenin aktif olup olmadığı",
         example=True
     )
+    backoff_enabled: bool = Field(
+        default=False,
+        description="Ardışık başarısızlıklardan sonra izleme aralığını üstel olarak artır",
+        example=True
+    )
+    backoff_after_failures: int = Field(
+        ge=1,
+        le=100,
+        default=3,
+        description="Backoff'un başlayacağı ardışık başarısızlık sayısı",
+        example=3
+    )
+    backoff_max_interval_seconds: int = Field(
+        ge=5,
+        le=86400,
+        default=3600,
+        description="Backoff sırasında ulaşılabilecek en büyük aralık (saniye)",
+        example=3600
+    )
+    confirm_interval_seconds: Optional[int] = Field(
+        default=None,
+        ge=5,
+        le=86400,
+        description="Durum değişikliğinden (up↔down) sonraki doğrulama kontrolü için kısa aralık (saniye). Boş ise kapalı",
+        example=10
+    )
+    adaptive_timeout_enabled: bool = Field(
+        default=False,
+        description="Timeout'u hedefin gözlenen gecikmesinden hesapla (EWMA + k·sapma, taban ile protokol timeout'u arasında)",
+        example=True
+    )
 
 
 class MonitorUpdate(BaseModel):
@@ -279,6 +515,37 @@ class MonitorUpdate(BaseModel):
         description="İzleme durumu",
         example=False
     )
+    backoff_enabled: Optional[bool] = Field(
+        default=None,
+        description="Backoff politikasını aç/kapat",
+        example=True
+    )
+    backoff_after_failures: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=100,
+        description="Backoff'un başlayacağı ardışık başarısızlık sayısı",
+        example=5
+    )
+    backoff_max_interval_seconds: Optional[int] = Field(
+        default=None,
+        ge=5,
+        le=86400,
+        description="Backoff sırasında ulaşılabilecek en büyük aralık (saniye)",
+        example=1800
+    )
+    confirm_interval_seconds: Optional[int] = Field(
+        default=None,
+        ge=0,
+        le=86400,
+        description="Durum değişikliği sonrası doğrulama aralığı (saniye). 0 gönderilirse kapatılır",
+        example=10
+    )
+    adaptive_timeout_enabled: Optional[bool] = Field(
+        default=None,
+        description="Adaptif timeout'u aç/kapat",
+        example=True
+    )
 
 
 class MonitorOut(BaseModel):
@@ -290,13 +557,29 @@ class MonitorOut(BaseModel):
     last_status: Optional[str] = Field(description="Son kontrol sonucu: 'up', 'down' veya null")
     last_error: Optional[str] = Field(description="Son hata mesajı (varsa)")
     last_latency_ms: Optional[float] = Field(description="Son yanıt süresi (milisaniye)")
+    last_resolve_ms: Optional[float] = Field(default=None, description="Son kontrolde DNS çözümleme süresi (milisaniye)")
+    last_connect_ms: Optional[float] = Field(default=None, description="Son kontrolde bağlantı kurma süresi (milisaniye, TCP)")
+    last_first_byte_ms: Optional[float] = Field(default=None, description="Son kontrolde ilk cevap byte'ına kadar geçen süre (milisaniye, cevap okuyan protokoller)")
+    last_total_ms: Optional[float] = Field(default=None, description="Son kontrolün toplam süresi (milisaniye)")
+    last_response_code: Optional[str] = Field(default=None, description="Son kontrolde sunucunun cevap kodu (HTTP durum kodu, DNS rcode)")
     last_checked_at: Optional[datetime] = Field(description="Son kontrol zamanı")
     next_run_at: Optional[datetime] = Field(description="Bir sonraki kontrol zamanı")
     consecutive_failures: int = Field(description="Ardışık başarısızlık sayısı")
     consecutive_successes: int = Field(description="Ardışık başarı sayısı")
     total_checks: int = Field(description="Toplam kontrol sayısı")
     total_failures: int = Field(description="Toplam başarısızlık sayısı")
-    uptime_percentage: Optional[float] = Field(description="Uptime yüzdesi (0-100)")
+    uptime_percentage: Optional[float] = Field(description="Monitor oluşturulduğundan beri uptime yüzdesi (0-100)")
+    uptime_1h_percentage: Optional[float] = Field(default=None, description="Son 1 saatteki uptime yüzdesi (0-100, pencerede kontrol yoksa null)")
+    uptime_24h_percentage: Optional[float] = Field(default=None, description="Son 24 saatteki uptime yüzdesi (0-100, pencerede kontrol yoksa null)")
+    uptime_7d_percentage: Optional[float] = Field(default=None, description="Son 7 gündeki uptime yüzdesi (0-100, pencerede kontrol yoksa null)")
+    backoff_enabled: bool = Field(description="Backoff politikası aktif mi")
+    backoff_after_failures: int = Field(description="Backoff'un başlayacağı ardışık başarısızlık sayısı")
+    backoff_max_interval_seconds: int = Field(description="Backoff sırasında en büyük aralık (saniye)")
+    confirm_interval_seconds: Optional[int] = Field(description="Durum değişikliği sonrası doğrulama aralığı (saniye)")
+    adaptive_timeout_enabled: bool = Field(description="Adaptif timeout aktif mi")
+    latency_ewma_ms: Optional[float] = Field(default=None, description="Gecikmenin üstel hareketli ortalaması (milisaniye)")
+    latency_dev_ms: Optional[float] = Field(default=None, description="Gecikmenin ortalama sapması (milisaniye)")
+    last_timeout_ms: Optional[float] = Field(default=None, description="Son kontrolde kullanılan timeout (milisaniye)")
     created_at: datetime = Field(description="Monitor'ün oluşturulma tarihi")
 
     class Config:
@@ -307,6 +590,93 @@ class CheckResult(BaseModel):
     status: str = Field(description="Kontrol sonucu: 'up' veya 'down'")
     latency_ms: Optional[float] = Field(description="Yanıt süresi (milisaniye)")
     error: Optional[str] = Field(description="Hata mesajı (varsa)")
+    resolve_ms: Optional[float] = Field(default=None, description="DNS çözümleme süresi (milisaniye)")
+    connect_ms: Optional[float] = Field(default=None, description="Bağlantı kurma süresi (milisaniye, TCP)")
+    first_byte_ms: Optional[float] = Field(default=None, description="İlk cevap byte'ına kadar geçen süre (milisaniye)")
+    total_ms: Optional[float] = Field(default=None, description="Kontrolün toplam süresi (milisaniye)")
+    timeout_ms: Optional[float] = Field(default=None, description="Kontrolde kullanılan timeout (milisaniye)")
+    response_code: Optional[str] = Field(default=None, description="Sunucunun cevap kodu (HTTP durum kodu, DNS rcode)")
+
+
+class HistoryResolutionEnum(str, Enum):
+    auto = "auto"
+    raw = "raw"
+    minute = "1m"
+    hour = "1h"
+    day = "1d"
+
+
+class ExportFormatEnum(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class ExportResolutionEnum(str, Enum):
+    raw = "raw"
+    minute = "1m"
+    hour = "1h"
+    day = "1d"
+
+
+class MonitorHistoryPoint(BaseModel):
+    time: datetime = Field(description="Kontrol zamanı veya özet kovasının başlangıcı")
+    check_count: int = Field(description="Kovadaki kontrol sayısı (ham kayıtta 1)")
+    failure_count: int = Field(description="Kovadaki başarısız kontrol sayısı")
+    latency_min_ms: Optional[float] = Field(default=None, description="En düşük gecikme (milisaniye, başarılı kontroller)")
+    latency_avg_ms: Optional[float] = Field(default=None, description="Ortalama gecikme (milisaniye)")
+    latency_max_ms: Optional[float] = Field(default=None, description="En yüksek gecikme (milisaniye)")
+    latency_p95_ms: Optional[float] = Field(default=None, description="95. yüzdelik gecikme (milisaniye; 1 saat ve 1 gün özetlerinde yaklaşık)")
+
+
+class MonitorHistoryOut(BaseModel):
+    monitor_id: int = Field(description="Monitor ID'si")
+    resolution: HistoryResolutionEnum = Field(description="Kullanılan çözünürlük: raw, 1m, 1h veya 1d")
+    start: datetime = Field(description="Aralık başlangıcı (UTC)")
+    end: datetime = Field(description="Aralık sonu (UTC)")
+    points: list[MonitorHistoryPoint] = Field(description="Zamana göre sıralı ölçüm noktaları")
+
+
+class LatencySummary(BaseModel):
+    count: int = Field(description="Son 60 saniyedeki ölçüm sayısı")
+    p50: Optional[float] = Field(description="Medyan (milisaniye, kova üst sınırı)")
+    p90: Optional[float] = Field(description="90. yüzdelik (milisaniye)")
+    p99: Optional[float] = Field(description="99. yüzdelik (milisaniye)")
+    max: Optional[float] = Field(description="En büyük değer (milisaniye)")
+
+
+class SchedulerMetricsOut(BaseModel):
+    instance_id: str = Field(description="Scheduler instance ID'si")
+    running: bool = Field(description="Scheduler çalışıyor mu")
+    mode: str = Field(description="Zamanlama modu: 'poll' veya 'heap'")
+    shards: list[int] = Field(description="Bu instance'ın sahip olduğu shard'lar")
+    shard_count: int = Field(description="Toplam shard sayısı")
+    uptime_seconds: float = Field(description="Scheduler çalışma süresi (saniye)")
+    concurrency: int = Field(description="Aynı anda çalışabilecek kontrol sayısı")
+    checks_total: int = Field(description="Başlangıçtan beri yapılan kontrol sayısı")
+    failures_total: int = Field(description="Başlangıçtan beri başarısız kontrol sayısı")
+    coalesced_total: int = Field(description="Başka bir probe'un sonucunu paylaşan kontrol sayısı")
+    host_batching: bool = Field(default=False, description="Aynı sunucunun monitor'leri tek grupta çalıştırılıyor mu")
+    host_batches_total: int = Field(default=0, description="Başlangıçtan beri çalıştırılan host grubu sayısı")
+    checks_per_second: float = Field(description="Son 60 saniyedeki kontrol/saniye")
+    backlog: Optional[int] = Field(description="Zamanı gelmiş ama henüz dağıtılmamış monitor sayısı")
+    queued_checks: int = Field(description="Worker bekleyen kontrol sayısı")
+    in_flight_checks: int = Field(description="Şu anda çalışan kontrol sayısı")
+    in_flight_probes: int = Field(description="Şu anda ağda olan probe sayısı")
+    pending_writes: int = Field(description="DB'ye yazılmayı bekleyen kayıt sayısı")
+    lag_ms: LatencySummary = Field(description="Planlanan zamandan kontrolün başlamasına kadar geçen süre")
+    probe_ms: LatencySummary = Field(description="Probe süresi")
+    flush_ms: LatencySummary = Field(description="Toplu DB yazma süresi")
+    alert_ms: LatencySummary = Field(description="Alert değerlendirme ve gönderme süresi")
+    rollup_ms: Optional[LatencySummary] = Field(default=None, description="Kontrol geçmişi özetleme işinin süresi")
+    rollup_rows_total: int = Field(default=0, description="Başlangıçtan beri yazılan özet satırı sayısı")
+    maintenance_ms: Optional[LatencySummary] = Field(default=None, description="Saklama/bakım turlarının süresi")
+    maintenance_rows_removed_total: Dict[str, int] = Field(default_factory=dict, description="Başlangıçtan beri saklama süresi dolduğu için silinen satırlar (hedef başına)")
+    maintenance_pages_freed_total: int = Field(default=0, description="Başlangıçtan beri dosyadan geri verilen SQLite sayfası")
+    maintenance_last_run_at: Optional[datetime] = Field(default=None, description="Son bakım turunun zamanı (bu instance bakım yapmıyorsa null)")
+    resolve_ms: LatencySummary = Field(description="DNS çözümleme süresi (yalnızca önbellekte olmayan sorgular)")
+    dns_cache_hits: int = Field(description="Önbellekten (veya devam eden sorgudan) karşılanan DNS çözümlemeleri")
+    dns_cache_misses: int = Field(description="Resolver'a giden DNS sorguları")
+    dns_cache_size: int = Field(description="Önbellekteki kayıt sayısı")
 
 
 # Alert Channel
@@ -406,6 +776,11 @@ class AlertRuleCreate(BaseModel):
         description="Uptime yüzde eşiği (alert_type: uptime_percentage için)",
         example=95.0
     )
+    uptime_window: Optional[UptimeWindowEnum] = Field(
+        default=None,
+        description="Uptime eşiğinin uygulandığı kayan pencere: 1h, 24h veya 7d (alert_type: uptime_percentage için, varsayılan 24h)",
+        example="24h"
+    )
     enabled: bool = Field(
         default=True,
         description="Alert kuralının aktif olup olmadığı",
@@ -450,6 +825,11 @@ class AlertRuleUpdate(BaseModel):
         description="Yeni uptime eşiği",
         example=90.0
     )
+    uptime_window: Optional[UptimeWindowEnum] = Field(
+        default=None,
+        description="Yeni uptime penceresi: 1h, 24h veya 7d",
+        example="7d"
+    )
     enabled: Optional[bool] = Field(
         default=None,
         description="Alert kuralı durumu",
@@ -473,6 +853,7 @@ class AlertRuleOut(BaseModel):
     consecutive_failures_threshold: Optional[int] = Field(description="Ardışık başarısızlık eşiği")
     latency_threshold_ms: Optional[float] = Field(description="Latency eşiği")
     uptime_threshold_percentage: Optional[float] = Field(description="Uptime eşiği")
+    uptime_window: Optional[UptimeWindowEnum] = Field(default=None, description="Uptime penceresi (null: 24h)")
     enabled: bool = Field(description="Kural durumu")
     cooldown_minutes: int = Field(description="Bekleme süresi (dakika)")
     last_triggered_at: Optional[datetime] = Field(description="Son tetiklenme zamanı")
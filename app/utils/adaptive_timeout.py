@@ -0,0 +1,26 @@
+import os
+from typing import Optional, Tuple
+
+
+# Jacobson/Karels (RFC 6298) katsayıları: ortalama için 1/8, sapma için 1/4
+ALPHA = 0.125
+BETA = 0.25
+
+# timeout = ewma + K * sapma; taban değer LAN hedeflerinde gereksiz down'ları önler
+K = float(os.getenv("PMON_ADAPTIVE_TIMEOUT_K", "4"))
+FLOOR_MS = float(os.getenv("PMON_ADAPTIVE_TIMEOUT_MIN_MS", "250"))
+
+
+def update_estimate(ewma_ms: Optional[float], dev_ms: Optional[float], sample_ms: float) -> Tuple[float, float]:
+    """Yeni gecikme örneğiyle (ewma, sapma) tahminini günceller"""
+    if ewma_ms is None or dev_ms is None:
+        return sample_ms, sample_ms / 2.0
+    dev_ms = (1 - BETA) * dev_ms + BETA * abs(ewma_ms - sample_ms)
+    ewma_ms = (1 - ALPHA) * ewma_ms + ALPHA * sample_ms
+    return ewma_ms, dev_ms
+
+
+def adaptive_timeout(ewma_ms: float, dev_ms: float, ceiling: float) -> float:
+    """Tahminden timeout (saniye) hesaplar; [FLOOR_MS, ceiling] aralığına sıkıştırılır"""
+    timeout_ms = ewma_ms + K * dev_ms
+    return min(ceiling, max(FLOOR_MS, timeout_ms) / 1000.0)
@@ -4,6 +4,7 @@ from typing import Dict, Any, Optional
 from datetime import datetime
 
 from .. import models
+from .uptime_windows import DEFAULT_WINDOW
 
 
 class AlertSender:
@@ -209,25 +210,37 @@ class AlertEvaluator:
                 "port": monitor.service.port,
                 "protocol": monitor.service.protocol.value,
                 "current_latency_ms": monitor.last_latency_ms,
-                "threshold_ms": rule.latency_threshold_ms
+                "threshold_ms": rule.latency_threshold_ms,
+                # Hangi aşamanın (DNS, bağlantı, ilk cevap) uzadığını görmek için
+                "timings": {
+                    "resolve_ms": monitor.last_resolve_ms,
+                    "connect_ms": monitor.last_connect_ms,
+                    "first_byte_ms": monitor.last_first_byte_ms,
+                    "total_ms": monitor.last_total_ms,
+                }
             }
             return message, details
         return None
     
     @staticmethod
     def _evaluate_uptime_percentage(monitor: models.Monitor, rule: models.AlertRule) -> Optional[tuple[str, dict]]:
-        """Uptime yüzdesi alert'ini değerlendirir"""
-        if not rule.uptime_threshold_percentage or not monitor.uptime_percentage:
+        """Uptime yüzdesi alert'ini kuralın penceresine (1h, 24h, 7d; varsayılan 24h) göre değerlendirir"""
+        if not rule.uptime_threshold_percentage:
+            return None
+        window = rule.uptime_window.value if rule.uptime_window else DEFAULT_WINDOW
+        uptime = getattr(monitor, f"uptime_{window}_percentage")
+        if uptime is None:
             return None
             
-        if monitor.uptime_percentage < rule.uptime_threshold_percentage:
-            message = f"📉 {monitor.server.name} ({monitor.server.host}:{monitor.service.port}) servisi uptime düşük! %{monitor.uptime_percentage:.1f}"
+        if uptime < rule.uptime_threshold_percentage:
+            message = f"📉 {monitor.server.name} ({monitor.server.host}:{monitor.service.port}) servisi uptime düşük! Son {window}: %{uptime:.1f}"
             details = {
                 "server": monitor.server.name,
                 "host": monitor.server.host,
                 "port": monitor.service.port,
                 "protocol": monitor.service.protocol.value,
-                "current_uptime_percentage": monitor.uptime_percentage,
+                "uptime_window": window,
+                "current_uptime_percentage": uptime,
                 "threshold_percentage": rule.uptime_threshold_percentage,
                 "total_checks": monitor.total_checks,
                 "total_failures": monitor.total_failures
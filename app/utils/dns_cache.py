@@ -0,0 +1,132 @@
+import asyncio
+import functools
+import ipaddress
+import os
+import socket
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .metrics import RollingHistogram
+
+
+class DnsCache:
+    """
+    Probe'ların paylaştığı hostname -> adres önbelleği.
+
+    - Başarılı sonuçlar `ttl`, başarısızlar `negative_ttl` saniye saklanır
+    - Aynı host için eşzamanlı sorgular tek getaddrinfo çağrısında birleştirilir (single-flight)
+    - En fazla `max_size` kayıt tutulur; en eski kullanılan kayıt düşürülür (LRU)
+    - getaddrinfo ayrı bir thread havuzunda çalışır; yavaş resolver diğer thread işlerini bekletmez
+    """
+
+    def __init__(self, ttl: float | None = None, negative_ttl: float | None = None, max_size: int | None = None) -> None:
+        self.ttl = ttl if ttl is not None else float(os.getenv("PMON_DNS_TTL", "60"))
+        self.negative_ttl = negative_ttl if negative_ttl is not None else float(os.getenv("PMON_DNS_NEGATIVE_TTL", "10"))
+        self.max_size = max_size or int(os.getenv("PMON_DNS_CACHE_SIZE", "10000"))
+        self._executor = ThreadPoolExecutor(max_workers=int(os.getenv("PMON_DNS_THREADS", "8")), thread_name_prefix="pmon-dns")
+        # key -> (expires_at, addresses, error_args); hata varsa addresses None'dır
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[float, Optional[List[str]], Optional[tuple]]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, int], asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        # Yalnızca gerçek getaddrinfo çağrılarının süresi (önbellekten dönenler hariç)
+        self.lookup_ms = RollingHistogram()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def resolve(self, host: str, family: int = socket.AF_UNSPEC) -> List[str]:
+        """Host'un adreslerini döndürür; çözümlenemezse socket.gaierror fırlatır"""
+        literal = _ip_literal(host)
+        if literal is not None:
+            if family != socket.AF_UNSPEC and literal.version != (4 if family == socket.AF_INET else 6):
+                raise socket.gaierror(socket.EAI_ADDRFAMILY, f"{host} istenen adres ailesinde değil")
+            return [str(literal)]
+
+        key = (host.strip().lower(), family)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if entry[1] is None:
+                raise socket.gaierror(*entry[2])
+            return entry[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            # Sorgu ayrı task'ta çalışır; bekleyenlerden biri iptal edilse de diğerleri sonucu alır
+            task = asyncio.get_running_loop().create_task(self._lookup(key))
+            self._inflight[key] = task
+            task.add_done_callback(functools.partial(self._lookup_done, key))
+        else:
+            self.hits += 1
+        return await asyncio.shield(task)
+
+    async def _lookup(self, key: Tuple[str, int]) -> List[str]:
+        host, family = key
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            infos = await loop.run_in_executor(self._executor, socket.getaddrinfo, host, None, family, socket.SOCK_STREAM)
+        except OSError as exc:
+            self._store(key, None, exc.args or (str(exc),), self.negative_ttl)
+            raise
+        finally:
+            self.lookup_ms.observe((time.perf_counter() - started) * 1000)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        self._store(key, addresses, None, self.ttl)
+        return addresses
+
+    def _lookup_done(self, key: Tuple[str, int], task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        # Bekleyenlerin hepsi iptal edildiyse "exception never retrieved" uyarısını önle
+        if not task.cancelled():
+            task.exception()
+
+    def close(self) -> None:
+        """Thread havuzunu durdurur; sıradaki çözümlemeler iptal edilir"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _store(self, key: Tuple[str, int], addresses: Optional[List[str]], error: Optional[tuple], ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, addresses, error)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+def _ip_literal(host: str) -> Optional[ipaddress.IPv4Address | ipaddress.IPv6Address]:
+    try:
+        return ipaddress.ip_address(host.strip().strip("[]"))
+    except ValueError:
+        return None
+
+
+_caches: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, DnsCache]" = weakref.WeakKeyDictionary()
+
+
+def get_dns_cache() -> DnsCache:
+    """Çalışan event loop'un DNS önbelleğini döndürür"""
+    loop = asyncio.get_running_loop()
+    cache = _caches.get(loop)
+    if cache is None:
+        cache = _caches[loop] = DnsCache()
+    return cache
+
+
+def close_dns_cache() -> None:
+    """Çalışan event loop'un DNS önbelleğini kapatır; sonraki çözümleme yeni bir önbellek oluşturur"""
+    cache = _caches.pop(asyncio.get_running_loop(), None)
+    if cache is not None:
+        cache.close()
+
+
+async def resolve_host(host: str, family: int = socket.AF_UNSPEC, timeout: float | None = None) -> List[str]:
+    """Host'un adreslerini önbellek üzerinden çözümler; süre probe'un timeout'unu aşamaz"""
+    resolving = get_dns_cache().resolve(host, family)
+    if timeout is None:
+        return await resolving
+    return await asyncio.wait_for(resolving, timeout)
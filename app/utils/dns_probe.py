@@ -0,0 +1,143 @@
+import ipaddress
+import struct
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+
+# Desteklenen kayıt tipleri (RFC 1035, 3596, 2782)
+RECORD_TYPES = {"A": 1, "NS": 2, "CNAME": 5, "SOA": 6, "PTR": 12, "MX": 15, "TXT": 16, "AAAA": 28, "SRV": 33}
+
+RCODES = {0: "NOERROR", 1: "FORMERR", 2: "SERVFAIL", 3: "NXDOMAIN", 4: "NOTIMP", 5: "REFUSED"}
+
+_HEADER = struct.Struct("!HHHHHH")
+_FLAG_TC = 0x0200
+_FLAG_RD = 0x0100
+
+
+class DnsResponse(NamedTuple):
+    query_id: int
+    rcode: str
+    truncated: bool
+    answers: List[str]
+
+
+def encode_name(name: str) -> bytes:
+    """Alan adını DNS etiket formatına çevirir ('.' veya boş: kök)"""
+    encoded = b""
+    for label in name.strip().rstrip(".").split("."):
+        if not label:
+            continue
+        raw = label.encode("idna")
+        if len(raw) > 63:
+            raise ValueError(f"DNS etiketi çok uzun: {label}")
+        encoded += bytes([len(raw)]) + raw
+    if len(encoded) > 254:
+        raise ValueError("DNS adı çok uzun")
+    return encoded + b"\x00"
+
+
+def build_query(query_id: int, name: str, record_type: str = "A") -> bytes:
+    """Özyinelemeli (RD) tek sorulu DNS sorgusu üretir"""
+    qtype = RECORD_TYPES.get(record_type.upper())
+    if qtype is None:
+        raise ValueError(f"Desteklenmeyen DNS kayıt tipi: {record_type}")
+    return _HEADER.pack(query_id, _FLAG_RD, 1, 0, 0, 0) + encode_name(name) + struct.pack("!HH", qtype, 1)
+
+
+def matches_query(query: bytes, data: bytes) -> bool:
+    """Cevap bu sorguya mı ait: aynı ID ve aynı soru bölümü"""
+    question = query[_HEADER.size:]
+    end = _HEADER.size + len(question)
+    return len(data) >= end and data[:2] == query[:2] and data[_HEADER.size:end].lower() == question.lower()
+
+
+def parse_response(data: bytes) -> DnsResponse:
+    """
+    Cevabın başlığını ve cevap kayıtlarını çözer; bozuk pakette ValueError fırlatır.
+    Kayıtlar metin olarak döner: A/AAAA adres, CNAME/NS/PTR ad, MX/SRV hedef ad, SOA birincil sunucu, TXT metin.
+    """
+    try:
+        query_id, flags, qdcount, ancount, _, _ = _HEADER.unpack_from(data)
+        offset = _HEADER.size
+        for _ in range(qdcount):
+            _, offset = _read_name(data, offset)
+            offset += 4
+        answers = []
+        for _ in range(ancount):
+            _, offset = _read_name(data, offset)
+            rtype, _, _, length = struct.unpack_from("!HHIH", data, offset)
+            offset += 10
+            if offset + length > len(data):
+                raise ValueError("Kayıt paketin dışına taşıyor")
+            value = _rdata_text(data, offset, rtype, length)
+            if value is not None:
+                answers.append(value)
+            offset += length
+    except (struct.error, IndexError):
+        raise ValueError("Eksik DNS cevabı") from None
+    return DnsResponse(query_id, RCODES.get(flags & 0x000F, f"RCODE{flags & 0x000F}"), bool(flags & _FLAG_TC), answers)
+
+
+def answer_matches(expected: str, answers: List[str]) -> bool:
+    """Beklenen cevap kayıtlardan biri mi (büyük/küçük harf ve sondaki nokta önemsiz, adresler normalize edilir)"""
+    wanted = _normalize(expected)
+    return any(_normalize(answer) == wanted for answer in answers)
+
+
+def dns_probe_options(service: Any) -> Dict[str, Any]:
+    """DNS servis tanımından check_dns'e geçilecek seçenekler; ad yoksa kök için NS sorulur"""
+    record_type = getattr(service.dns_record_type, "value", service.dns_record_type)
+    return {
+        "name": service.dns_query_name or ".",
+        "record_type": record_type or ("A" if service.dns_query_name else "NS"),
+        "expected_answer": service.dns_expected_answer,
+    }
+
+
+def _read_name(data: bytes, offset: int) -> Tuple[str, int]:
+    labels = []
+    end = None
+    for _ in range(128):  # sıkıştırma döngülerine karşı sınır
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            continue
+        offset += 1
+        if length == 0:
+            return ".".join(labels), end if end is not None else offset
+        labels.append(data[offset:offset + length].decode("ascii", "replace"))
+        offset += length
+    raise ValueError("Geçersiz DNS adı sıkıştırması")
+
+
+def _rdata_text(data: bytes, offset: int, rtype: int, length: int) -> Optional[str]:
+    try:
+        if rtype == 1 and length == 4:
+            return str(ipaddress.IPv4Address(data[offset:offset + 4]))
+        if rtype == 28 and length == 16:
+            return str(ipaddress.IPv6Address(data[offset:offset + 16]))
+        if rtype in (2, 5, 6, 12):
+            return _read_name(data, offset)[0]
+        if rtype == 15:
+            return _read_name(data, offset + 2)[0]
+        if rtype == 33:
+            return _read_name(data, offset + 6)[0]
+        if rtype == 16:
+            parts, position = [], offset
+            while position < offset + length:
+                size = data[position]
+                parts.append(data[position + 1:position + 1 + size].decode("utf-8", "replace"))
+                position += 1 + size
+            return "".join(parts)
+    except IndexError:
+        raise ValueError("Eksik DNS kaydı") from None
+    return None
+
+
+def _normalize(value: str) -> str:
+    value = value.strip().rstrip(".").lower()
+    try:
+        return str(ipaddress.ip_address(value))
+    except ValueError:
+        return value
@@ -0,0 +1,42 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+
+
+# Açıksa aynı sunucunun due monitor'leri aynı fazda planlanır ve tek grup olarak çalıştırılır
+ENABLED = os.getenv("PMON_HOST_BATCHING", "false").lower() == "true"
+
+# Bir hosta aynı anda açılan en fazla probe bağlantısı; çok portlu sunucular port taraması gibi görünmesin
+MAX_CONNECTIONS = max(1, int(os.getenv("PMON_HOST_MAX_CONNECTIONS", "4")))
+
+
+class HostLimiter:
+    """
+    Host başına eşzamanlı probe sınırı.
+    Semaforlar yalnızca o hosta bekleyen veya çalışan probe varken tutulur.
+    """
+
+    def __init__(self, limit: int = MAX_CONNECTIONS) -> None:
+        self.limit = limit
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._users: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._semaphores)
+
+    @asynccontextmanager
+    async def hold(self, host: str) -> AsyncIterator[None]:
+        key = host.strip().lower()
+        semaphore = self._semaphores.get(key)
+        if semaphore is None:
+            semaphore = self._semaphores[key] = asyncio.Semaphore(self.limit)
+        self._users[key] = self._users.get(key, 0) + 1
+        try:
+            async with semaphore:
+                yield
+        finally:
+            self._users[key] -= 1
+            if not self._users[key]:
+                del self._users[key]
+                del self._semaphores[key]
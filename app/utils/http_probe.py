@@ -0,0 +1,227 @@
+import asyncio
+import importlib.util
+import os
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Set, Tuple
+
+import httpcore
+import httpx
+
+from .dns_cache import resolve_host
+
+
+# HTTP/2 için `h2` paketi gerekir (httpx[http2]); yoksa yalnızca HTTP/1.1 keep-alive kullanılır
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class HttpOutcome(NamedTuple):
+    success: bool
+    error: Optional[str]
+    status_code: Optional[int]
+    elapsed_ms: Optional[float]
+    connect_ms: Optional[float]
+    first_byte_ms: Optional[float]
+
+
+class _Trace:
+    """httpcore trace olaylarından bağlantı ve ilk cevap sürelerini çıkarır"""
+    __slots__ = ("loop", "marks")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self.marks: Dict[str, float] = {}
+
+    async def __call__(self, event: str, info: Dict[str, Any]) -> None:
+        # "connection.connect_tcp.started", "http11.receive_response_headers.complete" ...
+        _, _, name = event.partition(".")
+        self.marks.setdefault(name, self.loop.time())
+
+    def span(self, start: str, *ends: str) -> Optional[float]:
+        if start not in self.marks:
+            return None
+        for end in ends:
+            if end in self.marks:
+                return (self.marks[end] - self.marks[start]) * 1000.0
+        return None
+
+
+class _CachedDnsBackend(httpcore.AsyncNetworkBackend):
+    """
+    Bağlantıları ortak DNS önbelleğinin çözdüğü adrese açar (httpcore'un kendi getaddrinfo'su yerine).
+    URL'deki ad değişmediği için Host başlığı ve TLS SNI hostname olarak kalır.
+    """
+
+    def __init__(self) -> None:
+        self._backend = httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host: str, port: int, timeout: Optional[float] = None, local_address: Optional[str] = None,
+                          socket_options: Optional[Iterable[Any]] = None) -> httpcore.AsyncNetworkStream:
+        try:
+            addresses = await resolve_host(host)
+        except OSError as exc:
+            raise httpcore.ConnectError(f"DNS çözümleme hatası: {exc}") from exc
+        return await self._backend.connect_tcp(addresses[0], port, timeout, local_address, socket_options)
+
+    async def connect_unix_socket(self, path: str, timeout: Optional[float] = None,
+                                  socket_options: Optional[Iterable[Any]] = None) -> httpcore.AsyncNetworkStream:
+        return await self._backend.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+class _CachedDnsTransport(httpx.AsyncHTTPTransport):
+    """httpx'in transport'u; havuz _CachedDnsBackend ile kurulur (httpx 0.27 network_backend parametresi sunmaz)"""
+
+    def __init__(self, ssl_context: Any, http2: bool, limits: httpx.Limits, backend: httpcore.AsyncNetworkBackend) -> None:
+        super().__init__(verify=ssl_context, http2=http2, limits=limits, trust_env=False)
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=ssl_context,
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http2=http2,
+            network_backend=backend,
+        )
+
+
+class HttpEngine:
+    """
+    HTTP(S) probe'larını origin (scheme, host, port) başına bağlantı havuzlu `httpx.AsyncClient` ile yapar.
+
+    Aynı hosta yapılan tekrar kontroller açık bağlantıyı (keep-alive, mümkünse HTTP/2) yeniden
+    kullanır; her aralıkta TCP+TLS el sıkışması yapılmaz. Bağlantı yeniden kullanıldığında
+    connect_ms boş kalır. Yeni bağlantılar DNS önbelleğinin adresine açılır (_CachedDnsBackend);
+    check_http adı az önce çözdüğü için connect_ms ve gecikme ikinci bir DNS sorgusu içermez. httpcore her istekte havuzdaki tüm bağlantıları taradığı için tek bir
+    ortak havuz hedef sayısıyla yavaşlar; havuzlar origin başına küçük tutulur, TLS context'i ortaktır.
+    """
+
+    def __init__(self) -> None:
+        # Varsayılan izleme aralığından (60 sn) uzun olmalı ki bağlantı iki kontrol arasında kapanmasın
+        self.keepalive_expiry = float(os.getenv("PMON_HTTP_KEEPALIVE_SECONDS", "120"))
+        self.max_connections_per_host = int(os.getenv("PMON_HTTP_MAX_CONNECTIONS_PER_HOST", "4"))
+        self.max_body = int(os.getenv("PMON_HTTP_MAX_BODY", "65536"))
+        self._limits = httpx.Limits(
+            max_connections=self.max_connections_per_host,
+            max_keepalive_connections=self.max_connections_per_host,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        self._ssl_context = httpx.create_ssl_context()
+        self._backend = _CachedDnsBackend()
+        # origin -> (client, bağlantı sınırı, son kullanım); en eski kullanılan başta.
+        # İstekler httpcore'un havuz kuyruğu (her olayda tüm kuyruğu tarar) yerine semaforda bekler
+        self._clients: "OrderedDict[str, Tuple[httpx.AsyncClient, asyncio.Semaphore, float]]" = OrderedDict()
+        self._closing: Set[asyncio.Task] = set()
+
+    def _client(self, origin: str) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        entry = self._clients.pop(origin, None)
+        if entry is None:
+            # Proxy ortam değişkenleri ölçümü bozmasın; yönlendirmeler takip edilmez (3xx de bir cevaptır)
+            transport = _CachedDnsTransport(self._ssl_context, HTTP2_AVAILABLE, self._limits, self._backend)
+            client = httpx.AsyncClient(base_url=origin, transport=transport, trust_env=False, follow_redirects=False)
+            limit = asyncio.Semaphore(self.max_connections_per_host)
+        else:
+            client, limit, _ = entry
+        self._clients[origin] = (client, limit, now)
+        # Keep-alive süresi boyunca kullanılmayan origin'lerin bağlantıları zaten kapanmıştır; istemciyi bırak
+        while self._clients:
+            oldest, (idle_client, idle_limit, used_at) = next(iter(self._clients.items()))
+            if now - used_at < self.keepalive_expiry or idle_limit.locked():
+                break
+            del self._clients[oldest]
+            task = loop.create_task(idle_client.aclose())
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+        return client, limit
+
+    async def probe(self, origin: str, path: str, method: str, expected_status: Optional[int], body_match: Optional[str]) -> HttpOutcome:
+        """
+        İsteği gönderir; `expected_status` yoksa 2xx/3xx başarılı sayılır.
+        `body_match` verilmişse cevabın ilk PMON_HTTP_MAX_BODY byte'ında aranır.
+        """
+        loop = asyncio.get_running_loop()
+        trace = _Trace(loop)
+        client, limit = self._client(origin)
+        async with limit:
+            # Gecikme sırada bekleme süresini içermez
+            start = loop.time()
+            try:
+                async with client.stream(method, path, extensions={"trace": trace}) as response:
+                    body_found = await self._read(response, body_match.encode() if body_match else None)
+            except httpx.HTTPError as exc:
+                error = f"{type(exc).__name__}: {exc}" if str(exc) else type(exc).__name__
+                return HttpOutcome(False, error, None, None, *self._spans(trace))
+            elapsed_ms = (loop.time() - start) * 1000.0
+        status = response.status_code
+        if expected_status is not None and status != expected_status:
+            error = f"Beklenmeyen HTTP durum kodu: {status} (beklenen {expected_status})"
+        elif expected_status is None and status >= 400:
+            error = f"HTTP {status}"
+        elif not body_found:
+            error = "Cevap gövdesinde beklenen içerik bulunamadı"
+        else:
+            error = None
+        return HttpOutcome(error is None, error, status, elapsed_ms, *self._spans(trace))
+
+    async def _read(self, response: httpx.Response, needle: Optional[bytes]) -> bool:
+        """
+        Gövdeyi en fazla max_body byte okur ve `needle` arar (yoksa True döner).
+        Gövde sonuna kadar okunursa bağlantı havuza geri döner; yarıda bırakılırsa kapatılır.
+        """
+        found = needle is None
+        seen = 0
+        tail = b""
+        async for chunk in response.aiter_bytes():
+            if not found:
+                # Parça sınırına denk gelen eşleşmeler için önceki parçanın sonu saklanır
+                window = tail + chunk
+                found = needle in window
+                tail = window[-len(needle):]
+            seen += len(chunk)
+            if seen >= self.max_body:
+                break
+        return found
+
+    @staticmethod
+    def _spans(trace: _Trace) -> tuple:
+        connect_ms = trace.span("connect_tcp.started", "start_tls.complete", "connect_tcp.complete")
+        first_byte_ms = trace.span("send_request_headers.started", "receive_response_headers.complete")
+        return connect_ms, first_byte_ms
+
+    async def close(self) -> None:
+        clients, self._clients = self._clients, OrderedDict()
+        for client, _, _ in clients.values():
+            await client.aclose()
+
+
+_engines: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, HttpEngine]" = weakref.WeakKeyDictionary()
+
+
+def get_http_engine() -> HttpEngine:
+    """Çalışan event loop'un HTTP motorunu döndürür"""
+    loop = asyncio.get_running_loop()
+    engine = _engines.get(loop)
+    if engine is None:
+        engine = _engines[loop] = HttpEngine()
+    return engine
+
+
+def http_origin(host: str, port: int, tls: bool) -> str:
+    if ":" in host and not host.startswith("["):
+        host = f"[{host}]"
+    return f"{'https' if tls else 'http'}://{host}:{port}"
+
+
+def http_probe_options(service: Any) -> Dict[str, Any]:
+    """HTTP servis tanımından check_http'ye geçilecek seçenekler"""
+    method = service.http_method
+    return {
+        "path": service.http_path or "/",
+        "method": getattr(method, "value", method) or "GET",
+        "expected_status": service.http_expected_status,
+        "body_match": service.http_body_match,
+        "tls": bool(service.http_tls),
+    }
@@ -0,0 +1,199 @@
+import asyncio
+import random
+import socket
+import struct
+import weakref
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+ICMP_ECHO_REPLY = 0
+ICMP_DEST_UNREACH = 3
+ICMP_ECHO_REQUEST = 8
+ICMP_TIME_EXCEEDED = 11
+
+
+class PingStats(NamedTuple):
+    """Bir hedefe gönderilen echo isteklerinin özeti"""
+    address: str
+    sent: int
+    received: int
+    min_ms: Optional[float]
+    avg_ms: Optional[float]
+    max_ms: Optional[float]
+    error: Optional[str]
+
+    @property
+    def loss_percentage(self) -> float:
+        return 100.0 * (self.sent - self.received) / self.sent if self.sent else 100.0
+
+
+def _checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+class IcmpEngine:
+    """
+    Tek ICMP soketi üzerinden binlerce eşzamanlı echo isteğini çoklar.
+
+    Önce Linux'un yetkisiz ICMP soketi (SOCK_DGRAM, net.ipv4.ping_group_range) denenir,
+    olmazsa raw soket açılır. İstekler sequence numarasıyla (raw sokette ayrıca identifier ile)
+    eşleştirilir; her event loop'un kendi motoru vardır.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Motor loop'a göre WeakKeyDictionary'de tutulur; güçlü referans loop'un (ve motorun) hiç toplanmamasına yol açardı
+        self._loop_ref = weakref.ref(loop)
+        self._sock, self.raw = self._open_socket()
+        # DGRAM sokette identifier'ı kernel atar; raw sokette başka süreçlerin cevaplarını ayırmak için kullanılır
+        self._ident = random.randrange(1, 0x10000)
+        self._seq = random.randrange(0x10000)
+        self._payload = b"pmon".ljust(16, b"\x00")
+        self._waiters: Dict[int, Tuple[str, asyncio.Future]] = {}
+        loop.add_reader(self._sock.fileno(), self._on_readable)
+
+    @property
+    def _loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop_ref()
+
+    @staticmethod
+    def _open_socket() -> Tuple[socket.socket, bool]:
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+            raw = False
+        except OSError:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+            raw = True
+        # Aynı anda çok sayıda cevap gelebilir; küçük alım tamponu paket kaybına yol açar
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        except OSError:
+            pass
+        sock.setblocking(False)
+        return sock, raw
+
+    def close(self) -> None:
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.remove_reader(self._sock.fileno())
+            except (OSError, ValueError):
+                pass
+        self._sock.close()
+        for _, future in self._waiters.values():
+            if not future.done():
+                future.cancel()
+        self._waiters.clear()
+
+    async def ping(self, address: str, count: int = 3, timeout: float = 2.0, interval: float = 0.2) -> PingStats:
+        """IPv4 adresine `count` echo isteği gönderir; her isteğin cevabı `timeout` saniye beklenir"""
+        echoes: List[asyncio.Task] = []
+        for i in range(count):
+            if i:
+                await asyncio.sleep(interval)
+            echoes.append(asyncio.ensure_future(self._echo(address, timeout)))
+        results = await asyncio.gather(*echoes, return_exceptions=True)
+        rtts = [r for r in results if isinstance(r, float)]
+        errors = [r for r in results if isinstance(r, BaseException)]
+        error = None
+        if not rtts:
+            error = str(errors[0]) if errors and str(errors[0]) else "Ping timeout"
+        return PingStats(
+            address=address,
+            sent=count,
+            received=len(rtts),
+            min_ms=min(rtts) if rtts else None,
+            avg_ms=sum(rtts) / len(rtts) if rtts else None,
+            max_ms=max(rtts) if rtts else None,
+            error=error,
+        )
+
+    async def _echo(self, address: str, timeout: float) -> float:
+        seq = self._next_seq()
+        future = self._loop.create_future()
+        self._waiters[seq] = (address, future)
+        try:
+            header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, self._ident, seq)
+            checksum = _checksum(header + self._payload)
+            packet = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, checksum, self._ident, seq) + self._payload
+            sent_at = self._loop.time()
+            await self._loop.sock_sendto(self._sock, packet, (address, 0))
+            received_at = await asyncio.wait_for(future, timeout=timeout)
+            return (received_at - sent_at) * 1000.0
+        except asyncio.TimeoutError:
+            raise TimeoutError("Ping timeout") from None
+        finally:
+            self._waiters.pop(seq, None)
+
+    def _next_seq(self) -> int:
+        for _ in range(0x10000):
+            self._seq = (self._seq + 1) & 0xFFFF
+            if self._seq not in self._waiters:
+                return self._seq
+        raise RuntimeError("Bekleyen ICMP isteği sınırına ulaşıldı")
+
+    def _on_readable(self) -> None:
+        while True:
+            try:
+                data, (source, _) = self._sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                # DGRAM sokette bekleyen ICMP hataları recvfrom'da istisna olarak gelir
+                continue
+            if self.raw:
+                # Raw soket IP header'ını da döndürür
+                data = data[(data[0] & 0x0F) * 4:]
+            if len(data) < 8:
+                continue
+            icmp_type, _, _, ident, seq = struct.unpack("!BBHHH", data[:8])
+            if icmp_type == ICMP_ECHO_REPLY:
+                if not self.raw or ident == self._ident:
+                    self._resolve(seq, source, None)
+            elif self.raw and icmp_type in (ICMP_DEST_UNREACH, ICMP_TIME_EXCEEDED):
+                # Hata mesajı, orijinal IP header'ı + echo isteğimizin ilk 8 byte'ını taşır
+                inner = data[8:]
+                if len(inner) < 20:
+                    continue
+                original = inner[(inner[0] & 0x0F) * 4:]
+                if len(original) < 8:
+                    continue
+                inner_type, _, _, ident, seq = struct.unpack("!BBHHH", original[:8])
+                if inner_type == ICMP_ECHO_REQUEST and ident == self._ident:
+                    reason = "Destination unreachable" if icmp_type == ICMP_DEST_UNREACH else "TTL exceeded"
+                    self._resolve(seq, socket.inet_ntoa(inner[16:20]), f"{reason} ({source})")
+
+    def _resolve(self, seq: int, address: str, error: Optional[str]) -> None:
+        waiter = self._waiters.get(seq)
+        if waiter is None or waiter[0] != address or waiter[1].done():
+            return
+        if error is None:
+            waiter[1].set_result(self._loop.time())
+        else:
+            waiter[1].set_exception(OSError(error))
+
+
+_engines: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, IcmpEngine]" = weakref.WeakKeyDictionary()
+_unavailable: Optional[str] = None
+
+
+def get_icmp_engine() -> Optional[IcmpEngine]:
+    """Çalışan event loop'un ICMP motorunu döndürür; soket açılamıyorsa None"""
+    global _unavailable
+    if _unavailable is not None:
+        return None
+    loop = asyncio.get_running_loop()
+    engine = _engines.get(loop)
+    if engine is None:
+        try:
+            engine = IcmpEngine(loop)
+        except OSError as exc:
+            _unavailable = str(exc)
+            print(f"Native ICMP kullanılamıyor, ping komutuna dönülüyor: {exc}")
+            return None
+        _engines[loop] = engine
+    return engine
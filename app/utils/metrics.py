@@ -0,0 +1,135 @@
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+
+# Histogram kova üst sınırları (milisaniye); son kova taşanları toplar
+BUCKET_BOUNDS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000]
+
+
+class _Slot:
+    __slots__ = ("index", "counts", "count", "max")
+
+    def __init__(self, index: int, buckets: int) -> None:
+        self.index = index
+        self.counts = [0] * buckets
+        self.count = 0
+        self.max = 0.0
+
+
+class RollingHistogram:
+    """
+    Son `window` saniyenin değerlerini sabit kovalarda tutan histogram.
+    Pencere `slots` dilime bölünür; eski dilimler düşürülür, gözlem O(1)'dir.
+    """
+
+    def __init__(self, window: float = 60.0, slots: int = 6) -> None:
+        self.slot_seconds = window / slots
+        self.slots = slots
+        self._slots: Deque[_Slot] = deque()
+        self.total_count = 0
+        self.total_sum = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        slot = self._current()
+        i = 0
+        while i < len(BUCKET_BOUNDS_MS) and value_ms > BUCKET_BOUNDS_MS[i]:
+            i += 1
+        slot.counts[i] += 1
+        slot.count += 1
+        if value_ms > slot.max:
+            slot.max = value_ms
+        self.total_count += 1
+        self.total_sum += value_ms
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        self._expire(int(time.monotonic() // self.slot_seconds))
+        counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        count = 0
+        max_value = 0.0
+        for slot in self._slots:
+            count += slot.count
+            max_value = max(max_value, slot.max)
+            for i, c in enumerate(slot.counts):
+                counts[i] += c
+        return {
+            "count": count,
+            "p50": self._percentile(counts, count, 0.50, max_value),
+            "p90": self._percentile(counts, count, 0.90, max_value),
+            "p99": self._percentile(counts, count, 0.99, max_value),
+            "max": round(max_value, 2) if count else None,
+        }
+
+    @staticmethod
+    def _percentile(counts: List[int], count: int, q: float, max_value: float) -> Optional[float]:
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for i, c in enumerate(counts):
+            seen += c
+            if seen >= rank:
+                # Kova üst sınırı (gözlenen en büyük değeri aşmadan)
+                value = min(BUCKET_BOUNDS_MS[i], max_value) if i < len(BUCKET_BOUNDS_MS) else max_value
+                return round(value, 2)
+        return round(max_value, 2)
+
+    def _current(self) -> _Slot:
+        index = int(time.monotonic() // self.slot_seconds)
+        if not self._slots or self._slots[-1].index != index:
+            self._slots.append(_Slot(index, len(BUCKET_BOUNDS_MS) + 1))
+            self._expire(index)
+        return self._slots[-1]
+
+    def _expire(self, index: int) -> None:
+        while self._slots and index - self._slots[0].index >= self.slots:
+            self._slots.popleft()
+
+
+class RollingCounter:
+    """Toplam sayaç + son `window` saniyedeki saniye başına oran"""
+
+    def __init__(self, window: float = 60.0, slots: int = 12) -> None:
+        self.window = window
+        self.slot_seconds = window / slots
+        self.slots = slots
+        self._slots: Deque[List[int]] = deque()  # [index, count]
+        self._started = time.monotonic()
+        self.total = 0
+
+    def add(self, n: int = 1) -> None:
+        index = int(time.monotonic() // self.slot_seconds)
+        if not self._slots or self._slots[-1][0] != index:
+            self._slots.append([index, 0])
+            while index - self._slots[0][0] >= self.slots:
+                self._slots.popleft()
+        self._slots[-1][1] += n
+        self.total += n
+
+    def rate(self) -> float:
+        now = time.monotonic()
+        index = int(now // self.slot_seconds)
+        recent = sum(count for slot_index, count in self._slots if index - slot_index < self.slots)
+        elapsed = min(self.window, now - self._started)
+        return recent / elapsed if elapsed > 0 else 0.0
+
+
+class SchedulerMetrics:
+    """Scheduler'ın yetişip yetişemediğini gösteren bellek içi sayaç ve histogramlar"""
+
+    def __init__(self) -> None:
+        self.started_at = time.monotonic()
+        self.checks = RollingCounter()
+        self.failures = RollingCounter()
+        # next_run_at ile kontrolün gerçekten başladığı an arasındaki gecikme
+        self.lag = RollingHistogram()
+        self.probe = RollingHistogram()
+        self.flush = RollingHistogram()
+        self.alert = RollingHistogram()
+
+    def record_check(self, success: bool, lag_ms: float, probe_ms: float) -> None:
+        self.checks.add()
+        if not success:
+            self.failures.add()
+        self.lag.observe(max(0.0, lag_ms))
+        self.probe.observe(probe_ms)
@@ -1,26 +1,98 @@
 import asyncio
+import math
+import os
+import random
+import socket
+import struct
 import subprocess
 import platform
-from typing import Tuple
+from typing import NamedTuple, Optional
 
+from .icmp import get_icmp_engine
+from .dns_cache import resolve_host
+from .udp_engine import get_udp_engine
+from .udp_payloads import build_payload
+from .http_probe import get_http_engine, http_origin
+from .dns_probe import answer_matches, build_query, matches_query, parse_response
 
-async def check_tcp(host: str, port: int, timeout: float = 3.0) -> Tuple[bool, float | None, str | None]:
-    start = asyncio.get_event_loop().time()
+
+class ProbeTimings(NamedTuple):
+    """Kontrolün aşama süreleri (ms); protokolde olmayan aşamalar None kalır"""
+    resolve_ms: Optional[float] = None
+    connect_ms: Optional[float] = None
+    first_byte_ms: Optional[float] = None
+    total_ms: Optional[float] = None
+
+
+class ProbeResult(NamedTuple):
+    """
+    Tek bir kontrolün sonucu; latency_ms protokolün ana ölçümüdür (TCP: connect, UDP/DNS: cevap, PING: ortalama RTT).
+    response_code cevap veren protokollerde sunucunun kodudur (HTTP durum kodu, DNS rcode).
+    """
+    success: bool
+    latency_ms: Optional[float] = None
+    error: Optional[str] = None
+    timings: ProbeTimings = ProbeTimings()
+    timeout_ms: Optional[float] = None
+    response_code: Optional[str] = None
+
+
+def _ms(start: float, end: float) -> float:
+    return (end - start) * 1000.0
+
+
+def _dns_error(host: str, exc: Exception) -> str:
+    # DNS sorunları servisin kendisine yüklenmesin diye ayrı mesajla raporlanır
+    return f"DNS çözümleme hatası ({host}): {exc or 'timeout'}"
+
+
+# close() sırasında FIN yerine RST gönderilir; binlerce kontrol TIME_WAIT soketi biriktirmez
+_LINGER_RESET = struct.pack("ii", 1, 0)
+
+
+async def _tcp_connect(address: str, port: int) -> None:
+    """Stream/transport oluşturmadan yalnızca non-blocking connect yapar ve soketi hemen kapatır"""
+    loop = asyncio.get_running_loop()
+    sock = socket.socket(socket.AF_INET6 if ":" in address else socket.AF_INET, socket.SOCK_STREAM)
     try:
-        conn = asyncio.open_connection(host, port)
-        reader, writer = await asyncio.wait_for(conn, timeout=timeout)
-        writer.close()
+        sock.setblocking(False)
+        await loop.sock_connect(sock, (address, port))
+    finally:
         try:
-            await writer.wait_closed()
-        except Exception:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_RESET)
+        except OSError:
             pass
-        latency_ms = (asyncio.get_event_loop().time() - start) * 1000.0
-        return True, latency_ms, None
+        sock.close()
+
+
+async def check_tcp(host: str, port: int, timeout: float = 3.0) -> ProbeResult:
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    try:
+        addresses = await resolve_host(host, timeout=timeout)
+    except (OSError, asyncio.TimeoutError) as exc:
+        return ProbeResult(False, None, _dns_error(host, exc), ProbeTimings(total_ms=_ms(started, loop.time())))
+    # Gecikme yalnızca bağlantı süresidir; çözümleme süresi resolve_ms olarak ayrıca raporlanır
+    start = loop.time()
+    resolve_ms = _ms(started, start)
+    try:
+        for index, address in enumerate(addresses):
+            remaining = timeout - (loop.time() - start)
+            try:
+                await asyncio.wait_for(_tcp_connect(address, port), timeout=remaining)
+                break
+            except OSError:
+                # Sıradaki adresi dene (ör. IPv6 yönlendirmesi olmayan dual-stack host)
+                if index == len(addresses) - 1:
+                    raise
+        end = loop.time()
+        latency_ms = _ms(start, end)
+        return ProbeResult(True, latency_ms, None, ProbeTimings(resolve_ms, latency_ms, None, _ms(started, end)))
     except Exception as exc:
-        return False, None, str(exc)
+        return ProbeResult(False, None, str(exc), ProbeTimings(resolve_ms=resolve_ms, total_ms=_ms(started, loop.time())))
 
 
-async def check_ping(host: str, timeout: float = 5.0, count: int = 3) -> Tuple[bool, float | None, str | None]:
+async def check_ping(host: str, timeout: float = 5.0, count: int = 3) -> ProbeResult:
     """
     PING kontrolü yapar
     
@@ -30,8 +102,32 @@ async def check_ping(host: str, timeout: float = 5.0, count: int = 3) -> Tuple[b
         count: Ping sayısı
         
     Returns:
-        (success, latency_ms, error_message)
+        ProbeResult (latency_ms: ortalama RTT)
     """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    # Varsayılan: süreç içi ICMP motoru; soket açılamazsa veya IPv4 adresi yoksa ping komutu
+    if os.getenv("PMON_PING_ENGINE", "native").lower() == "native":
+        engine = get_icmp_engine()
+        if engine is not None:
+            try:
+                addresses = await resolve_host(host, family=socket.AF_INET, timeout=timeout)
+            except socket.gaierror:
+                addresses = None
+            except asyncio.TimeoutError as exc:
+                return ProbeResult(False, None, _dns_error(host, exc), ProbeTimings(total_ms=_ms(started, loop.time())))
+            if addresses:
+                resolve_ms = _ms(started, loop.time())
+                stats = await engine.ping(addresses[0], count=count, timeout=timeout)
+                timings = ProbeTimings(resolve_ms=resolve_ms, total_ms=_ms(started, loop.time()))
+                if stats.received:
+                    return ProbeResult(True, stats.avg_ms, None, timings)
+                return ProbeResult(False, None, stats.error, timings)
+    return await _check_ping_subprocess(host, timeout, count)
+
+
+async def _check_ping_subprocess(host: str, timeout: float, count: int) -> ProbeResult:
+    """`ping` komutunu çalıştırıp çıktısından ortalama süreyi okur; çözümleme komutun içinde kaldığından yalnızca toplam süre ölçülür"""
     start = asyncio.get_event_loop().time()
     
     try:
@@ -39,7 +135,8 @@ async def check_ping(host: str, timeout: float = 5.0, count: int = 3) -> Tuple[b
         if platform.system().lower() == "windows":
             cmd = ["ping", "-n", str(count), "-w", str(int(timeout * 1000)), host]
         else:
-            cmd = ["ping", "-c", str(count), "-W", str(int(timeout)), host]
+            # -W tam saniye ister; adaptif timeout'lar 1 saniyenin altında olabilir, aşağı yuvarlamak 0 (veya kısa) bekleme verir
+            cmd = ["ping", "-c", str(count), "-W", str(max(1, math.ceil(timeout))), host]
         
         # Ping komutunu çalıştır
         process = await asyncio.create_subprocess_exec(
@@ -49,12 +146,13 @@ async def check_ping(host: str, timeout: float = 5.0, count: int = 3) -> Tuple[b
         )
         
         stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout + 2)
+        timings = ProbeTimings(total_ms=_ms(start, asyncio.get_event_loop().time()))
         
         if process.returncode == 0:
-            # Ping başarılı, latency hesapla
-            latency_ms = (asyncio.get_event_loop().time() - start) * 1000.0
+            # Süreç başlatma maliyeti RTT sayılmasın; ortalama okunamazsa latency boş kalır (süre total_ms'te)
+            latency_ms = None
             
-            # Ping çıktısından ortalama latency'yi çıkar (opsiyonel)
+            # Ping çıktısından ortalama latency'yi çıkar
             try:
                 output = stdout.decode('utf-8', errors='ignore')
                 if platform.system().lower() == "windows":
@@ -70,50 +168,109 @@ async def check_ping(host: str, timeout: float = 5.0, count: int = 3) -> Tuple[b
                         avg_ms = float(avg_line.split("avg")[1].split("/")[1])
                         latency_ms = avg_ms
             except:
-                pass  # Latency hesaplanamazsa varsayılan değer kullan
+                pass  # Latency hesaplanamazsa boş bırak
             
-            return True, latency_ms, None
+            return ProbeResult(True, latency_ms, None, timings)
         else:
             error_msg = stderr.decode('utf-8', errors='ignore') if stderr else "Ping failed"
-            return False, None, error_msg
+            return ProbeResult(False, None, error_msg, timings)
             
     except asyncio.TimeoutError:
-        return False, None, "Ping timeout"
+        return ProbeResult(False, None, "Ping timeout", ProbeTimings(total_ms=_ms(start, asyncio.get_event_loop().time())))
     except Exception as exc:
-        return False, None, str(exc)
+        return ProbeResult(False, None, str(exc))
 
 
-async def check_port(host: str, port: int, protocol: str, timeout: float = 3.0) -> Tuple[bool, float | None, str | None]:
+async def check_udp(host: str, port: int, timeout: float = 1.0, payload_type: str | None = None, payload: str | None = None) -> ProbeResult:
     """
-    Port kontrolü yapar (TCP/UDP/PING)
-    
-    Args:
-        host: Kontrol edilecek host
-        port: Port numarası (PING için kullanılmaz)
-        protocol: Protokol (tcp, udp, ping)
-        timeout: Timeout süresi
-        
-    Returns:
-        (success, latency_ms, error_message)
+    UDP kontrolü yapar; datagram ortak soket havuzundan gönderilir.
+
+    Payload şablonu (dns/ntp/snmp/hex) verilmişse cevap beklenir, gelmezse down sayılır.
+    Şablon yoksa yalnızca ICMP port-unreachable down sayılır; sessiz port açık|filtreli kabul edilir.
+    Cevap geldiyse süresi first_byte_ms olarak da raporlanır.
+    """
+    try:
+        data = build_payload(payload_type, payload)
+    except ValueError as exc:
+        return ProbeResult(False, None, str(exc))
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    try:
+        addresses = await resolve_host(host, timeout=timeout)
+    except (OSError, asyncio.TimeoutError) as exc:
+        return ProbeResult(False, None, _dns_error(host, exc), ProbeTimings(total_ms=_ms(started, loop.time())))
+    resolve_ms = _ms(started, loop.time())
+    success, latency_ms, error = await get_udp_engine().probe(addresses[0], port, data, timeout, expect_response=payload_type is not None)
+    return ProbeResult(success, latency_ms, error, ProbeTimings(resolve_ms, None, latency_ms, _ms(started, loop.time())))
+
+
+async def check_http(host: str, port: int, timeout: float = 5.0, path: str = "/", method: str = "GET",
+                     expected_status: int | None = None, body_match: str | None = None, tls: bool = False) -> ProbeResult:
+    """
+    HTTP(S) kontrolü yapar; istekler ortak, bağlantı havuzlu istemci üzerinden gönderilir.
+
+    Gecikme, çözümleme ve host başına bağlantı sınırında bekleme hariç isteğin başından cevabın
+    okunmasına kadar geçen süredir. Ad burada önbellek üzerinden çözülür (resolve_ms); bağlantı
+    aynı önbellekten alınan adrese açıldığından DNS süresi gecikmeye ve connect_ms'e tekrar girmez.
+    connect_ms yalnızca yeni bağlantı (TCP+TLS) kurulduğunda, first_byte_ms istek başlıkları
+    gönderildikten cevap başlıkları alınana kadar ölçülür.
     """
-    if protocol.lower() == "tcp":
-        return await check_tcp(host, port, timeout)
-    elif protocol.lower() == "udp":
-        return await check_udp(host, port, timeout)
-    elif protocol.lower() == "ping":
-        return await check_ping(host, timeout)
-    else:
-        return False, None, f"Unsupported protocol: {protocol}"
-async def check_udp(host: str, port: int, timeout: float = 1.0) -> Tuple[bool, float | None, str | None]:
-    # UDP için basit deneme: soket açıp dummy datagram gönderiyoruz.
-    loop = asyncio.get_event_loop()
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    try:
+        await resolve_host(host, timeout=timeout)
+    except (OSError, asyncio.TimeoutError) as exc:
+        return ProbeResult(False, None, _dns_error(host, exc), ProbeTimings(total_ms=_ms(started, loop.time())))
     start = loop.time()
+    resolve_ms = _ms(started, start)
     try:
-        transport, protocol = await loop.create_datagram_endpoint(lambda: asyncio.DatagramProtocol(), remote_addr=(host, port))
-        transport.sendto(b"ping")
-        await asyncio.sleep(0)  # scheduling
-        transport.close()
-        latency_ms = (loop.time() - start) * 1000.0
-        return True, latency_ms, None
+        outcome = await asyncio.wait_for(
+            get_http_engine().probe(http_origin(host, port, tls), path if path.startswith("/") else "/" + path,
+                                    method, expected_status, body_match),
+            timeout=max(0.0, timeout - (start - started)),
+        )
+    except asyncio.TimeoutError:
+        return ProbeResult(False, None, "HTTP timeout", ProbeTimings(resolve_ms=resolve_ms, total_ms=_ms(started, loop.time())))
     except Exception as exc:
-        return False, None, str(exc)
+        return ProbeResult(False, None, str(exc), ProbeTimings(resolve_ms=resolve_ms, total_ms=_ms(started, loop.time())))
+    end = loop.time()
+    timings = ProbeTimings(resolve_ms, outcome.connect_ms, outcome.first_byte_ms, _ms(started, end))
+    status = str(outcome.status_code) if outcome.status_code is not None else None
+    return ProbeResult(outcome.success, outcome.elapsed_ms if outcome.success else None, outcome.error, timings, response_code=status)
+
+
+async def check_dns(host: str, port: int, timeout: float = 2.0, name: str = ".", record_type: str = "A",
+                    expected_answer: str | None = None) -> ProbeResult:
+    """
+    DNS sunucusuna gerçek bir sorgu gönderir; sorgular UDP motorunun ortak soketlerinden yapılır.
+
+    Cevap NOERROR değilse veya `expected_answer` verilip cevap kayıtları arasında yoksa down sayılır.
+    Gecikme sorgunun gidiş-dönüş süresidir (first_byte_ms olarak da raporlanır), rcode response_code'a yazılır.
+    """
+    try:
+        query = build_query(random.randrange(0x10000), name, record_type)
+    except (ValueError, UnicodeError) as exc:
+        return ProbeResult(False, None, f"Geçersiz DNS sorgusu: {exc}")
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    try:
+        addresses = await resolve_host(host, timeout=timeout)
+    except (OSError, asyncio.TimeoutError) as exc:
+        return ProbeResult(False, None, _dns_error(host, exc), ProbeTimings(total_ms=_ms(started, loop.time())))
+    resolve_ms = _ms(started, loop.time())
+    data, rtt_ms, error = await get_udp_engine().exchange(
+        addresses[0], port, query, max(0.0, timeout - resolve_ms / 1000.0), lambda data: matches_query(query, data),
+    )
+    timings = ProbeTimings(resolve_ms, None, rtt_ms, _ms(started, loop.time()))
+    if data is None:
+        return ProbeResult(False, None, error, timings)
+    try:
+        response = parse_response(data)
+    except ValueError as exc:
+        return ProbeResult(False, None, f"Geçersiz DNS cevabı: {exc}", timings)
+    if response.rcode != "NOERROR":
+        error = f"DNS cevabı: {response.rcode}"
+    elif expected_answer and not answer_matches(expected_answer, response.answers):
+        found = ", ".join(response.answers[:5]) or "kayıt yok"
+        error = f"Beklenen DNS cevabı bulunamadı: {expected_answer} (gelen: {found}{', cevap kesik' if response.truncated else ''})"
+    return ProbeResult(error is None, rtt_ms if error is None else None, error, timings, response_code=response.rcode)
@@ -0,0 +1,81 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from .probe_registry import get_probe
+
+
+def probe_key(host: str, protocol: str, port: int, options: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None) -> Tuple:
+    """
+    Aynı hedefi izleyen monitor'ler için ortak anahtar (port kullanmayan protokollerde port önemsizdir).
+    Protokol seçenekleri (ör. UDP payload şablonu) veya timeout farklıysa probe'lar birleştirilmez;
+    kısa adaptif timeout'lu bir monitor'ün sonucu daha uzun timeout bekleyen monitor'e dağıtılmaz.
+    """
+    probe = get_probe(protocol)
+    key = (host.strip().lower(), protocol, port if probe is None or probe.uses_port else 0)
+    if options:
+        key += (tuple(sorted(options.items())),)
+    if timeout is not None:
+        key += (round(timeout, 3),)
+    return key
+
+
+class ProbeCoalescer:
+    """
+    Aynı hedefe yönelik eşzamanlı probe'ları tek probe'da birleştirir (single-flight)
+    ve biten probe'un sonucunu `window` saniye boyunca aynı hedefe due olan diğer
+    monitor'lere dağıtır. Her monitor kendi istatistik ve alert değerlendirmesini yapar.
+    """
+
+    def __init__(self, window: float = 0.0) -> None:
+        self.window = window
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._recent: Dict[Hashable, Tuple[float, Any]] = {}
+        self._stored = 0
+        self.coalesced = 0
+
+    async def run(self, key: Hashable, probe: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self.window > 0:
+            cached = self._recent.get(key)
+            if cached is not None and now - cached[0] <= self.window:
+                self.coalesced += 1
+                return cached[1]
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = loop.create_future()
+        self._inflight[key] = future
+        try:
+            result = await probe()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Bekleyen yoksa "exception never retrieved" uyarısını önle
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            if self.window > 0:
+                self._remember(key, loop.time(), result)
+            return result
+        finally:
+            del self._inflight[key]
+
+    @property
+    def inflight(self) -> int:
+        """Şu anda ağda olan (birleştirilmiş) probe sayısı"""
+        return len(self._inflight)
+
+    def _remember(self, key: Hashable, finished_at: float, result: Any) -> None:
+        self._recent[key] = (finished_at, result)
+        self._stored += 1
+        # Süresi dolmuş kayıtları ara sıra temizle
+        if self._stored % 1024 == 0:
+            expired = [k for k, (at, _) in self._recent.items() if finished_at - at > self.window]
+            for k in expired:
+                del self._recent[k]
@@ -0,0 +1,234 @@
+import asyncio
+import itertools
+import multiprocessing
+import signal
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .network import ProbeResult
+from .probe_registry import check_port
+
+
+# (request_id, host, protocol, port, timeout, options) -> (request_id, ProbeResult)
+ProbeSpec = Tuple[int, str, str, int, Optional[float], Optional[Dict[str, Any]]]
+ProbeReply = Tuple[int, ProbeResult]
+
+# Ölen worker bu kadar saniye sonra yeniden başlatılır; art arda ölümlerde süre ikiye katlanır
+_RESPAWN_DELAY = 1.0
+_RESPAWN_MAX_DELAY = 60.0
+# Bu kadar art arda (kararlı çalışmadan) ölen worker bir daha başlatılmaz
+_MAX_RESPAWNS = 5
+# Bu süreden uzun yaşayan worker'ın ölüm sayacı sıfırlanır
+_STABLE_SECONDS = 60.0
+
+
+async def run_probe(host: str, protocol: str, port: int, timeout: float | None = None,
+                    options: Dict[str, Any] | None = None) -> ProbeResult:
+    """Protokole göre kontrolü yapar; timeout verilmezse protokolün varsayılanı kullanılır"""
+    return await check_port(host, port, protocol, timeout, **(options or {}))
+
+
+class ProbePool:
+    """
+    Probe'ları K adet worker process'e dağıtır; her process kendi event loop'unda çalışır.
+
+    Ana process yalnızca kompakt spec tuple'larını pipe üzerinden gönderir ve sonuçları okur.
+    Aynı loop turunda biriken spec/sonuçlar tek mesajda gönderilir.
+    Ölen worker gecikmeli (art arda ölümlerde artan aralıklarla) yeniden başlatılır; hiç worker
+    kalmazsa probe'lar ana process'te çalışır.
+    """
+
+    def __init__(self, processes: int) -> None:
+        self.processes = processes
+        self._ctx = multiprocessing.get_context("spawn")
+        self._workers: List[_ProbeWorker] = []
+        self._ids = itertools.count(1)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._deaths: Dict[int, int] = {}
+        self._respawns: Dict[int, asyncio.TimerHandle] = {}
+        self._stopped = False
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stopped = False
+        for index in range(self.processes):
+            self._revive(index)
+
+    async def stop(self) -> None:
+        self._stopped = True
+        for handle in self._respawns.values():
+            handle.cancel()
+        self._respawns.clear()
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.close()
+        for worker in workers:
+            await asyncio.to_thread(worker.process.join, 5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+
+    async def probe(self, host: str, protocol: str, port: int, timeout: float | None = None,
+                    options: Dict[str, Any] | None = None) -> ProbeResult:
+        if not self._workers:
+            # Tüm worker'lar ölü (yeniden başlatma bekleniyor veya vazgeçildi)
+            return await run_probe(host, protocol, port, timeout, options)
+        # En az işi olan worker'ı seç
+        worker = min(self._workers, key=lambda w: len(w.futures))
+        request_id = next(self._ids)
+        future = self._loop.create_future()
+        worker.futures[request_id] = future
+        worker.send((request_id, host, protocol, port, timeout, options))
+        return await future
+
+    def _spawn(self, index: int) -> "_ProbeWorker":
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(target=_worker_main, args=(child_conn,), name=f"pmon-probe-{index}", daemon=True)
+        process.start()
+        child_conn.close()
+        return _ProbeWorker(self, index, process, parent_conn, self._loop)
+
+    def _revive(self, index: int) -> None:
+        self._respawns.pop(index, None)
+        if self._stopped:
+            return
+        try:
+            self._workers.append(self._spawn(index))
+        except Exception as e:
+            print(f"Probe worker {index} başlatılamadı: {e}")
+            self._schedule_respawn(index)
+
+    def _respawn(self, worker: "_ProbeWorker") -> None:
+        if worker not in self._workers:
+            return
+        self._workers.remove(worker)
+        if time.monotonic() - worker.started_at >= _STABLE_SECONDS:
+            self._deaths.pop(worker.index, None)
+        self._schedule_respawn(worker.index)
+
+    def _schedule_respawn(self, index: int) -> None:
+        if self._stopped or index in self._respawns:
+            return
+        deaths = self._deaths[index] = self._deaths.get(index, 0) + 1
+        if deaths > _MAX_RESPAWNS:
+            print(f"Probe worker {index} art arda {deaths - 1} kez sonlandı, yeniden başlatılmayacak")
+            return
+        delay = min(_RESPAWN_MAX_DELAY, _RESPAWN_DELAY * 2 ** (deaths - 1))
+        print(f"Probe worker {index} sonlandı, {delay:g} sn sonra yeniden başlatılacak")
+        self._respawns[index] = self._loop.call_later(delay, self._revive, index)
+
+
+class _ProbeWorker:
+    def __init__(self, pool: ProbePool, index: int, process, conn, loop: asyncio.AbstractEventLoop) -> None:
+        self.pool = pool
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.loop = loop
+        self.futures: Dict[int, asyncio.Future] = {}
+        self.started_at = time.monotonic()
+        self._outbox: List[ProbeSpec] = []
+        self._closed = False
+        loop.add_reader(conn.fileno(), self._on_readable)
+
+    def send(self, spec: ProbeSpec) -> None:
+        if not self._outbox:
+            self.loop.call_soon(self._flush)
+        self._outbox.append(spec)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._flush()
+        self._closed = True
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self._detach(RuntimeError("Probe pool kapatıldı"))
+
+    def _flush(self) -> None:
+        if not self._outbox or self._closed:
+            return
+        batch, self._outbox = self._outbox, []
+        try:
+            self.conn.send(batch)
+        except OSError as exc:
+            self._on_dead(exc)
+
+    def _on_readable(self) -> None:
+        try:
+            results: List[ProbeReply] = self.conn.recv()
+        except (EOFError, OSError) as exc:
+            self._on_dead(exc)
+            return
+        for request_id, result in results:
+            future = self.futures.pop(request_id, None)
+            if future is not None and not future.done():
+                future.set_result(result)
+
+    def _on_dead(self, exc: Exception) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._detach(RuntimeError(f"Probe worker {self.index} bağlantısı koptu: {exc}"))
+        self.pool._respawn(self)
+
+    def _detach(self, exc: Exception) -> None:
+        try:
+            self.loop.remove_reader(self.conn.fileno())
+        except (OSError, ValueError):
+            pass
+        # Sonucu gelmeyen kontroller hata ile sonlanır (monitor down sayılmaz)
+        for future in self.futures.values():
+            if not future.done():
+                future.set_exception(exc)
+        self.futures.clear()
+
+
+def _worker_main(conn) -> None:
+    # Ctrl+C ana process tarafından yönetilir
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(_worker_loop(conn))
+
+
+async def _worker_loop(conn) -> None:
+    loop = asyncio.get_running_loop()
+    finished = asyncio.Event()
+    outbox: List[ProbeReply] = []
+    tasks: set = set()
+
+    def flush() -> None:
+        if outbox:
+            conn.send(list(outbox))
+            outbox.clear()
+
+    async def run(spec: ProbeSpec) -> None:
+        request_id, host, protocol, port, timeout, options = spec
+        try:
+            result = await run_probe(host, protocol, port, timeout, options)
+        except Exception as exc:
+            result = ProbeResult(False, None, str(exc))
+        if not outbox:
+            loop.call_soon(flush)
+        outbox.append((request_id, result))
+
+    def on_readable() -> None:
+        try:
+            batch = conn.recv()
+        except (EOFError, OSError):
+            batch = None
+        if batch is None:
+            loop.remove_reader(conn.fileno())
+            finished.set()
+            return
+        for spec in batch:
+            task = loop.create_task(run(spec))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+    loop.add_reader(conn.fileno(), on_readable)
+    await finished.wait()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+    flush()
+    conn.close()
@@ -0,0 +1,119 @@
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+from .network import ProbeResult, check_dns, check_http, check_ping, check_tcp, check_udp
+from .udp_payloads import udp_probe_options
+from .http_probe import http_probe_options
+from .dns_probe import dns_probe_options
+
+
+def _no_options(service: Any) -> Dict[str, Any]:
+    return {}
+
+
+class ProbeType(NamedTuple):
+    """
+    Bir probe protokolünün tanımı.
+
+    - check: `check(host, port, timeout, **options)` imzalı kontrol fonksiyonu
+    - default_timeout: timeout verilmediğinde (ve adaptif timeout'un üst sınırı olarak) kullanılan süre (saniye)
+    - concurrency_class: aynı kaynağı (soket, ICMP motoru, HTTP havuzu) paylaşan probe'ların grubu;
+      scheduler `PMON_PROBE_CONCURRENCY_<SINIF>` ile her sınıfa ayrı eşzamanlılık sınırı koyabilir
+    - supports_batching: aynı hostun bu tipteki probe'ları tek çözümlemeyle birlikte çalıştırılabilir mi
+    - uses_port: False ise port anlamsızdır (0 geçilir, probe'lar port'tan bağımsız birleştirilir)
+    - options: servis tanımından protokole özel seçenekleri çıkarır
+    """
+    protocol: str
+    check: Callable[..., Awaitable[ProbeResult]]
+    default_timeout: float
+    concurrency_class: str
+    supports_batching: bool
+    uses_port: bool = True
+    options: Callable[[Any], Dict[str, Any]] = _no_options
+
+
+class ProbeRequest(NamedTuple):
+    """Bir monitor için çalıştırılacak probe: (host, protocol, port, options)"""
+    host: str
+    protocol: str
+    port: int
+    options: Optional[Dict[str, Any]]
+
+
+_registry: Dict[str, ProbeType] = {}
+
+
+def register_probe(probe: ProbeType) -> None:
+    """Yeni bir probe protokolü ekler (aynı isimde varsa değiştirir)"""
+    _registry[probe.protocol] = probe
+
+
+def get_probe(protocol: str) -> Optional[ProbeType]:
+    return _registry.get(protocol)
+
+
+def registered_probes() -> List[ProbeType]:
+    return list(_registry.values())
+
+
+def concurrency_classes() -> List[str]:
+    return sorted({probe.concurrency_class for probe in _registry.values()})
+
+
+def probe_request(server: Any, service: Any) -> ProbeRequest:
+    """Monitor'ün sunucu ve servis tanımından probe isteğini oluşturur"""
+    protocol = getattr(service.protocol, "value", service.protocol)
+    probe = get_probe(protocol)
+    if probe is None:
+        return ProbeRequest(server.host, protocol, service.port, None)
+    return ProbeRequest(server.host, protocol, service.port if probe.uses_port else 0, probe.options(service) or None)
+
+
+def service_options_key(service: Any) -> str:
+    """
+    Servisin protokole özel seçeneklerinin özeti (sha256); seçeneği olmayan protokollerde boş.
+    Aynı port'taki farklı HTTP yolları, DNS sorguları veya UDP payload'ları ayrı servis olarak tanımlanabilsin diye
+    servis tekillik anahtarına eklenir. Varsayılanlar özetten önce uygulandığı için boş yol ile "/" aynı sayılır.
+    """
+    protocol = getattr(service.protocol, "value", service.protocol)
+    probe = get_probe(protocol)
+    options = probe.options(service) if probe is not None else None
+    if not options:
+        return ""
+    encoded = json.dumps(options, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+async def check_port(host: str, port: int, protocol: str, timeout: float | None = None, **options) -> ProbeResult:
+    """
+    Kayıtlı probe tipiyle kontrol yapar
+
+    Args:
+        host: Kontrol edilecek host
+        port: Port numarası (port kullanmayan protokollerde yok sayılır)
+        protocol: Protokol (tcp, udp, ping, http, dns veya sonradan kaydedilen)
+        timeout: Timeout süresi (saniye); verilmezse protokolün varsayılanı
+        options: Protokole özel seçenekler (UDP için payload_type/payload, HTTP için path/method/expected_status/body_match/tls, DNS için name/record_type/expected_answer)
+
+    Returns:
+        ProbeResult (success, latency_ms, error, timings, timeout_ms)
+    """
+    probe = get_probe(protocol.lower())
+    if probe is None:
+        return ProbeResult(False, None, f"Unsupported protocol: {protocol}")
+    if timeout is None:
+        timeout = probe.default_timeout
+    result = await probe.check(host, port, timeout, **options)
+    return result._replace(timeout_ms=timeout * 1000.0)
+
+
+async def _check_ping(host: str, port: int, timeout: float) -> ProbeResult:
+    return await check_ping(host, timeout)
+
+
+register_probe(ProbeType("tcp", check_tcp, 3.0, "socket", supports_batching=True))
+register_probe(ProbeType("udp", check_udp, 1.0, "datagram", supports_batching=True, options=udp_probe_options))
+register_probe(ProbeType("ping", _check_ping, 5.0, "icmp", supports_batching=False, uses_port=False))
+register_probe(ProbeType("http", check_http, 5.0, "http", supports_batching=True, options=http_probe_options))
+register_probe(ProbeType("dns", check_dns, 2.0, "datagram", supports_batching=True, options=dns_probe_options))
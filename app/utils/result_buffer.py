@@ -0,0 +1,239 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor
+from datetime import datetime
+from typing import Callable, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from .. import crud, models
+from .metrics import RollingHistogram
+
+
+class CheckRecord(NamedTuple):
+    """Tek bir kontrolün monitor satırına yazılacak sonucu"""
+    monitor_id: int
+    status: str
+    latency_ms: Optional[float]
+    error: Optional[str]
+    resolve_ms: Optional[float]
+    connect_ms: Optional[float]
+    first_byte_ms: Optional[float]
+    total_ms: Optional[float]
+    response_code: Optional[str]
+    timeout_ms: Optional[float]
+    latency_ewma_ms: Optional[float]
+    latency_dev_ms: Optional[float]
+    checked_at: datetime
+    next_run_at: datetime
+    consecutive_failures: int
+    consecutive_successes: int
+    total_checks: int
+    total_failures: int
+    uptime_percentage: Optional[float]
+    uptime_1h_percentage: Optional[float]
+    uptime_24h_percentage: Optional[float]
+    uptime_7d_percentage: Optional[float]
+    # Yalnızca checkpoint zamanı gelmişse dolu; None iken DB'deki checkpoint korunur
+    uptime_windows: Optional[str] = None
+
+    @classmethod
+    def from_monitor(cls, monitor: models.Monitor, uptime_windows: Optional[str] = None) -> "CheckRecord":
+        return cls(
+            monitor_id=monitor.id,
+            status=monitor.last_status,
+            latency_ms=monitor.last_latency_ms,
+            error=monitor.last_error,
+            resolve_ms=monitor.last_resolve_ms,
+            connect_ms=monitor.last_connect_ms,
+            first_byte_ms=monitor.last_first_byte_ms,
+            total_ms=monitor.last_total_ms,
+            response_code=monitor.last_response_code,
+            timeout_ms=monitor.last_timeout_ms,
+            latency_ewma_ms=monitor.latency_ewma_ms,
+            latency_dev_ms=monitor.latency_dev_ms,
+            checked_at=monitor.last_checked_at,
+            next_run_at=monitor.next_run_at,
+            consecutive_failures=monitor.consecutive_failures,
+            consecutive_successes=monitor.consecutive_successes,
+            total_checks=monitor.total_checks,
+            total_failures=monitor.total_failures,
+            uptime_percentage=monitor.uptime_percentage,
+            uptime_1h_percentage=monitor.uptime_1h_percentage,
+            uptime_24h_percentage=monitor.uptime_24h_percentage,
+            uptime_7d_percentage=monitor.uptime_7d_percentage,
+            uptime_windows=uptime_windows,
+        )
+
+    def as_check_row(self) -> dict:
+        """Kontrol geçmişi (monitor_checks) satırı"""
+        return {
+            "monitor_id": self.monitor_id,
+            "checked_at": self.checked_at,
+            "success": self.status == "up",
+            "latency_ms": self.latency_ms,
+        }
+
+    def as_row(self) -> dict:
+        row = {
+            "id": self.monitor_id,
+            "last_status": self.status,
+            "last_latency_ms": self.latency_ms,
+            "last_error": self.error,
+            "last_resolve_ms": self.resolve_ms,
+            "last_connect_ms": self.connect_ms,
+            "last_first_byte_ms": self.first_byte_ms,
+            "last_total_ms": self.total_ms,
+            "last_response_code": self.response_code,
+            "last_timeout_ms": self.timeout_ms,
+            "latency_ewma_ms": self.latency_ewma_ms,
+            "latency_dev_ms": self.latency_dev_ms,
+            "last_checked_at": self.checked_at,
+            "next_run_at": self.next_run_at,
+            "consecutive_failures": self.consecutive_failures,
+            "consecutive_successes": self.consecutive_successes,
+            "total_checks": self.total_checks,
+            "total_failures": self.total_failures,
+            "uptime_percentage": self.uptime_percentage,
+            "uptime_1h_percentage": self.uptime_1h_percentage,
+            "uptime_24h_percentage": self.uptime_24h_percentage,
+            "uptime_7d_percentage": self.uptime_7d_percentage,
+        }
+        if self.uptime_windows is not None:
+            row["uptime_windows"] = self.uptime_windows
+        return row
+
+
+class AlertRecord(NamedTuple):
+    """Gönderilen bir alert'in geçmiş kaydı"""
+    alert_rule_id: int
+    alert_type: models.AlertTypeEnum
+    message: str
+    details: Optional[str]
+    sent_at: datetime
+    sent_successfully: bool
+    error_message: Optional[str]
+
+    def as_row(self) -> dict:
+        return {
+            "alert_rule_id": self.alert_rule_id,
+            "alert_type": self.alert_type,
+            "message": self.message,
+            "details": self.details,
+            "sent_at": self.sent_at,
+            "sent_successfully": self.sent_successfully,
+            "error_message": self.error_message,
+        }
+
+
+class ResultBuffer:
+    """
+    Kontrol sonuçlarını toplayıp N kayıtta veya T milisaniyede bir tek transaction ile yazar.
+
+    Kuyruk sınırlıdır; yazma tarafı geride kalırsa `put` bekler (backpressure).
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        flush_size: int | None = None,
+        flush_interval_ms: float | None = None,
+        max_pending: int | None = None,
+        on_flushed: Callable[[Iterable[int]], None] | None = None,
+        executor: Executor | None = None,
+        flush_timer: RollingHistogram | None = None,
+    ) -> None:
+        self.session_factory = session_factory
+        # Yazma denemesi bittiğinde (başarılı ya da değil) ilgili monitor ID'leriyle çağrılır
+        self.on_flushed = on_flushed
+        # Yazma işlemi bu executor'da (None ise varsayılan thread pool) çalışır; event loop bloklanmaz
+        self.executor = executor
+        # Verilirse her toplu yazmanın süresi (ms) buraya işlenir
+        self.flush_timer = flush_timer
+        self.flush_size = flush_size or int(os.getenv("PMON_RESULT_FLUSH_SIZE", "200"))
+        self.flush_interval = (flush_interval_ms or float(os.getenv("PMON_RESULT_FLUSH_INTERVAL_MS", "250"))) / 1000.0
+        self.max_pending = max_pending or int(os.getenv("PMON_RESULT_QUEUE_SIZE", "5000"))
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Bekleyen kayıtları yazar ve flush döngüsünü durdurur"""
+        if self._task is None:
+            return
+        await self.flush()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._queue = None
+
+    async def put(self, record: CheckRecord | AlertRecord) -> None:
+        await self._queue.put(record)
+
+    async def flush(self) -> None:
+        """Şu ana kadar kuyruğa alınan tüm kayıtlar yazılana kadar bekler"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.flush_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            started = time.perf_counter()
+            try:
+                await loop.run_in_executor(self.executor, self._write, batch)
+                if self.flush_timer is not None:
+                    self.flush_timer.observe((time.perf_counter() - started) * 1000)
+            except Exception as e:
+                print(f"Kontrol sonuçları yazılamadı ({len(batch)} kayıt): {e}")
+            finally:
+                if self.on_flushed is not None:
+                    self.on_flushed([record.monitor_id for record in batch if isinstance(record, CheckRecord)])
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch: List[CheckRecord | AlertRecord]) -> None:
+        # Aynı monitor için birden fazla sonuç varsa monitor'e yalnızca sonuncusu yazılır; geçmişe hepsi eklenir
+        checks = {}
+        history = []
+        alerts = []
+        for record in batch:
+            if isinstance(record, CheckRecord):
+                previous = checks.get(record.monitor_id)
+                if previous is not None and record.uptime_windows is None and previous.uptime_windows is not None:
+                    # Önceki sonucun checkpoint'i kaybolmasın
+                    record = record._replace(uptime_windows=previous.uptime_windows)
+                checks[record.monitor_id] = record
+                history.append(record.as_check_row())
+            else:
+                alerts.append(record)
+        db = self.session_factory()
+        try:
+            crud.save_check_results(
+                db,
+                monitor_rows=[record.as_row() for record in checks.values()],
+                alert_rows=[record.as_row() for record in alerts],
+                check_rows=history,
+            )
+        finally:
+            db.close()
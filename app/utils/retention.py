@@ -0,0 +1,146 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from .. import crud
+from .metrics import RollingHistogram
+
+
+# Saklama hedefleri ve sunucu varsayılanları (gün, 0: süresiz); tenant'ın retention_<hedef>_days kolonu ezer
+TARGETS = ("checks", "minute_rollups", "hour_rollups", "day_rollups", "alert_history")
+DEFAULT_DAYS = {
+    "checks": int(os.getenv("PMON_RETENTION_CHECKS_DAYS", "7")),
+    "minute_rollups": int(os.getenv("PMON_RETENTION_MINUTE_ROLLUPS_DAYS", "30")),
+    "hour_rollups": int(os.getenv("PMON_RETENTION_HOUR_ROLLUPS_DAYS", "365")),
+    "day_rollups": int(os.getenv("PMON_RETENTION_DAY_ROLLUPS_DAYS", "0")),
+    "alert_history": int(os.getenv("PMON_RETENTION_ALERT_HISTORY_DAYS", "90")),
+}
+
+# Bir üst seviyeye özetlenmeden silinmesin diye en kısa süreler (gün kovası ancak gün bitince kapanır)
+MIN_DAYS = {"checks": 1, "minute_rollups": 1, "hour_rollups": 2, "day_rollups": 1, "alert_history": 1}
+
+
+def effective_policy(tenant: Any) -> Dict[str, int]:
+    """Tenant'ın geçerli saklama süreleri (gün, 0: süresiz)"""
+    policy = {}
+    for target in TARGETS:
+        days = getattr(tenant, f"retention_{target}_days")
+        if days is None:
+            days = DEFAULT_DAYS[target]
+        policy[target] = max(MIN_DAYS[target], days) if days > 0 else 0
+    return policy
+
+
+class MaintenanceJob:
+    """
+    Geçmiş tablolarının bakım işi: tenant'ın saklama süresini aşan ham kontrolleri, özetleri ve
+    alert geçmişini küçük partiler halinde siler (her parti ayrı transaction; aralarında diğer
+    yazmalara sıra verilir), ardından SQLite'ta boş sayfaları dosyadan geri verir ve istatistikleri günceller.
+
+    Ham kontroller 1 dakika özetlerine, onlar da üst seviyelere toplandığı için eski kayıtlar
+    silindiğinde geçmiş daha kaba çözünürlükte korunur (downsampling).
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        enabled: Callable[[], bool],
+        executor: Executor | None = None,
+        interval: float | None = None,
+        batch_size: int | None = None,
+        pause_ms: float | None = None,
+        vacuum_pages: int | None = None,
+    ) -> None:
+        self.session_factory = session_factory
+        # Birden fazla instance'tan yalnızca biri çalıştırır (scheduler: shard 0'ın sahibi)
+        self.enabled = enabled
+        self.executor = executor
+        self.interval = interval if interval is not None else float(os.getenv("PMON_MAINTENANCE_INTERVAL", "3600"))
+        self.batch_size = batch_size or int(os.getenv("PMON_MAINTENANCE_BATCH_SIZE", "1000"))
+        self.pause = (pause_ms if pause_ms is not None else float(os.getenv("PMON_MAINTENANCE_PAUSE_MS", "50"))) / 1000.0
+        self.vacuum_pages = vacuum_pages if vacuum_pages is not None else int(os.getenv("PMON_MAINTENANCE_VACUUM_PAGES", "2000"))
+        self._task: asyncio.Task | None = None
+        self.rows_removed: Dict[str, int] = {target: 0 for target in TARGETS}
+        self.pages_freed = 0
+        self.run_ms = RollingHistogram()
+        self.last_run_at: Optional[datetime] = None
+
+    def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        next_run = 0.0
+        while True:
+            # Shard 0 sonradan alınabilir; sahiplik birkaç saniyede bir yoklanır
+            if self.enabled() and time.monotonic() >= next_run:
+                next_run = time.monotonic() + self.interval
+                try:
+                    await self.run_once(datetime.utcnow())
+                except Exception as e:
+                    print(f"Bakım hatası: {e}")
+            await asyncio.sleep(min(self.interval, 5.0))
+
+    async def run_once(self, now: datetime) -> Dict[str, int]:
+        """Bir bakım turu; hedef başına silinen satır sayısını döner"""
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        removed = {target: 0 for target in TARGETS}
+        policies = await loop.run_in_executor(self.executor, self._load_policies)
+        for tenant_id, policy in policies:
+            for target, days in policy.items():
+                if not days:
+                    continue
+                cutoff = now - timedelta(days=days)
+                while True:
+                    count = await loop.run_in_executor(self.executor, self._delete_batch, target, tenant_id, cutoff)
+                    removed[target] += count
+                    self.rows_removed[target] += count
+                    if count < self.batch_size:
+                        break
+                    await asyncio.sleep(self.pause)
+        freed = await loop.run_in_executor(self.executor, self._compact)
+        self.pages_freed += freed
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.run_ms.observe(elapsed_ms)
+        self.last_run_at = now
+        if any(removed.values()) or freed:
+            summary = ", ".join(f"{target}: {count}" for target, count in removed.items() if count)
+            print(f"Bakım: {sum(removed.values())} satır silindi ({summary or '-'}), {freed} sayfa geri verildi, {elapsed_ms:.0f} ms")
+        return removed
+
+    def _load_policies(self) -> List[tuple[int, Dict[str, int]]]:
+        db = self.session_factory()
+        try:
+            return [(tenant.id, effective_policy(tenant)) for tenant in crud.list_tenants(db)]
+        finally:
+            db.close()
+
+    def _delete_batch(self, target: str, tenant_id: int, cutoff: datetime) -> int:
+        db = self.session_factory()
+        try:
+            return crud.delete_expired_history(db, target, tenant_id, cutoff, self.batch_size)
+        finally:
+            db.close()
+
+    def _compact(self) -> int:
+        db = self.session_factory()
+        try:
+            return crud.compact_database(db, self.vacuum_pages)
+        finally:
+            db.close()
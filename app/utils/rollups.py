@@ -0,0 +1,216 @@
+import asyncio
+import math
+import os
+import time
+from concurrent.futures import Executor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from .. import crud
+from .metrics import RollingHistogram
+
+
+# Rollup çözünürlükleri (saniye); her seviye bir alttakinden hesaplanır, 1 dakika ham kayıtlardan
+RESOLUTIONS = (60, 3600, 86400)
+RESOLUTION_NAMES = {60: "1m", 3600: "1h", 86400: "1d"}
+
+# Bir çalıştırmada seviye başına işlenen en fazla kova; geride kalınırsa iş hemen tekrar çalışır
+_CHUNK_BUCKETS = {60: 10, 3600: 6, 86400: 1}
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def bucket_start(value: datetime, resolution: int) -> datetime:
+    seconds = (value - _EPOCH).total_seconds()
+    return _EPOCH + timedelta(seconds=math.floor(seconds / resolution) * resolution)
+
+
+def choose_resolution(start: datetime, end: datetime, interval_seconds: int, max_points: int = 500) -> Optional[int]:
+    """Aralığı en fazla `max_points` noktayla gösteren en ince çözünürlük (None: ham kayıtlar)"""
+    span = max(0.0, (end - start).total_seconds())
+    if span / max(1, interval_seconds) <= max_points:
+        return None
+    for resolution in RESOLUTIONS:
+        if span / resolution <= max_points:
+            return resolution
+    return RESOLUTIONS[-1]
+
+
+def _percentile(values: List[float], fraction: float) -> Optional[float]:
+    # En yakın sıra (nearest-rank) yöntemi
+    if not values:
+        return None
+    values.sort()
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+def _weighted_percentile(pairs: List[Tuple[float, int]], fraction: float) -> Optional[float]:
+    pairs = [(value, weight) for value, weight in pairs if value is not None and weight]
+    if not pairs:
+        return None
+    pairs.sort()
+    target = fraction * sum(weight for _, weight in pairs)
+    seen = 0
+    for value, weight in pairs:
+        seen += weight
+        if seen >= target:
+            return value
+    return pairs[-1][0]
+
+
+def rollup_checks(rows: Iterable[Sequence], resolution: int) -> List[dict]:
+    """Ham kayıtları (monitor_id, checked_at, success, latency_ms) kovalara toplar; p95 kesindir"""
+    buckets: Dict[Tuple[int, datetime], list] = {}
+    for monitor_id, checked_at, success, latency_ms in rows:
+        key = (monitor_id, bucket_start(checked_at, resolution))
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = [0, 0, []]
+        bucket[0] += 1
+        if not success:
+            bucket[1] += 1
+        elif latency_ms is not None:
+            bucket[2].append(latency_ms)
+    return [
+        {
+            "monitor_id": monitor_id,
+            "resolution": resolution,
+            "bucket_start": start,
+            "check_count": count,
+            "failure_count": failures,
+            "latency_count": len(latencies),
+            "latency_sum_ms": sum(latencies) if latencies else None,
+            "latency_min_ms": min(latencies) if latencies else None,
+            "latency_max_ms": max(latencies) if latencies else None,
+            "latency_p95_ms": _percentile(latencies, 0.95),
+        }
+        for (monitor_id, start), (count, failures, latencies) in buckets.items()
+    ]
+
+
+def merge_rollups(rows: Iterable[Sequence], resolution: int) -> List[dict]:
+    """
+    Alt çözünürlük özetlerini (monitor_id, bucket_start, check_count, failure_count, latency_count,
+    latency_sum_ms, latency_min_ms, latency_max_ms, latency_p95_ms) üst kovalara birleştirir.
+    p95, alt kovaların p95 değerlerinin örnek sayısıyla ağırlıklı yüzdeliğidir (yaklaşık).
+    """
+    buckets: Dict[Tuple[int, datetime], dict] = {}
+    p95s: Dict[Tuple[int, datetime], List[Tuple[float, int]]] = {}
+    for monitor_id, start, count, failures, latency_count, latency_sum, latency_min, latency_max, latency_p95 in rows:
+        key = (monitor_id, bucket_start(start, resolution))
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = {
+                "monitor_id": monitor_id, "resolution": resolution, "bucket_start": key[1], "check_count": 0,
+                "failure_count": 0, "latency_count": 0, "latency_sum_ms": None, "latency_min_ms": None, "latency_max_ms": None,
+            }
+            p95s[key] = []
+        bucket["check_count"] += count
+        bucket["failure_count"] += failures
+        if latency_count:
+            bucket["latency_count"] += latency_count
+            bucket["latency_sum_ms"] = (bucket["latency_sum_ms"] or 0.0) + latency_sum
+            bucket["latency_min_ms"] = latency_min if bucket["latency_min_ms"] is None else min(bucket["latency_min_ms"], latency_min)
+            bucket["latency_max_ms"] = latency_max if bucket["latency_max_ms"] is None else max(bucket["latency_max_ms"], latency_max)
+            p95s[key].append((latency_p95, latency_count))
+    for key, bucket in buckets.items():
+        bucket["latency_p95_ms"] = _weighted_percentile(p95s[key], 0.95)
+    return list(buckets.values())
+
+
+class RollupJob:
+    """
+    Kontrol kayıtlarını arka planda 1 dakika / 1 saat / 1 gün özetlerine toplar.
+
+    Yalnızca kapanmış (ve `grace` saniye geçmiş) kovalar işlenir; her seviye bir alt seviyenin
+    ilerlediği noktayı geçmez. Kova yeniden hesaplanırsa eski özet silinip yenisi yazılır (idempotent).
+    Scheduler'ın sahip olduğu shard'lardaki monitor'ler işlenir.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        shards: Callable[[], Tuple[int, List[int]]],
+        executor: Executor | None = None,
+        interval: float | None = None,
+        grace: float | None = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.shards = shards
+        self.executor = executor
+        self.interval = interval if interval is not None else float(os.getenv("PMON_ROLLUP_INTERVAL", "60"))
+        self.grace = grace if grace is not None else float(os.getenv("PMON_ROLLUP_GRACE_SECONDS", "120"))
+        # çözünürlük -> işlenmiş son kova sonu; shard seti değişince DB'den yeniden bulunur
+        self._watermarks: Dict[int, datetime] = {}
+        self._watermark_shards: Optional[Tuple[int, List[int]]] = None
+        self._task: asyncio.Task | None = None
+        self.rows_written = 0
+        self.run_ms = RollingHistogram()
+
+    def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            shard_count, shards = self.shards()
+            more = False
+            if shards:
+                started = time.perf_counter()
+                try:
+                    more = await loop.run_in_executor(self.executor, self.run_once, datetime.utcnow(), shard_count, shards)
+                    self.run_ms.observe((time.perf_counter() - started) * 1000)
+                except Exception as e:
+                    print(f"Rollup hatası: {e}")
+            # Geride kalındıysa diğer DB işlerine sıra verip hemen devam et
+            await asyncio.sleep(0.1 if more else self.interval)
+
+    def run_once(self, now: datetime, shard_count: int = 1, shards: Optional[List[int]] = None) -> bool:
+        """Kapanmış kovaları özetler; işlenecek kova kaldıysa True döner"""
+        if self._watermark_shards != (shard_count, shards):
+            self._watermarks.clear()
+            self._watermark_shards = (shard_count, shards)
+        more = False
+        limit = now - timedelta(seconds=self.grace)
+        db = self.session_factory()
+        try:
+            for index, resolution in enumerate(RESOLUTIONS):
+                closed = bucket_start(limit, resolution)
+                if index:
+                    # Alt seviye henüz yazılmamış kovaları özetleme
+                    finer = self._watermarks.get(RESOLUTIONS[index - 1])
+                    if finer is None:
+                        break
+                    closed = min(closed, bucket_start(finer, resolution))
+                mark = self._watermarks.get(resolution)
+                if mark is None:
+                    last = crud.last_rollup_bucket(db, resolution, shard_count, shards)
+                    mark = last + timedelta(seconds=resolution) if last is not None else None
+                first = crud.first_rollup_source_time(db, resolution, mark, shard_count, shards)
+                if first is None or bucket_start(first, resolution) >= closed:
+                    self._watermarks[resolution] = max(mark, closed) if mark is not None else closed
+                    continue
+                start = bucket_start(first, resolution)
+                end = min(closed, start + timedelta(seconds=resolution * _CHUNK_BUCKETS[resolution]))
+                source = crud.load_rollup_source(db, resolution, start, end, shard_count, shards)
+                rows = rollup_checks(source, resolution) if index == 0 else merge_rollups(source, resolution)
+                crud.replace_rollups(db, resolution, start, end, rows, shard_count, shards)
+                self.rows_written += len(rows)
+                self._watermarks[resolution] = end
+                more = more or end < closed
+        finally:
+            db.close()
+        return more
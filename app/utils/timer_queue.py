@@ -0,0 +1,78 @@
+import heapq
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+class DueQueue:
+    """
+    (next_run_at, monitor_id) çiftlerini bellekte tutan min-heap.
+
+    Bir monitor yeniden planlandığında eski heap girdisi silinmez; `_deadlines`
+    sözlüğündeki güncel zamanla eşleşmeyen girdiler okunurken atlanır (lazy deletion).
+    """
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[datetime, int]] = []
+        self._deadlines: Dict[int, datetime] = {}
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, monitor_id: int) -> bool:
+        return monitor_id in self._deadlines
+
+    def schedule(self, monitor_id: int, run_at: datetime) -> None:
+        """Monitor'ü verilen zamana (yeniden) planlar"""
+        if self._deadlines.get(monitor_id) == run_at:
+            return
+        self._deadlines[monitor_id] = run_at
+        heapq.heappush(self._heap, (run_at, monitor_id))
+        self._maybe_compact()
+
+    def remove(self, monitor_id: int) -> None:
+        """Monitor'ü kuyruktan çıkarır (silinen veya devre dışı bırakılan monitor'ler)"""
+        self._deadlines.pop(monitor_id, None)
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._deadlines.clear()
+
+    def deadline_of(self, monitor_id: int) -> Optional[datetime]:
+        return self._deadlines.get(monitor_id)
+
+    def next_deadline(self) -> Optional[datetime]:
+        """En yakın geçerli çalışma zamanını döndürür"""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def count_due(self, now: datetime) -> int:
+        """Zamanı gelmiş ama henüz çıkarılmamış monitor sayısı (O(n), yalnızca metrikler için)"""
+        return sum(1 for run_at in self._deadlines.values() if run_at <= now)
+
+    def pop_due(self, now: datetime, limit: Optional[int] = None) -> List[int]:
+        """Zamanı gelmiş monitor ID'lerini en eskiden başlayarak kuyruktan çıkarır"""
+        due: List[int] = []
+        while self._heap and (limit is None or len(due) < limit):
+            run_at, monitor_id = self._heap[0]
+            if self._deadlines.get(monitor_id) != run_at:
+                heapq.heappop(self._heap)
+                continue
+            if run_at > now:
+                break
+            heapq.heappop(self._heap)
+            del self._deadlines[monitor_id]
+            due.append(monitor_id)
+        return due
+
+    def _drop_stale(self) -> None:
+        while self._heap:
+            run_at, monitor_id = self._heap[0]
+            if self._deadlines.get(monitor_id) == run_at:
+                return
+            heapq.heappop(self._heap)
+
+    def _maybe_compact(self) -> None:
+        # Çok sık yeniden planlama yapılırsa heap'i geçerli girdilerle yeniden kur
+        if len(self._heap) > 1024 and len(self._heap) > 2 * len(self._deadlines):
+            self._heap = [(run_at, monitor_id) for monitor_id, run_at in self._deadlines.items()]
+            heapq.heapify(self._heap)
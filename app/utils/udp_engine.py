@@ -0,0 +1,243 @@
+import asyncio
+import errno
+import heapq
+import itertools
+import os
+import socket
+import struct
+import sys
+import weakref
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+
+# Linux'ta bağlı olmayan UDP soketleri ICMP hatalarını yalnızca IP_RECVERR ile (hata kuyruğunda) alır
+_RECVERR = sys.platform.startswith("linux")
+_IP_RECVERR = getattr(socket, "IP_RECVERR", 11)
+_IPV6_RECVERR = getattr(socket, "IPV6_RECVERR", 25)
+_MSG_ERRQUEUE = getattr(socket, "MSG_ERRQUEUE", 0x2000)
+
+ProbeOutcome = Tuple[bool, Optional[float], Optional[str]]
+
+
+class _UdpProbe:
+    __slots__ = ("key", "future", "sent_at", "expect_response", "accept", "response")
+
+    def __init__(self, key: Tuple[int, str, int], future: asyncio.Future, expect_response: bool,
+                 accept: Optional[Callable[[bytes], bool]] = None) -> None:
+        self.key = key
+        self.future = future
+        self.sent_at = 0.0
+        self.expect_response = expect_response
+        self.accept = accept
+        self.response: Optional[bytes] = None
+
+
+class UdpEngine:
+    """
+    Tüm UDP probe'larını adres ailesi başına küçük bir soket havuzu üzerinden çoklar.
+
+    Cevaplar ve ICMP port-unreachable hataları (soket, hedef adres, port) ile bekleyen
+    probe'a eşleştirilir; `accept` verilen probe'lar (ör. DNS) yalnızca kabul ettikleri cevabı alır,
+    böylece aynı hedefe aynı anda birden çok sorgu gönderilebilir. Timeout'lar tek bir heap ve tek bir loop timer'ı ile yönetilir.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, sockets: int | None = None) -> None:
+        # Motor loop'a göre WeakKeyDictionary'de tutulur; güçlü referans loop'un (ve motorun) hiç toplanmamasına yol açardı
+        self._loop_ref = weakref.ref(loop)
+        self.size = max(1, sockets or int(os.getenv("PMON_UDP_SOCKETS", "4")))
+        self._pools: Dict[int, List[socket.socket]] = {}
+        self._rotation = itertools.count()
+        self._waiters: Dict[Tuple[int, str, int], Deque[_UdpProbe]] = {}
+        self._timeouts: List[Tuple[float, int, _UdpProbe]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def _loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop_ref()
+
+    async def probe(self, address: str, port: int, payload: bytes, timeout: float, expect_response: bool) -> ProbeOutcome:
+        """
+        Datagramı gönderip cevap, ICMP hatası veya timeout'u bekler.
+        `expect_response` False ise timeout, port kapalı bilgisi gelmediği için (açık|filtreli) başarılı sayılır.
+        """
+        return await self._run(_UdpProbe((0, address, port), self._loop.create_future(), expect_response), payload, timeout)
+
+    async def exchange(self, address: str, port: int, payload: bytes, timeout: float,
+                       accept: Callable[[bytes], bool]) -> Tuple[Optional[bytes], Optional[float], Optional[str]]:
+        """Sorguyu gönderip `accept`in kabul ettiği ilk cevabı bekler: (cevap, gidiş-dönüş ms, hata)"""
+        probe = _UdpProbe((0, address, port), self._loop.create_future(), True, accept)
+        success, latency_ms, error = await self._run(probe, payload, timeout)
+        return (probe.response, latency_ms, None) if success else (None, None, error)
+
+    async def _run(self, probe: _UdpProbe, payload: bytes, timeout: float) -> ProbeOutcome:
+        _, address, port = probe.key
+        family = socket.AF_INET6 if ":" in address else socket.AF_INET
+        sock = self._pick_socket(family, address, port, shared=probe.accept is not None)
+        key = probe.key = (sock.fileno(), address, port)
+        self._waiters.setdefault(key, deque()).append(probe)
+        try:
+            probe.sent_at = self._loop.time()
+            self._arm(probe.sent_at + timeout, probe)
+            await self._send(sock, payload, (address, port))
+            return await probe.future
+        except OSError as exc:
+            return False, None, str(exc)
+        finally:
+            waiters = self._waiters.get(key)
+            if waiters is not None:
+                try:
+                    waiters.remove(probe)
+                except ValueError:
+                    pass
+                if not waiters:
+                    del self._waiters[key]
+            if not self._waiters:
+                # Bekleyen probe kalmadı; timer ve heap'teki bitmiş probe'lar loop'u canlı tutmasın
+                self._disarm()
+
+    async def _send(self, sock: socket.socket, payload: bytes, destination: Tuple[str, int]) -> None:
+        for _ in range(8):
+            try:
+                await self._loop.sock_sendto(sock, payload, destination)
+                return
+            except ConnectionRefusedError:
+                # Soket üzerinde başka bir hedefin bekleyen ICMP hatası raporlandı; hatayı dağıt ve tekrar dene
+                self._drain_errors(sock)
+        await self._loop.sock_sendto(sock, payload, destination)
+
+    def close(self) -> None:
+        self._disarm()
+        loop = self._loop
+        for sockets in self._pools.values():
+            for sock in sockets:
+                if loop is not None and not loop.is_closed():
+                    loop.remove_reader(sock.fileno())
+                sock.close()
+        self._pools.clear()
+        for waiters in self._waiters.values():
+            for probe in waiters:
+                if not probe.future.done():
+                    probe.future.cancel()
+        self._waiters.clear()
+
+    def _pick_socket(self, family: int, address: str, port: int, shared: bool = False) -> socket.socket:
+        sockets = self._pools.get(family)
+        if sockets is None:
+            sockets = self._pools[family] = [self._open_socket(family) for _ in range(self.size)]
+        # Aynı hedefe bekleyen probe'u olmayan soketi tercih et; cevaplar karışmasın.
+        # Cevabı kendisi eşleştiren probe'lar (shared) yine cevap eşleştiren probe'larla soket paylaşabilir
+        start = next(self._rotation)
+        for offset in range(len(sockets)):
+            sock = sockets[(start + offset) % len(sockets)]
+            waiters = self._waiters.get((sock.fileno(), address, port))
+            if not waiters or (shared and waiters[0].accept is not None):
+                return sock
+        return sockets[start % len(sockets)]
+
+    def _open_socket(self, family: int) -> socket.socket:
+        sock = socket.socket(family, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        # Binlerce monitor'ün cevabı birkaç sokette toplanır; tampon küçükse paket düşer
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        except OSError:
+            pass
+        if _RECVERR:
+            if family == socket.AF_INET6:
+                sock.setsockopt(socket.IPPROTO_IPV6, _IPV6_RECVERR, 1)
+            else:
+                sock.setsockopt(socket.IPPROTO_IP, _IP_RECVERR, 1)
+        sock.bind(("::", 0) if family == socket.AF_INET6 else ("0.0.0.0", 0))
+        self._loop.add_reader(sock.fileno(), self._on_readable, sock)
+        return sock
+
+    def _on_readable(self, sock: socket.socket) -> None:
+        while True:
+            try:
+                data, source = sock.recvfrom(65535)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                # Bekleyen ICMP hatası; hangi hedefe ait olduğu hata kuyruğundan okunur
+                self._drain_errors(sock)
+                continue
+            self._complete((sock.fileno(), source[0], source[1]), None, data)
+        self._drain_errors(sock)
+
+    def _drain_errors(self, sock: socket.socket) -> None:
+        if not _RECVERR:
+            return
+        while True:
+            try:
+                _, ancdata, _, destination = sock.recvmsg(512, 512, _MSG_ERRQUEUE)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            for level, kind, data in ancdata:
+                if (level, kind) in ((socket.IPPROTO_IP, _IP_RECVERR), (socket.IPPROTO_IPV6, _IPV6_RECVERR)) and len(data) >= 16:
+                    # struct sock_extended_err: ee_errno, ee_origin, ee_type, ee_code, ee_pad, ee_info, ee_data
+                    ee_errno = struct.unpack_from("=I", data)[0]
+                    if ee_errno == errno.ECONNREFUSED:
+                        message = "Port kapalı (ICMP port unreachable)"
+                    else:
+                        message = f"ICMP hatası: {os.strerror(ee_errno)}"
+                    self._complete((sock.fileno(), destination[0], destination[1]), message)
+                    break
+
+    def _complete(self, key: Tuple[int, str, int], error: Optional[str], data: bytes = b"") -> None:
+        waiters = self._waiters.get(key)
+        if not waiters:
+            return
+        for probe in waiters:
+            if probe.future.done():
+                continue
+            if error is None:
+                if probe.accept is not None and not probe.accept(data):
+                    continue
+                probe.response = data
+                probe.future.set_result((True, (self._loop.time() - probe.sent_at) * 1000.0, None))
+            else:
+                probe.future.set_result((False, None, error))
+            return
+
+    def _arm(self, deadline: float, probe: _UdpProbe) -> None:
+        heapq.heappush(self._timeouts, (deadline, next(self._sequence), probe))
+        if self._timer is None or deadline < self._timer.when():
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = self._loop.call_at(deadline, self._expire)
+
+    def _disarm(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._timeouts.clear()
+
+    def _expire(self) -> None:
+        self._timer = None
+        now = self._loop.time()
+        while self._timeouts and self._timeouts[0][0] <= now:
+            _, _, probe = heapq.heappop(self._timeouts)
+            if probe.future.done():
+                continue
+            if probe.expect_response:
+                probe.future.set_result((False, None, "UDP yanıtı alınamadı (timeout)"))
+            else:
+                probe.future.set_result((True, None, None))
+        if self._timeouts:
+            self._timer = self._loop.call_at(self._timeouts[0][0], self._expire)
+
+
+_engines: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, UdpEngine]" = weakref.WeakKeyDictionary()
+
+
+def get_udp_engine() -> UdpEngine:
+    """Çalışan event loop'un UDP motorunu döndürür"""
+    loop = asyncio.get_running_loop()
+    engine = _engines.get(loop)
+    if engine is None:
+        engine = _engines[loop] = UdpEngine(loop)
+    return engine
@@ -0,0 +1,70 @@
+import random
+from typing import Any, Dict, Optional
+
+from .dns_probe import build_query
+
+
+# Şablon yoksa eski davranıştaki gibi sabit bir datagram gönderilir
+DEFAULT_PAYLOAD = b"ping"
+
+# SNMP sysDescr.0 (1.3.6.1.2.1.1.1.0)
+_SYS_DESCR_OID = bytes([0x2B, 0x06, 0x01, 0x02, 0x01, 0x01, 0x01, 0x00])
+
+
+def build_payload(payload_type: Optional[str], data: Optional[str] = None) -> bytes:
+    """
+    Servis tipine göre UDP sorgu datagramı üretir.
+
+    - dns: `data` adı için A sorgusu (boşsa kök için NS sorgusu)
+    - ntp: NTPv3 istemci isteği
+    - snmp: `data` community'si (varsayılan 'public') ile SNMPv1 sysDescr.0 GET
+    - hex: `data` içindeki ham byte'lar (örn. '0a0b0c')
+    """
+    if not payload_type:
+        return DEFAULT_PAYLOAD
+    if payload_type == "dns":
+        return _dns_query(data or ".")
+    if payload_type == "ntp":
+        return b"\x1b" + b"\x00" * 47
+    if payload_type == "snmp":
+        return _snmp_get(data or "public")
+    if payload_type == "hex":
+        try:
+            payload = bytes.fromhex(data or "")
+        except ValueError:
+            raise ValueError("Geçersiz hex payload") from None
+        if not payload:
+            raise ValueError("Hex payload boş olamaz")
+        return payload
+    raise ValueError(f"Desteklenmeyen UDP payload tipi: {payload_type}")
+
+
+def udp_probe_options(service: Any) -> Dict[str, Optional[str]]:
+    """UDP servis tanımından check_udp'ye geçilecek payload seçenekleri"""
+    payload_type = getattr(service, "udp_payload_type", None)
+    if payload_type is None:
+        return {}
+    return {"payload_type": getattr(payload_type, "value", payload_type), "payload": service.udp_payload}
+
+
+def _dns_query(name: str) -> bytes:
+    root = not name.strip().rstrip(".")
+    return build_query(random.randrange(0x10000), name, "NS" if root else "A")
+
+
+def _ber(tag: int, value: bytes) -> bytes:
+    length = len(value)
+    if length < 0x80:
+        return bytes([tag, length]) + value
+    encoded = length.to_bytes((length.bit_length() + 7) // 8, "big")
+    return bytes([tag, 0x80 | len(encoded)]) + encoded + value
+
+
+def _ber_int(value: int) -> bytes:
+    return _ber(0x02, value.to_bytes(value.bit_length() // 8 + 1, "big"))
+
+
+def _snmp_get(community: str) -> bytes:
+    varbind = _ber(0x30, _ber(0x06, _SYS_DESCR_OID) + b"\x05\x00")
+    pdu = _ber(0xA0, _ber_int(random.randrange(1, 0x7FFFFFFF)) + _ber_int(0) + _ber_int(0) + _ber(0x30, varbind))
+    return _ber(0x30, _ber_int(0) + _ber(0x04, community.encode()) + pdu)
@@ -0,0 +1,192 @@
+import json
+import os
+import time
+from array import array
+from datetime import datetime
+from typing import Dict, Optional
+
+
+# Pencere adı -> (süre, kova genişliği) saniye; pencere kova genişliği kadar adımlarla kayar
+WINDOWS = {
+    "1h": (3600, 60),
+    "24h": (86400, 900),
+    "7d": (604800, 3600),
+}
+DEFAULT_WINDOW = "24h"
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _timestamp(value: datetime) -> float:
+    return (value - _EPOCH).total_seconds()
+
+
+class SlidingWindow:
+    """
+    Sabit sayıda kovadan oluşan halka; her kova o aralıktaki kontrol/başarısızlık sayısını tutar.
+    Toplamlar artımlı güncellenir: kayıt eklemek ve oranı okumak O(1) (kova atlama hariç, en fazla kova sayısı kadar).
+    """
+    __slots__ = ("bucket_seconds", "size", "checks", "failures", "total_checks", "total_failures", "head")
+
+    def __init__(self, span: int, bucket_seconds: int) -> None:
+        self.bucket_seconds = bucket_seconds
+        self.size = span // bucket_seconds
+        self.checks = array("I", bytes(4 * self.size))
+        self.failures = array("I", bytes(4 * self.size))
+        self.total_checks = 0
+        self.total_failures = 0
+        # En yeni kovanın mutlak numarası (epoch'tan beri kova sayısı)
+        self.head: Optional[int] = None
+
+    def _advance(self, bucket: int) -> None:
+        if self.head is None or bucket - self.head >= self.size:
+            self._clear()
+        else:
+            for number in range(self.head + 1, bucket + 1):
+                slot = number % self.size
+                self.total_checks -= self.checks[slot]
+                self.total_failures -= self.failures[slot]
+                self.checks[slot] = 0
+                self.failures[slot] = 0
+        self.head = bucket
+
+    def _clear(self) -> None:
+        for slot in range(self.size):
+            self.checks[slot] = 0
+            self.failures[slot] = 0
+        self.total_checks = 0
+        self.total_failures = 0
+
+    def add(self, timestamp: float, success: bool) -> None:
+        bucket = int(timestamp // self.bucket_seconds)
+        if self.head is None or bucket > self.head:
+            self._advance(bucket)
+        elif bucket <= self.head - self.size:
+            return  # pencerenin dışında kalan geç kayıt
+        slot = bucket % self.size
+        self.checks[slot] += 1
+        self.total_checks += 1
+        if not success:
+            self.failures[slot] += 1
+            self.total_failures += 1
+
+    def uptime(self, timestamp: float) -> Optional[float]:
+        """Pencere içindeki başarılı kontrol yüzdesi; pencerede kontrol yoksa None"""
+        bucket = int(timestamp // self.bucket_seconds)
+        if self.head is not None and bucket > self.head:
+            self._advance(bucket)
+        if not self.total_checks:
+            return None
+        return (self.total_checks - self.total_failures) / self.total_checks * 100.0
+
+    def state(self) -> list:
+        # Yalnızca dolu kovalar: [head, [[geriye uzaklık, kontrol, başarısızlık], ...]]
+        if self.head is None:
+            return [None, []]
+        entries = []
+        for offset in range(self.size):
+            slot = (self.head - offset) % self.size
+            if self.checks[slot]:
+                entries.append([offset, self.checks[slot], self.failures[slot]])
+        return [self.head, entries]
+
+    def restore(self, state: list) -> None:
+        head, entries = state
+        self._clear()
+        self.head = head
+        for offset, checks, failures in entries:
+            if 0 <= offset < self.size:
+                slot = (head - offset) % self.size
+                self.checks[slot] = checks
+                self.failures[slot] = failures
+                self.total_checks += checks
+                self.total_failures += failures
+
+
+class MonitorWindows:
+    """Bir monitor'ün 1 saat / 24 saat / 7 gün uptime pencereleri"""
+    __slots__ = ("windows", "last_recorded_at")
+
+    def __init__(self) -> None:
+        self.windows = {name: SlidingWindow(span, bucket) for name, (span, bucket) in WINDOWS.items()}
+        self.last_recorded_at: Optional[datetime] = None
+
+    @classmethod
+    def from_state(cls, state: Optional[str]) -> "MonitorWindows":
+        windows = cls()
+        if state:
+            try:
+                data = json.loads(state)
+                for name, window in windows.windows.items():
+                    if name in data:
+                        window.restore(data[name])
+            except (ValueError, TypeError):
+                windows = cls()  # bozuk checkpoint; boş pencerelerle devam et
+        return windows
+
+    def to_state(self) -> str:
+        return json.dumps({name: window.state() for name, window in self.windows.items()}, separators=(",", ":"))
+
+    def record(self, checked_at: datetime, success: bool) -> None:
+        timestamp = _timestamp(checked_at)
+        for window in self.windows.values():
+            window.add(timestamp, success)
+        if self.last_recorded_at is None or checked_at > self.last_recorded_at:
+            self.last_recorded_at = checked_at
+
+    def uptimes(self, now: datetime) -> Dict[str, Optional[float]]:
+        timestamp = _timestamp(now)
+        return {name: window.uptime(timestamp) for name, window in self.windows.items()}
+
+
+class UptimeTracker:
+    """
+    Scheduler'ın bellekte tuttuğu monitor pencereleri.
+    Pencereler monitor'ün `uptime_windows` checkpoint'inden yüklenir ve en fazla
+    `checkpoint_seconds` saniyede bir (sonuç yazmasıyla birlikte) DB'ye geri yazılır.
+    `idle_seconds` boyunca kontrol edilmeyen monitor'ler (silinmiş, kapatılmış, shard'ı devredilmiş) bellekten atılır.
+    """
+
+    def __init__(self, checkpoint_seconds: float | None = None, idle_seconds: float | None = None) -> None:
+        self.checkpoint_seconds = checkpoint_seconds if checkpoint_seconds is not None else float(os.getenv("PMON_UPTIME_CHECKPOINT_SECONDS", "300"))
+        self.idle_seconds = idle_seconds if idle_seconds is not None else float(os.getenv("PMON_UPTIME_IDLE_SECONDS", "86400"))
+        self._windows: Dict[int, MonitorWindows] = {}
+        self._checkpointed: Dict[int, float] = {}
+        self._swept_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def get(self, monitor_id: int, state: Optional[str], last_checked_at: Optional[datetime]) -> MonitorWindows:
+        windows = self._windows.get(monitor_id)
+        # Monitor bu arada başka bir yerde (başka instance, anlık kontrol) kontrol edildiyse checkpoint daha günceldir
+        if windows is None or (last_checked_at is not None and windows.last_recorded_at is not None and last_checked_at > windows.last_recorded_at):
+            windows = self._windows[monitor_id] = MonitorWindows.from_state(state)
+            self._checkpointed[monitor_id] = time.monotonic()
+        return windows
+
+    def checkpoint_due(self, monitor_id: int) -> bool:
+        now = time.monotonic()
+        if now - self._checkpointed.get(monitor_id, 0.0) < self.checkpoint_seconds:
+            return False
+        self._checkpointed[monitor_id] = now
+        return True
+
+    def evict_idle(self, now: datetime) -> Dict[int, str]:
+        """
+        En fazla `checkpoint_seconds` saniyede bir boşta kalan pencereleri bırakır;
+        atılanların son durumu (checkpoint'e yazılmak üzere) döner
+        """
+        if time.monotonic() - self._swept_at < self.checkpoint_seconds:
+            return {}
+        self._swept_at = time.monotonic()
+        evicted = {}
+        for monitor_id, windows in list(self._windows.items()):
+            if windows.last_recorded_at is None or (now - windows.last_recorded_at).total_seconds() > self.idle_seconds:
+                evicted[monitor_id] = windows.to_state()
+                del self._windows[monitor_id]
+                self._checkpointed.pop(monitor_id, None)
+        return evicted
+
+    def states(self) -> Dict[int, str]:
+        return {monitor_id: windows.to_state() for monitor_id, windows in self._windows.items()}
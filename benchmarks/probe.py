@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Per-protocol probe benchmark
+
+Runs any probe type from the registry (tcp, udp, ping, http, ...) N times with a
+fixed concurrency against one target and reports throughput, latency
+percentiles and the average phase timings.
+
+Usage:
+    python benchmarks/probe.py --protocol tcp --host 127.0.0.1 --port 22 --count 5000 --concurrency 500
+    python benchmarks/probe.py --protocol http --local --count 2000 --option path=/health
+    python benchmarks/probe.py --protocol udp --host 10.0.0.53 --port 53 --option payload_type=dns --option payload=example.com
+    python benchmarks/probe.py --protocol dns --local --option name=intranet.example --option expected_answer=127.0.0.1
+    python benchmarks/probe.py --protocol tcp --local --count 20000 --concurrency 2000 --processes 4
+    python benchmarks/probe.py --protocol dns --local --check
+
+--local starts a loopback target (tcp listener, udp echo, http server or stub DNS
+resolver) for protocols that need one, so probe overhead can be compared without
+network noise and everything runs offline.
+
+--processes K sends the probes through the scheduler's ProbePool (K worker
+processes, each with its own event loop) instead of running them in-process;
+compare K=0, 1, 2, 4... to see how throughput scales with the worker count.
+
+--check (dns with --local only) skips the benchmark and asserts check_dns against
+the stub instead: answer matching, a wrong expected answer, NXDOMAIN and a query
+the stub never answers (timeout). Exits non-zero if any case fails.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import resource
+import socket
+import statistics
+import struct
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.probe_pool import ProbePool  # noqa: E402
+from app.utils.probe_registry import check_port, get_probe, registered_probes  # noqa: E402
+
+
+class _EchoProtocol(asyncio.DatagramProtocol):
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.transport.sendto(data, addr)
+
+
+class _DnsStubProtocol(asyncio.DatagramProtocol):
+    """Answers every A query with 127.0.0.1, names starting with "nx" with NXDOMAIN and drops queries for names starting with "drop" unanswered"""
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        end = 12
+        while data[end]:
+            end += data[end] + 1
+        if data[13:17].lower() == b"drop":
+            return
+        question = data[12:end + 5]
+        qtype = struct.unpack_from("!H", data, end + 1)[0]
+        nxdomain = data[13:15].lower() == b"nx"
+        answer = b""
+        if qtype == 1 and not nxdomain:
+            answer = b"\xc0\x0c" + struct.pack("!HHIH", 1, 1, 60, 4) + socket.inet_aton("127.0.0.1")
+        flags = 0x8183 if nxdomain else 0x8180
+        header = data[:2] + struct.pack("!HHHHH", flags, 1, 1 if answer else 0, 0, 0)
+        self.transport.sendto(header + question + answer, addr)
+
+
+async def _http_handler(reader, writer):
+    try:
+        while await reader.readuntil(b"\r\n\r\n"):
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+        pass
+    writer.close()
+
+
+async def start_local_target(protocol):
+    """Starts a loopback target for the protocol and returns (port, closer)"""
+    loop = asyncio.get_running_loop()
+    if protocol in ("udp", "dns"):
+        factory = _DnsStubProtocol if protocol == "dns" else _EchoProtocol
+        transport, _ = await loop.create_datagram_endpoint(factory, local_addr=("127.0.0.1", 0))
+        # a burst of --concurrency datagrams must not overflow the target's default receive buffer
+        transport.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        return transport.get_extra_info("sockname")[1], transport.close
+    handler = _http_handler if protocol == "http" else (lambda reader, writer: writer.close())
+    server = await asyncio.start_server(handler, "127.0.0.1", 0, backlog=65535)
+    return server.sockets[0].getsockname()[1], server.close
+
+
+def _serve_local_target(protocol, conn):
+    async def serve():
+        port, _ = await start_local_target(protocol)
+        conn.send(port)
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+async def start_local_target_process(protocol):
+    """Like start_local_target, but in its own process so the target does not compete with the probing loop"""
+    ctx = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = ctx.Pipe()
+    process = ctx.Process(target=_serve_local_target, args=(protocol, child_conn), daemon=True)
+    process.start()
+    port = await asyncio.to_thread(parent_conn.recv)
+    return port, process.terminate
+
+
+# (name, options, expected success, expected response code, text expected in the error)
+DNS_CHECKS = [
+    ("answer matches", {"name": "intranet.example", "expected_answer": "127.0.0.1"}, True, "NOERROR", None),
+    ("case and trailing dot ignored", {"name": "Intranet.Example.", "expected_answer": "127.0.0.1."}, True, "NOERROR", None),
+    ("any NOERROR without expected answer", {"name": "intranet.example"}, True, "NOERROR", None),
+    ("wrong expected answer", {"name": "intranet.example", "expected_answer": "10.0.0.1"}, False, "NOERROR", "127.0.0.1"),
+    ("no records of the type", {"name": "intranet.example", "record_type": "AAAA", "expected_answer": "::1"}, False, "NOERROR", "kayıt yok"),
+    ("NXDOMAIN", {"name": "nx.example"}, False, "NXDOMAIN", "NXDOMAIN"),
+    ("no answer", {"name": "drop.example"}, False, None, "timeout"),
+]
+
+
+async def run_dns_checks(host, port, timeout):
+    """Asserts check_dns against the stub resolver; returns the number of failed cases"""
+    failed = 0
+    for description, options, success, code, error_text in DNS_CHECKS:
+        started = time.perf_counter()
+        result = await check_port(host, port, "dns", timeout, **options)
+        elapsed = time.perf_counter() - started
+        problems = []
+        if result.success != success:
+            problems.append(f"success {result.success}, expected {success}")
+        if result.response_code != code:
+            problems.append(f"response code {result.response_code}, expected {code}")
+        if error_text is not None and error_text not in (result.error or ""):
+            problems.append(f"error {result.error!r} does not mention {error_text!r}")
+        if success and result.latency_ms is None:
+            problems.append("no latency on success")
+        if code is None and not timeout * 0.9 <= elapsed <= timeout + 1.0:
+            problems.append(f"gave up after {elapsed:.2f}s, timeout is {timeout}s")
+        failed += bool(problems)
+        print(f"{'FAIL' if problems else 'ok  '}  {description}: {'; '.join(problems) or result.error or f'{result.latency_ms:.2f}ms'}")
+    return failed
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else float("nan")
+
+
+def mean(values):
+    values = [v for v in values if v is not None]
+    return statistics.fmean(values) if values else None
+
+
+async def main(args):
+    probe = get_probe(args.protocol)
+    if probe is None:
+        names = ", ".join(p.protocol for p in registered_probes())
+        raise SystemExit(f"unknown protocol {args.protocol!r} (registered: {names})")
+    options = dict(item.split("=", 1) for item in args.option)
+    if "expected_status" in options:
+        options["expected_status"] = int(options["expected_status"])
+    host, port, close = args.host, args.port, None
+    if args.local:
+        host = "127.0.0.1"
+        if probe.uses_port:
+            start = start_local_target_process if args.processes else start_local_target
+            port, close = await start(args.protocol)
+    if args.check:
+        if args.protocol != "dns" or not args.local:
+            raise SystemExit("--check needs --protocol dns --local")
+        failed = await run_dns_checks(host, port, args.timeout or probe.default_timeout)
+        close()
+        return 1 if failed else 0
+
+    print(f"{args.protocol}: concurrency class {probe.concurrency_class!r}, default timeout {probe.default_timeout}s, "
+          f"batching {'yes' if probe.supports_batching else 'no'}, "
+          f"{f'{args.processes} probe processes' if args.processes else 'in-process'}")
+    semaphore = asyncio.Semaphore(args.concurrency)
+    pool = None
+    if args.processes:
+        pool = ProbePool(args.processes)
+        pool.start()
+        # wait for the workers to boot so the first round measures probing, not process startup
+        await asyncio.gather(*(pool.probe(host, args.protocol, port, args.timeout, options) for _ in range(args.processes * 4)))
+
+    async def one():
+        async with semaphore:
+            if pool is not None:
+                return await pool.probe(host, args.protocol, port, args.timeout, options)
+            return await check_port(host, port, args.protocol, args.timeout, **options)
+
+    for round_number in range(1, args.rounds + 1):
+        started = time.perf_counter()
+        results = await asyncio.gather(*(one() for _ in range(args.count)))
+        elapsed = time.perf_counter() - started
+        latencies = sorted(r.latency_ms for r in results if r.success and r.latency_ms is not None)
+        failures = sum(1 for r in results if not r.success)
+        phases = {name: mean([getattr(r.timings, name) for r in results]) for name in ("resolve_ms", "connect_ms", "first_byte_ms", "total_ms")}
+        phase_text = "  ".join(f"{name[:-3]} {value:.2f}" for name, value in phases.items() if value is not None)
+        print(
+            f"round {round_number}: {elapsed:7.3f}s  {args.count / elapsed:9.0f} probes/s  "
+            f"p50 {percentile(latencies, 0.5):7.2f}ms  p99 {percentile(latencies, 0.99):7.2f}ms  "
+            f"failures {failures:5d}  avg phases (ms): {phase_text}"
+        )
+        if failures and args.verbose:
+            print("  first error:", next(r.error for r in results if not r.success))
+        codes = sorted({r.response_code for r in results if r.response_code is not None})
+        if codes and args.verbose:
+            print("  response codes:", ", ".join(codes))
+    if pool is not None:
+        await pool.stop()
+    if close is not None:
+        close()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-protocol probe benchmark")
+    parser.add_argument("--protocol", default="tcp")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--local", action="store_true", help="probe a loopback target started by the benchmark")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=None, help="defaults to the probe type's default timeout")
+    parser.add_argument("--processes", type=int, default=0, metavar="K", help="run probes in K ProbePool worker processes (0: in-process)")
+    parser.add_argument("--option", action="append", default=[], metavar="KEY=VALUE", help="protocol option, may be repeated")
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("--check", action="store_true", help="assert check_dns against the local stub instead of benchmarking (dns --local)")
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    sys.exit(asyncio.run(main(args)))
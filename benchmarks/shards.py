@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Shard split / failover demo
+
+Starts three scheduler processes (A, B, C) against one SQLite database and
+follows the shard leases:
+
+  1. A starts alone and takes every shard
+  2. B and C join; the shards are split evenly between the three
+  3. C is killed with SIGKILL (no lease release); after the lease TTL A and B
+     take over its shards
+
+Each process reports the shards it owns every --sample seconds. The script
+prints the timeline and exits non-zero if a phase does not converge within
+--phase-timeout seconds or if a shard is ever owned by two processes at once.
+
+Usage:
+    python benchmarks/shards.py --monitors 60 --shards 6 --lease-ttl 3
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _instance(name, args, conn):
+    """Child process: one scheduler reporting its shards until told to stop"""
+    os.environ["PMON_INSTANCE_ID"] = name
+    sys.path.insert(0, str(ROOT))
+    from app.scheduler import MonitorScheduler
+
+    async def run():
+        scheduler = MonitorScheduler(lease_ttl=args.lease_ttl, shard_count=args.shards, mode=args.mode)
+        task = asyncio.create_task(scheduler.start())
+        while not conn.poll():
+            await asyncio.sleep(args.sample)
+            snapshot = await scheduler.metrics_snapshot()
+            conn.send((name, snapshot["shards"], snapshot["checks_total"]))
+        await scheduler.stop()
+        await task
+        snapshot = await scheduler.metrics_snapshot()
+        conn.send((name, None, snapshot["checks_total"]))
+
+    asyncio.run(run())
+
+
+def setup(monitors):
+    from app import crud, models
+    from app.database import SessionLocal, init_db
+
+    init_db()
+    db = SessionLocal()
+    try:
+        tenant = crud.create_tenant(db, "shards", "shards")
+        # Port 1 on loopback refuses at once; the checks themselves are not what is measured
+        service = crud.create_service(db, tenant.id, "closed", models.ProtocolEnum.tcp, 1, False)
+        for index in range(monitors):
+            server = crud.create_server(db, tenant.id, f"s{index}", f"127.0.{index // 250}.{index % 250 + 1}")
+            crud.create_monitor(db, tenant.id, server.id, service.id, 5, True)
+    finally:
+        db.close()
+
+
+class Cluster:
+    def __init__(self, args):
+        self.args = args
+        self.ctx = multiprocessing.get_context("spawn")
+        self.processes = {}
+        self.conns = {}
+        self.shards = {}
+        self.checks = {}
+        self.overlaps = 0
+        self.started = time.monotonic()
+
+    def start(self, name):
+        parent_conn, child_conn = self.ctx.Pipe()
+        process = self.ctx.Process(target=_instance, args=(name, self.args, child_conn), daemon=True)
+        process.start()
+        self.processes[name], self.conns[name] = process, parent_conn
+        self.shards[name] = []
+        self.log(f"started {name}")
+
+    def kill(self, name):
+        os.kill(self.processes[name].pid, signal.SIGKILL)
+        self.processes[name].join()
+        del self.processes[name], self.conns[name], self.shards[name]
+        self.log(f"killed {name} (SIGKILL, leases not released)")
+
+    def stop(self):
+        for conn in self.conns.values():
+            conn.send("stop")
+        for name, process in self.processes.items():
+            while self.conns[name].poll(30):
+                _, shards, checks = self.conns[name].recv()
+                self.checks[name] = checks
+                if shards is None:
+                    break
+            process.join(10)
+
+    def log(self, message):
+        print(f"{time.monotonic() - self.started:7.1f}s  {message}", flush=True)
+
+    def poll(self):
+        changed = False
+        for name, conn in self.conns.items():
+            while conn.poll():
+                _, shards, checks = conn.recv()
+                self.checks[name] = checks
+                if shards != self.shards[name]:
+                    self.shards[name] = shards
+                    changed = True
+        if changed:
+            owners = {}
+            for name, shards in self.shards.items():
+                for shard in shards:
+                    owners.setdefault(shard, []).append(name)
+            shared = {shard: names for shard, names in owners.items() if len(names) > 1}
+            if shared:
+                self.overlaps += 1
+            layout = "  ".join(f"{name}={shards}" for name, shards in sorted(self.shards.items()))
+            self.log(f"{layout}{f'  OVERLAP {shared}' if shared else ''}")
+
+    def wait_for(self, description, expected_sizes):
+        """Waits until the live processes own disjoint shards covering all of them, with the expected counts"""
+        deadline = time.monotonic() + self.args.phase_timeout
+        while time.monotonic() < deadline:
+            self.poll()
+            owned = [shard for shards in self.shards.values() for shard in shards]
+            sizes = sorted(len(shards) for shards in self.shards.values())
+            if sorted(owned) == list(range(self.args.shards)) and sizes == sorted(expected_sizes):
+                self.log(f"ok: {description}")
+                return True
+            time.sleep(0.1)
+        self.log(f"FAILED: {description} (shards {self.shards})")
+        return False
+
+
+def fair_split(shards, instances):
+    base, extra = divmod(shards, instances)
+    return [base + 1] * extra + [base] * (instances - extra)
+
+
+def main(args):
+    workdir = tempfile.mkdtemp(prefix="pmon-shards-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/pmon.db"
+    os.environ.setdefault("PMON_SCHEDULER_RAMPUP_SECONDS", "0")
+    sys.path.insert(0, str(ROOT))
+    setup(args.monitors)
+    print(f"{args.monitors} monitors, {args.shards} shards, lease TTL {args.lease_ttl}s, mode {args.mode}, database {workdir}/pmon.db")
+
+    cluster = Cluster(args)
+    ok = True
+    try:
+        cluster.start("A")
+        ok &= cluster.wait_for("A owns every shard", [args.shards])
+        cluster.start("B")
+        cluster.start("C")
+        ok &= cluster.wait_for("shards split between A, B and C", fair_split(args.shards, 3))
+        cluster.kill("C")
+        killed_at = time.monotonic()
+        ok &= cluster.wait_for("A and B took over C's shards", fair_split(args.shards, 2))
+        cluster.log(f"failover took {time.monotonic() - killed_at:.1f}s")
+    finally:
+        cluster.stop()
+    print("checks per instance:", ", ".join(f"{name} {count}" for name, count in sorted(cluster.checks.items())))
+    if cluster.overlaps:
+        print(f"FAILED: a shard was owned by two instances in {cluster.overlaps} samples")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shard split / failover demo")
+    parser.add_argument("--monitors", type=int, default=60)
+    parser.add_argument("--shards", type=int, default=6)
+    parser.add_argument("--lease-ttl", type=int, default=3, help="scheduler lease TTL in seconds (failover waits about this long)")
+    parser.add_argument("--mode", default="poll", choices=["poll", "heap"])
+    parser.add_argument("--sample", type=float, default=0.25, help="how often each instance reports its shards (seconds)")
+    parser.add_argument("--phase-timeout", type=float, default=30.0)
+    sys.exit(main(parser.parse_args()))
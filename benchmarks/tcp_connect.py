@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+TCP connect probe micro-benchmark
+
+Compares the previous asyncio.open_connection based check against the lean
+sock_connect + SO_LINGER=0 probe used by check_tcp, by running N concurrent
+connects against a local listener.
+
+Usage:
+    python benchmarks/tcp_connect.py --connections 10000 --rounds 3
+
+TIME_WAIT sockets live for 60s and the kernel may reuse them for new loopback
+connects, so the TIME_WAIT column is only meaningful in the first round.
+"""
+
+import argparse
+import asyncio
+import resource
+import socket
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.network import check_tcp  # noqa: E402
+
+
+async def legacy_check_tcp(host, port, timeout=3.0):
+    """check_tcp before the lean probe: full StreamReader/StreamWriter pair per check"""
+    start = asyncio.get_event_loop().time()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout=timeout)
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
+        return True, (asyncio.get_event_loop().time() - start) * 1000.0, None
+    except Exception as exc:
+        return False, None, str(exc)
+
+
+def start_listener(loop):
+    """
+    Accepts connections without creating transports and closes each one after the
+    client does, so TIME_WAIT sockets counted below belong to the probing side
+    """
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(("127.0.0.1", 0))
+    server.listen(65535)
+    server.setblocking(False)
+
+    def on_closed(conn):
+        try:
+            if conn.recv(1):
+                return
+        except BlockingIOError:
+            return
+        except OSError:
+            pass
+        loop.remove_reader(conn.fileno())
+        conn.close()
+
+    def on_accept():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            conn.setblocking(False)
+            loop.add_reader(conn.fileno(), on_closed, conn)
+
+    loop.add_reader(server.fileno(), on_accept)
+    return server
+
+
+def time_wait_count():
+    """Number of sockets in TIME_WAIT (Linux only)"""
+    total = 0
+    for path in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(path) as f:
+                next(f)
+                total += sum(1 for line in f if line.split()[3] == "06")
+        except OSError:
+            pass
+    return total
+
+
+async def run_round(name, probe, port, connections, timeout):
+    started = time.perf_counter()
+    results = await asyncio.gather(*(probe("127.0.0.1", port, timeout) for _ in range(connections)))
+    elapsed = time.perf_counter() - started
+    latencies = sorted(r[1] for r in results if r[0])
+    failures = connections - len(latencies)
+    p50 = statistics.median(latencies) if latencies else float("nan")
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else float("nan")
+    print(
+        f"{name:<8} {elapsed:7.3f}s  {connections / elapsed:9.0f} conn/s  "
+        f"p50 {p50:7.2f}ms  p99 {p99:7.2f}ms  failures {failures:5d}  TIME_WAIT {time_wait_count():6d}"
+    )
+
+
+async def main(args):
+    loop = asyncio.get_running_loop()
+    server = start_listener(loop)
+    port = server.getsockname()[1]
+    # lean first: its TIME_WAIT count is not mixed with the legacy run's leftovers
+    probes = [("lean", check_tcp), ("legacy", legacy_check_tcp)]
+    for round_number in range(1, args.rounds + 1):
+        print(f"Round {round_number} ({args.connections} concurrent connects)")
+        for name, probe in probes:
+            await run_round(name, probe, port, args.connections, args.timeout)
+            # Let TIME_WAIT numbers settle between variants
+            await asyncio.sleep(0.5)
+    loop.remove_reader(server.fileno())
+    server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TCP connect probe micro-benchmark")
+    parser.add_argument("--connections", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=10.0)
+    args = parser.parse_args()
+
+    # Each connect needs a client fd (and briefly a server fd)
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    asyncio.run(main(args))
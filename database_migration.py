@@ -7,6 +7,9 @@ Handles schema changes for PING feature
 import sqlite3
 import os
 from pathlib import Path
+from types import SimpleNamespace
+
+from app.utils.probe_registry import service_options_key
 
 def migrate_database():
     """Migrate existing database to support PING features"""
@@ -46,6 +49,48 @@ def migrate_database():
             print("Adding 'ping_location_id' column to service_definitions...")
             cursor.execute("ALTER TABLE service_definitions ADD COLUMN ping_location_id INTEGER")
         
+        if 'udp_payload_type' not in columns:
+            print("Adding UDP payload columns to service_definitions...")
+            cursor.execute("ALTER TABLE service_definitions ADD COLUMN udp_payload_type VARCHAR(4)")
+            cursor.execute("ALTER TABLE service_definitions ADD COLUMN udp_payload VARCHAR(1024)")
+        
+        if 'http_path' not in columns:
+            print("Adding HTTP probe columns to service_definitions...")
+            cursor.execute("ALTER TABLE service_definitions ADD COLUMN http_path VARCHAR(1024)")
+            cursor.execute("ALTER TABLE service_definitions ADD COLUMN http_method VARCHAR(7)")
+            cursor.execute("ALTER TABLE service_definitions ADD COLUMN http_expected_status INTEGER")
+            cursor.execute("ALTER TABLE service_definitions ADD COLUMN http_body_match VARCHAR(1024)")
+            cursor.execute("ALTER TABLE service_definitions ADD COLUMN http_tls BOOLEAN NOT NULL DEFAULT 0")
+        
+        if 'dns_query_name' not in columns:
+            print("Adding DNS probe columns to service_definitions...")
+            cursor.execute("ALTER TABLE service_definitions ADD COLUMN dns_query_name VARCHAR(255)")
+            cursor.execute("ALTER TABLE service_definitions ADD COLUMN dns_record_type VARCHAR(5)")
+            cursor.execute("ALTER TABLE service_definitions ADD COLUMN dns_expected_answer VARCHAR(255)")
+        
+        if 'options_key' not in columns:
+            print("Adding options_key to service_definitions and its unique key...")
+            cursor.execute("ALTER TABLE service_definitions ADD COLUMN options_key VARCHAR(64) NOT NULL DEFAULT ''")
+            cursor.execute("SELECT * FROM service_definitions")
+            names = [column[0] for column in cursor.description]
+            for row in cursor.fetchall():
+                service = SimpleNamespace(**dict(zip(names, row)))
+                cursor.execute("UPDATE service_definitions SET options_key = ? WHERE id = ?", (service_options_key(service), service.id))
+            # SQLite constraint değiştiremez; tablo yeni tekillik anahtarıyla yeniden oluşturulur
+            cursor.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='service_definitions'")
+            table_sql = cursor.fetchone()[0]
+            old_constraint = "CONSTRAINT uq_service_tenant_proto_port UNIQUE (tenant_id, protocol, port)"
+            if old_constraint in table_sql:
+                cursor.execute("SELECT sql FROM sqlite_master WHERE type='index' AND tbl_name='service_definitions' AND sql IS NOT NULL")
+                index_sqls = [index[0] for index in cursor.fetchall()]
+                table_sql = table_sql.replace(old_constraint, "CONSTRAINT uq_service_tenant_proto_port_options UNIQUE (tenant_id, protocol, port, options_key)")
+                cursor.execute(table_sql.replace("CREATE TABLE service_definitions", "CREATE TABLE service_definitions_new", 1))
+                cursor.execute("INSERT INTO service_definitions_new SELECT * FROM service_definitions")
+                cursor.execute("DROP TABLE service_definitions")
+                cursor.execute("ALTER TABLE service_definitions_new RENAME TO service_definitions")
+                for index_sql in index_sqls:
+                    cursor.execute(index_sql)
+        
         # Check if ping_locations table exists
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='ping_locations'")
         if not cursor.fetchone():
@@ -134,8 +179,76 @@ def migrate_database():
             cursor.execute("ALTER TABLE monitors ADD COLUMN uptime_percentage REAL DEFAULT 100.0")
             cursor.execute("ALTER TABLE monitors ADD COLUMN last_latency_ms INTEGER")
         
+        if 'backoff_enabled' not in monitor_columns:
+            print("Adding backoff policy columns to monitors...")
+            cursor.execute("ALTER TABLE monitors ADD COLUMN backoff_enabled BOOLEAN NOT NULL DEFAULT 0")
+            cursor.execute("ALTER TABLE monitors ADD COLUMN backoff_after_failures INTEGER NOT NULL DEFAULT 3")
+            cursor.execute("ALTER TABLE monitors ADD COLUMN backoff_max_interval_seconds INTEGER NOT NULL DEFAULT 3600")
+            cursor.execute("ALTER TABLE monitors ADD COLUMN confirm_interval_seconds INTEGER")
+        
+        if 'last_total_ms' not in monitor_columns:
+            print("Adding probe timing columns to monitors...")
+            cursor.execute("ALTER TABLE monitors ADD COLUMN last_resolve_ms REAL")
+            cursor.execute("ALTER TABLE monitors ADD COLUMN last_connect_ms REAL")
+            cursor.execute("ALTER TABLE monitors ADD COLUMN last_first_byte_ms REAL")
+            cursor.execute("ALTER TABLE monitors ADD COLUMN last_total_ms REAL")
+        
+        if 'adaptive_timeout_enabled' not in monitor_columns:
+            print("Adding adaptive timeout columns to monitors...")
+            cursor.execute("ALTER TABLE monitors ADD COLUMN adaptive_timeout_enabled BOOLEAN NOT NULL DEFAULT 0")
+            cursor.execute("ALTER TABLE monitors ADD COLUMN latency_ewma_ms REAL")
+            cursor.execute("ALTER TABLE monitors ADD COLUMN latency_dev_ms REAL")
+            cursor.execute("ALTER TABLE monitors ADD COLUMN last_timeout_ms REAL")
+        
+        if 'last_response_code' not in monitor_columns:
+            print("Adding response code column to monitors...")
+            cursor.execute("ALTER TABLE monitors ADD COLUMN last_response_code VARCHAR(16)")
+        
+        if 'uptime_windows' not in monitor_columns:
+            print("Adding sliding-window uptime columns to monitors...")
+            cursor.execute("ALTER TABLE monitors ADD COLUMN uptime_1h_percentage REAL")
+            cursor.execute("ALTER TABLE monitors ADD COLUMN uptime_24h_percentage REAL")
+            cursor.execute("ALTER TABLE monitors ADD COLUMN uptime_7d_percentage REAL")
+            cursor.execute("ALTER TABLE monitors ADD COLUMN uptime_windows TEXT")
+        
+        cursor.execute("PRAGMA table_info(alert_rules)")
+        alert_rule_columns = [column[1] for column in cursor.fetchall()]
+        
+        if 'uptime_window' not in alert_rule_columns:
+            print("Adding uptime window column to alert_rules...")
+            cursor.execute("ALTER TABLE alert_rules ADD COLUMN uptime_window VARCHAR(4)")
+        
+        cursor.execute("PRAGMA table_info(tenants)")
+        tenant_columns = [column[1] for column in cursor.fetchall()]
+        
+        if 'retention_checks_days' not in tenant_columns:
+            print("Adding retention policy columns to tenants...")
+            cursor.execute("ALTER TABLE tenants ADD COLUMN retention_checks_days INTEGER")
+            cursor.execute("ALTER TABLE tenants ADD COLUMN retention_minute_rollups_days INTEGER")
+            cursor.execute("ALTER TABLE tenants ADD COLUMN retention_hour_rollups_days INTEGER")
+            cursor.execute("ALTER TABLE tenants ADD COLUMN retention_day_rollups_days INTEGER")
+            cursor.execute("ALTER TABLE tenants ADD COLUMN retention_alert_history_days INTEGER")
+        
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='alert_histories'")
+        if cursor.fetchone():
+            cursor.execute("CREATE INDEX IF NOT EXISTS ix_alert_histories_sent_at ON alert_histories (sent_at)")
+        
+        # Tek lease'li scheduler'ın tablosu; yerini scheduler_shard_leases aldı
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='scheduler_leases'")
+        if cursor.fetchone():
+            print("Dropping unused scheduler_leases table...")
+            cursor.execute("DROP TABLE scheduler_leases")
+        
         # Commit changes
         conn.commit()
+        
+        # Bakım işi silinen sayfaları parça parça geri verebilsin (incremental_vacuum); tek seferlik tam VACUUM gerekir
+        cursor.execute("PRAGMA auto_vacuum")
+        if cursor.fetchone()[0] != 2:
+            print("Enabling incremental auto_vacuum (VACUUM)...")
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            cursor.execute("VACUUM")
+        
         print("Database migration completed successfully!")
         
     except Exception as e: